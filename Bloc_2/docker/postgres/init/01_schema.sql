@@ -40,38 +40,17 @@ COMMENT ON SCHEMA public IS '';
 CREATE PROCEDURE public.apply_daily_deals(IN cart_id integer, IN o_date date, IN minimum_price numeric, INOUT total numeric)
     LANGUAGE plpgsql
     AS $$
-DECLARE
-    this_product RECORD;
-    discount_percent NUMERIC := 0;
-    item_price NUMERIC;
-    item_discount NUMERIC;
 BEGIN
-    FOR this_product IN
-        SELECT * FROM cart_items WHERE cart_id = cart_id
-    LOOP
-        BEGIN
-            SELECT discount INTO discount_percent
-            FROM daily_deals
-            WHERE p_id = this_product.p_id
-              AND deal_date = o_date;
-        EXCEPTION
-            WHEN no_data_found THEN
-                discount_percent := 0;
-        END;
-
-        SELECT price INTO item_price
-        FROM product
-        WHERE p_id = this_product.p_id;
-
-        FOR i IN 1..this_product.qty LOOP
-            item_discount := (discount_percent / 100.0) * item_price;
-            total := total - item_discount;
-        END LOOP;
-
-        IF total < minimum_price THEN
-            total := minimum_price;
-        END IF;
-    END LOOP;
+    -- Set-based: one join over the cart lines, line discount = price * qty * discount / 100
+    SELECT CASE
+               WHEN count(*) = 0 THEN total
+               ELSE GREATEST(minimum_price, total - COALESCE(sum(p.price * ci.qty * d.discount / 100.0), 0))
+           END
+    INTO total
+    FROM cart_items ci
+    JOIN product p ON p.p_id = ci.p_id
+    LEFT JOIN daily_deals d ON d.p_id = ci.p_id AND d.deal_date = o_date
+    WHERE ci.cart_id = apply_daily_deals.cart_id;
 END;
 $$;
 
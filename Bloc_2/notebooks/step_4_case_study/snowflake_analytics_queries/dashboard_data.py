@@ -0,0 +1,276 @@
+"""
+Couche données partagée par les dashboards analytics
+(local_streamlit_dashboard.py et snowflake_streamlit_dashboard.py).
+
+Chaque section est lue dans une petite table KPI pré-calculée par le pipeline
+(DASHBOARD_QUERIES). Si ces tables n'existent pas encore (vérifié une fois par
+version des données avec KPI_TABLES_QUERY), on récupère en UNE requête un cube pré-agrégé (GROUPING SETS) et chaque section est dérivée
+localement avec pandas (sections_from_cube).
+
+Le cube contient un ensemble de lignes par niveau d'agrégation (colonne
+GROUPING_SET) :
+- STATUS          : RELEVANT_STATUS                       -> KPIs globaux, distribution
+- CATEGORY        : CATEGORY x RELEVANT_STATUS             -> pertinence par catégorie
+- CATEGORY_REVIEW : CATEGORY_REVIEW x RELEVANT_STATUS      -> KPI 2
+- PRODUCT         : PRODUCT_NAME x CATEGORY_REVIEW x STATUS -> KPI 1, 4, 6
+- BUYER           : BUYER_ID x RELEVANT_STATUS             -> KPI 3, 5
+
+Les moyennes sont recalculées à partir de sommes et de comptes non nuls
+(même sémantique que AVG en SQL, qui ignore les NULL).
+"""
+import numpy as np
+import pandas as pd
+
+REVIEW_TABLE = "DB_AMZ.ANALYTICS.REVIEW_RELEVANT"
+
+# Mesures additives : SUM_x et NB_x (= COUNT(x), valeurs non nulles)
+AVG_COLUMNS = ["RATING", "RELEVANCE_SCORE", "CONFIDENCE_SCORE", "TEXT_LENGTH"]
+
+CUBE_QUERY = f"""
+    SELECT
+        CASE GROUPING(PRODUCT_NAME, BUYER_ID, CATEGORY, CATEGORY_REVIEW)
+            WHEN 15 THEN 'STATUS'
+            WHEN 13 THEN 'CATEGORY'
+            WHEN 14 THEN 'CATEGORY_REVIEW'
+            WHEN 6 THEN 'PRODUCT'
+            WHEN 11 THEN 'BUYER'
+        END AS GROUPING_SET,
+        PRODUCT_NAME,
+        BUYER_ID,
+        CATEGORY,
+        CATEGORY_REVIEW,
+        RELEVANT_STATUS,
+        COUNT(*) AS NB_REVIEWS,
+        {", ".join(f"SUM({c}) AS SUM_{c}, COUNT({c}) AS NB_{c}" for c in AVG_COLUMNS)}
+    FROM {REVIEW_TABLE}
+    GROUP BY GROUPING SETS (
+        (RELEVANT_STATUS),
+        (CATEGORY, RELEVANT_STATUS),
+        (CATEGORY_REVIEW, RELEVANT_STATUS),
+        (PRODUCT_NAME, CATEGORY_REVIEW, RELEVANT_STATUS),
+        (BUYER_ID, RELEVANT_STATUS)
+    )
+"""
+
+# Tables KPI pré-calculées par le pipeline (utils/kpi_materializer.py) :
+# section du dashboard -> table
+KPI_TABLES = {
+    "global_kpis": "KPI_GLOBAL",
+    "status_split": "KPI_STATUS",
+    "category_pertinence": "KPI_CATEGORY",
+    "top_products_relevant": "KPI_TOP_PRODUCTS_RELEVANT",
+    "category_review_split": "KPI_CATEGORY_REVIEW",
+    "top_buyers_relevant": "KPI_TOP_BUYERS_RELEVANT",
+    "least_reviewed_products": "KPI_LEAST_PRODUCTS_RELEVANT",
+    "least_reviewed_products_by_category_review": "KPI_LEAST_PRODUCTS_BY_CATEGORY_REVIEW",
+    "most_active_buyers": "KPI_ACTIVE_BUYERS",
+    "most_reviewed_products": "KPI_MOST_REVIEWED_PRODUCTS",
+}
+KPI_SCHEMA = REVIEW_TABLE.rsplit(".", 1)[0]
+
+# Requêtes d'une page de dashboard, exécutées ensemble (en parallèle) par
+# run_queries dans les deux dashboards : une lecture triviale par table KPI
+DASHBOARD_QUERIES = {
+    section: f"""
+        SELECT * EXCLUDE (KPI_RANK, RUN_ID, COMPUTED_AT)
+        FROM {KPI_SCHEMA}.{table}
+        ORDER BY KPI_RANK
+    """
+    for section, table in KPI_TABLES.items()
+}
+
+# Repli si les tables KPI n'existent pas encore (pipeline pas encore passé)
+CUBE_QUERIES = {
+    "cube": CUBE_QUERY,
+}
+
+# Version des données : dernière modification (DML/DDL) d'une table du schéma
+# ANALYTICS. Change à chaque chargement du pipeline -> sert de clé de cache.
+_database, _schema, _ = REVIEW_TABLE.split(".")
+DATA_VERSION_QUERY = f"""
+    SELECT TO_VARCHAR(MAX(LAST_ALTERED)) AS DATA_VERSION
+    FROM {_database}.INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_SCHEMA = '{_schema}'
+"""
+
+# Présence des tables KPI (INFORMATION_SCHEMA) : choisit entre les tables KPI
+# et le cube, sans masquer les autres erreurs des requêtes
+_kpi_database, _kpi_schema = KPI_SCHEMA.split(".")
+KPI_TABLES_QUERY = f"""
+    SELECT COUNT(*) AS NB_TABLES
+    FROM {_kpi_database}.INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_SCHEMA = '{_kpi_schema}'
+      AND TABLE_NAME IN ({", ".join(f"'{t}'" for t in KPI_TABLES.values())})
+"""
+
+# Durée de vie des caches Streamlit (secondes)
+DATA_VERSION_TTL = 60        # fréquence de vérification de la version
+QUERY_CACHE_TTL = 6 * 3600   # borne haute, même si la version ne change pas
+QUERY_CACHE_MAX_ENTRIES = 32
+
+_MEASURES = ["NB_REVIEWS"] + [f"{p}_{c}" for c in AVG_COLUMNS for p in ("SUM", "NB")]
+
+
+# ============================================================================
+# Helpers
+# ============================================================================
+def _round(values, decimals: int):
+    """ROUND Snowflake : arrondi au plus proche, demi-valeurs loin de zéro."""
+    factor = 10 ** decimals
+    values = pd.to_numeric(values, errors="coerce").astype(float)
+    return np.sign(values) * np.floor(np.abs(values) * factor + 0.5) / factor
+
+
+def _avg(df: pd.DataFrame, column: str):
+    return df[f"SUM_{column}"] / df[f"NB_{column}"].replace(0, np.nan)
+
+
+def _level(cube: pd.DataFrame, grouping_set: str) -> pd.DataFrame:
+    return cube[cube["GROUPING_SET"] == grouping_set]
+
+
+def _relevant(df: pd.DataFrame) -> pd.DataFrame:
+    return df[df["RELEVANT_STATUS"] == "RELEVANT"]
+
+
+def _sum_by(df: pd.DataFrame, keys, columns=None) -> pd.DataFrame:
+    # dropna=False : comme GROUP BY en SQL, les NULL forment un groupe
+    columns = columns or _MEASURES
+    return df.groupby(keys, dropna=False, sort=False)[columns].sum().reset_index()
+
+
+def _with_relevant_count(df: pd.DataFrame, keys) -> pd.DataFrame:
+    """Agrège par keys avec NB_REVIEWS (tous statuts) et NB_RELEVANT."""
+    flagged = df.assign(
+        NB_RELEVANT=np.where(df["RELEVANT_STATUS"] == "RELEVANT", df["NB_REVIEWS"], 0)
+    )
+    return _sum_by(flagged, keys, _MEASURES + ["NB_RELEVANT"])
+
+
+def _top(df: pd.DataFrame, column: str, n: int, ascending: bool = False) -> pd.DataFrame:
+    return df.sort_values(column, ascending=ascending, kind="stable").head(n).reset_index(drop=True)
+
+
+def data_version(df: pd.DataFrame) -> str:
+    """Extrait la version (chaîne) du résultat de DATA_VERSION_QUERY."""
+    df = df.rename(columns=str.upper)
+    return "" if df.empty else str(df["DATA_VERSION"].iloc[0])
+
+
+def kpi_tables_ready(df: pd.DataFrame) -> bool:
+    """True si le résultat de KPI_TABLES_QUERY compte toutes les tables KPI."""
+    df = df.rename(columns=str.upper)
+    return not df.empty and int(df["NB_TABLES"].iloc[0]) == len(KPI_TABLES)
+
+
+def prepare_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalise le résultat de CUBE_QUERY (noms en majuscules, mesures numériques)."""
+    df = df.rename(columns=str.upper)
+    for column in _MEASURES:
+        df[column] = pd.to_numeric(df[column]).fillna(0)
+    return df
+
+
+# ============================================================================
+# Sections du dashboard
+# ============================================================================
+def global_kpis(cube: pd.DataFrame) -> pd.DataFrame:
+    totals = _with_relevant_count(_level(cube, "STATUS"), ["GROUPING_SET"])
+    return pd.DataFrame({
+        "TOTAL_REVIEWS": totals["NB_REVIEWS"].astype(int),
+        "NB_RELEVANT": totals["NB_RELEVANT"].astype(int),
+        "AVG_RATING": _round(_avg(totals, "RATING"), 2),
+        "AVG_RELEVANCE_SCORE": _round(_avg(totals, "RELEVANCE_SCORE"), 2),
+        "AVG_CONFIDENCE_SCORE": _round(_avg(totals, "CONFIDENCE_SCORE"), 2),
+        "AVG_TEXT_LENGTH": _round(_avg(totals, "TEXT_LENGTH"), 2),
+    })
+
+
+def status_split(cube: pd.DataFrame) -> pd.DataFrame:
+    status = _sum_by(_level(cube, "STATUS"), ["RELEVANT_STATUS"], ["NB_REVIEWS"])
+    return status.astype({"NB_REVIEWS": int})
+
+
+def category_pertinence(cube: pd.DataFrame) -> pd.DataFrame:
+    cat = _with_relevant_count(_level(cube, "CATEGORY"), ["CATEGORY"])
+    cat = cat.assign(
+        POURCENTAGE_RELEVANT=_round(cat["NB_RELEVANT"] / cat["NB_REVIEWS"], 3),
+        AVG_RATING=_round(_avg(cat, "RATING"), 2),
+    ).astype({"NB_REVIEWS": int, "NB_RELEVANT": int})
+    cat = cat[["CATEGORY", "NB_REVIEWS", "NB_RELEVANT", "POURCENTAGE_RELEVANT", "AVG_RATING"]]
+    return _top(cat, "NB_REVIEWS", len(cat))
+
+
+def top_products_relevant(cube: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+    """KPI 1 — produits avec le plus d'avis RELEVANT."""
+    products = _sum_by(_relevant(_level(cube, "PRODUCT")), ["PRODUCT_NAME"], ["NB_REVIEWS"])
+    products = products.rename(columns={"NB_REVIEWS": "NB_RELEVANT_REVIEWS"})
+    return _top(products, "NB_RELEVANT_REVIEWS", n).astype({"NB_RELEVANT_REVIEWS": int})
+
+
+def category_review_split(cube: pd.DataFrame) -> pd.DataFrame:
+    """KPI 2 — avis RELEVANT par catégorie de review."""
+    split = _sum_by(_relevant(_level(cube, "CATEGORY_REVIEW")), ["CATEGORY_REVIEW"], ["NB_REVIEWS"])
+    split = split.rename(columns={"NB_REVIEWS": "NB_RELEVANT"})
+    return _top(split, "NB_RELEVANT", len(split)).astype({"NB_RELEVANT": int})
+
+
+def top_buyers_relevant(cube: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+    """KPI 3 — clients avec le plus d'avis RELEVANT."""
+    buyers = _sum_by(_relevant(_level(cube, "BUYER")), ["BUYER_ID"], ["NB_REVIEWS"])
+    buyers = buyers.rename(columns={"NB_REVIEWS": "NB_RELEVANT_REVIEWS"})
+    return _top(buyers, "NB_RELEVANT_REVIEWS", n).astype({"NB_RELEVANT_REVIEWS": int})
+
+
+def least_reviewed_products(cube: pd.DataFrame, n: int = 20,
+                            relevant_only: bool = True,
+                            by_category_review: bool = False) -> pd.DataFrame:
+    """
+    KPI 4 — produits avec le moins d'avis.
+
+    Args:
+        cube: Résultat de prepare_cube
+        n: Nombre de produits
+        relevant_only: Ne compter que les avis RELEVANT (dashboard local)
+        by_category_review: Grouper aussi par CATEGORY_REVIEW (dashboard Snowflake)
+    """
+    products = _level(cube, "PRODUCT")
+    if relevant_only:
+        products = _relevant(products)
+    keys = ["PRODUCT_NAME", "CATEGORY_REVIEW"] if by_category_review else ["PRODUCT_NAME"]
+    least = _top(_sum_by(products, keys, ["NB_REVIEWS"]), "NB_REVIEWS", n, ascending=True)
+    least = least.astype({"NB_REVIEWS": int})
+    return least[["PRODUCT_NAME", "NB_REVIEWS"] + keys[1:]]
+
+
+def most_active_buyers(cube: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+    """KPI 5 — clients les plus actifs et leur ratio de pertinence."""
+    buyers = _with_relevant_count(_level(cube, "BUYER"), ["BUYER_ID"])
+    buyers = buyers.assign(PCT_RELEVANT=_round(buyers["NB_RELEVANT"] / buyers["NB_REVIEWS"], 3))
+    buyers = buyers.rename(columns={"NB_REVIEWS": "TOTAL_REVIEWS"})
+    buyers = buyers[["BUYER_ID", "TOTAL_REVIEWS", "NB_RELEVANT", "PCT_RELEVANT"]]
+    return _top(buyers, "TOTAL_REVIEWS", n).astype({"TOTAL_REVIEWS": int, "NB_RELEVANT": int})
+
+
+def most_reviewed_products(cube: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+    """KPI 6 — produits les plus commentés (tous statuts)."""
+    products = _sum_by(_level(cube, "PRODUCT"), ["PRODUCT_NAME"], ["NB_REVIEWS"])
+    return _top(products, "NB_REVIEWS", n).astype({"NB_REVIEWS": int})
+
+
+def sections_from_cube(cube: pd.DataFrame) -> dict:
+    """Calcule toutes les sections (mêmes clés que DASHBOARD_QUERIES) depuis le cube."""
+    return {
+        "global_kpis": global_kpis(cube),
+        "status_split": status_split(cube),
+        "category_pertinence": category_pertinence(cube),
+        "top_products_relevant": top_products_relevant(cube),
+        "category_review_split": category_review_split(cube),
+        "top_buyers_relevant": top_buyers_relevant(cube),
+        "least_reviewed_products": least_reviewed_products(cube),
+        "least_reviewed_products_by_category_review": least_reviewed_products(
+            cube, relevant_only=False, by_category_review=True
+        ),
+        "most_active_buyers": most_active_buyers(cube),
+        "most_reviewed_products": most_reviewed_products(cube),
+    }
@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
 import altair as alt
+import dashboard_data
 import snowflake.connector
 import os
 from dotenv import load_dotenv
@@ -35,14 +35,49 @@ def init_connection():
     )
 conn = init_connection()
 
-@st.cache_data
-def run_query(query):
+def _fetch(query):
     cur = conn.cursor()
     cur.execute(query)
     df = cur.fetch_pandas_all()
     cur.close()
     return df
 
+@st.cache_data(ttl=dashboard_data.DATA_VERSION_TTL, show_spinner=False)
+def get_data_version():
+    return dashboard_data.data_version(_fetch(dashboard_data.DATA_VERSION_QUERY))
+
+# data_version fait partie de la clé de cache : un nouveau chargement ETL
+# invalide les résultats sans vider tout le cache
+@st.cache_data(ttl=dashboard_data.QUERY_CACHE_TTL, max_entries=dashboard_data.QUERY_CACHE_MAX_ENTRIES)
+def run_queries(queries, data_version):
+    """
+    Soumet toutes les requêtes en mode asynchrone puis récupère les résultats :
+    la page attend la requête la plus lente, pas la somme des latences.
+    """
+    cursors = {}
+    try:
+        for name, query in queries.items():
+            cur = conn.cursor()
+            cursors[name] = cur
+            cur.execute_async(query)
+
+        results = {}
+        for name, cur in cursors.items():
+            cur.get_results_from_sfqid(cur.sfqid)  # attend la fin de la requête
+            results[name] = cur.fetch_pandas_all()
+        return results
+    finally:
+        for cur in cursors.values():
+            cur.close()
+
+# Vérifié une fois par version des données (le pipeline crée les tables KPI
+# en même temps qu'il modifie le schéma)
+@st.cache_data(ttl=dashboard_data.QUERY_CACHE_TTL, show_spinner=False)
+def kpi_tables_available(data_version):
+    return dashboard_data.kpi_tables_ready(_fetch(dashboard_data.KPI_TABLES_QUERY))
+
+data_version = get_data_version()
+
 # -------------------------------------------------------------------
 # 3 — Fonctions UI
 # -------------------------------------------------------------------
@@ -63,21 +98,24 @@ def pie_chart(df, label_col, value_col):
         .properties(width=350, height=350)
     )
 
+# -------------------------------------------------------------------
+# Données : tables KPI pré-calculées par le pipeline, sinon un seul scan de
+# REVIEW_RELEVANT (cube pré-agrégé, voir dashboard_data.py)
+# -------------------------------------------------------------------
+if kpi_tables_available(data_version):
+    sections = run_queries(dashboard_data.DASHBOARD_QUERIES, data_version)
+else:
+    st.warning("Tables KPI absentes (pipeline pas encore passé) : calcul à la volée depuis REVIEW_RELEVANT.")
+    cube = dashboard_data.prepare_cube(run_queries(dashboard_data.CUBE_QUERIES, data_version)["cube"])
+    sections = dashboard_data.sections_from_cube(cube)
+st.caption(f"Données mises à jour le {data_version}")
+
 # -------------------------------------------------------------------
 # SECTION : KPIs GLOBAUX
 # -------------------------------------------------------------------
 show_section("KPIs Globaux", "Vue d’ensemble : ")
 
-df_kpi = run_query("""
-    SELECT
-        COUNT(*) AS TOTAL_REVIEWS,
-        SUM(CASE WHEN RELEVANT_STATUS='RELEVANT' THEN 1 ELSE 0 END) AS NB_RELEVANT,
-        ROUND(AVG(RATING), 2) AS AVG_RATING,
-        ROUND(AVG(RELEVANCE_SCORE), 2) AS AVG_RELEVANCE_SCORE,
-        ROUND(AVG(CONFIDENCE_SCORE), 2) AS AVG_CONFIDENCE_SCORE,
-        ROUND(AVG(TEXT_LENGTH), 2) AS AVG_TEXT_LENGTH
-    FROM DB_AMZ.ANALYTICS.REVIEW_RELEVANT
-""")
+df_kpi = sections["global_kpis"]
 
 c1, c2, c3, c4, c5, c6 = st.columns(6)
 c1.metric("Avis totaux", f"{df_kpi.TOTAL_REVIEWS[0]:,}")
@@ -93,13 +131,7 @@ c6.metric("Longueur texte moyenne", df_kpi.AVG_TEXT_LENGTH[0])
 show_section("Distribution du statut de pertinence",
              "Répartition RELEVANT / IRRELEVANT.")
 
-df_status = run_query("""
-    SELECT
-      RELEVANT_STATUS,
-      COUNT(*) AS NB_REVIEWS
-    FROM DB_AMZ.ANALYTICS.REVIEW_RELEVANT
-    GROUP BY RELEVANT_STATUS
-""")
+df_status = sections["status_split"]
 
 c1, c2 = st.columns([1.2, 1])
 
@@ -114,17 +146,7 @@ with c2:
 show_section("Pertinence par catégorie produit",
              "Identifier les catégories produits les plus pertinentes.")
 
-df_cat = run_query("""
-    SELECT
-      CATEGORY,
-      COUNT(*) AS NB_REVIEWS,
-      SUM(CASE WHEN RELEVANT_STATUS='RELEVANT' THEN 1 ELSE 0 END) AS NB_RELEVANT,
-      ROUND(SUM(CASE WHEN RELEVANT_STATUS='RELEVANT' THEN 1 ELSE 0 END) / COUNT(*), 3) AS POURCENTAGE_RELEVANT,
-      ROUND(AVG(RATING),2) AS AVG_RATING
-    FROM DB_AMZ.ANALYTICS.REVIEW_RELEVANT
-    GROUP BY CATEGORY
-    ORDER BY NB_REVIEWS DESC
-""")
+df_cat = sections["category_pertinence"]
 
 st.dataframe(df_cat, use_container_width=True)
 
@@ -147,16 +169,7 @@ st.altair_chart(bar, use_container_width=True)
 show_section("KPI 1 — Top 20 produits avec le plus d'avis pertinents",
              "Produits générant le plus d'avis classés RELEVANT.")
 
-df_kpi1 = run_query("""
-    SELECT
-        PRODUCT_NAME,
-        COUNT(*) AS NB_RELEVANT_REVIEWS
-    FROM DB_AMZ.ANALYTICS.REVIEW_RELEVANT
-    WHERE RELEVANT_STATUS = 'RELEVANT'
-    GROUP BY PRODUCT_NAME
-    ORDER BY NB_RELEVANT_REVIEWS DESC
-    LIMIT 20;
-""")
+df_kpi1 = sections["top_products_relevant"]
 
 st.dataframe(df_kpi1, use_container_width=True)
 st.altair_chart(
@@ -173,15 +186,7 @@ st.altair_chart(
 show_section("KPI 2 — Répartition par catégorie review",
              "Distribution des avis pertinents selon la catégorie review.")
 
-df_kpi2 = run_query("""
-    SELECT
-        CATEGORY_REVIEW,
-        COUNT(*) AS NB_RELEVANT
-    FROM DB_AMZ.ANALYTICS.REVIEW_RELEVANT
-    WHERE RELEVANT_STATUS = 'RELEVANT'
-    GROUP BY CATEGORY_REVIEW
-    ORDER BY NB_RELEVANT DESC;
-""")
+df_kpi2 = sections["category_review_split"]
 
 c1, c2 = st.columns([1.3, 1])
 with c1:
@@ -195,16 +200,7 @@ with c2:
 show_section("KPI 3 — Top 20 clients (avis pertinents)",
              "Analyse des clients avec le plus d'avis pertinents.")
 
-df_kpi3 = run_query("""
-    SELECT
-        BUYER_ID,
-        COUNT(*) AS NB_RELEVANT_REVIEWS
-    FROM DB_AMZ.ANALYTICS.REVIEW_RELEVANT
-    WHERE RELEVANT_STATUS = 'RELEVANT'
-    GROUP BY BUYER_ID
-    ORDER BY NB_RELEVANT_REVIEWS DESC
-    LIMIT 20;
-""")
+df_kpi3 = sections["top_buyers_relevant"]
 
 st.dataframe(df_kpi3, use_container_width=True)
 
@@ -214,16 +210,7 @@ st.dataframe(df_kpi3, use_container_width=True)
 show_section("KPI 4 — Les 20 produits avec le moins d'avis pertinents",
              "Produits avec le moins de reviews.")
 
-df_kpi4 = run_query("""
-    SELECT
-        PRODUCT_NAME,
-        COUNT(*) AS NB_REVIEWS
-    FROM DB_AMZ.ANALYTICS.REVIEW_RELEVANT
-    WHERE RELEVANT_STATUS = 'RELEVANT'
-    GROUP BY PRODUCT_NAME
-    ORDER BY NB_REVIEWS ASC
-    LIMIT 20;
-""")
+df_kpi4 = sections["least_reviewed_products"]
 
 st.dataframe(df_kpi4, use_container_width=True)
 
@@ -233,20 +220,7 @@ st.dataframe(df_kpi4, use_container_width=True)
 show_section("KPI 5 — Top 20 clients les plus actifs",
              "Nombre total d'avis + ratio de pertinence.")
 
-df_kpi_m1 = run_query("""
-    SELECT
-        BUYER_ID,
-        COUNT(*) AS TOTAL_REVIEWS,
-        SUM(CASE WHEN RELEVANT_STATUS = 'RELEVANT' THEN 1 ELSE 0 END) AS NB_RELEVANT,
-        ROUND(
-            SUM(CASE WHEN RELEVANT_STATUS = 'RELEVANT' THEN 1 ELSE 0 END) 
-            / COUNT(*), 3
-        ) AS PCT_RELEVANT
-    FROM DB_AMZ.ANALYTICS.REVIEW_RELEVANT
-    GROUP BY BUYER_ID
-    ORDER BY TOTAL_REVIEWS DESC
-    LIMIT 20;
-""")
+df_kpi_m1 = sections["most_active_buyers"]
 
 st.dataframe(df_kpi_m1, use_container_width=True)
 
@@ -256,14 +230,6 @@ st.dataframe(df_kpi_m1, use_container_width=True)
 show_section("KPI 6 — Produits les plus commentés",
              "Produits générant le plus d'engagement client.")
 
-df_kpi_m4 = run_query("""
-    SELECT
-        PRODUCT_NAME,
-        COUNT(*) AS NB_REVIEWS
-    FROM DB_AMZ.ANALYTICS.REVIEW_RELEVANT
-    GROUP BY PRODUCT_NAME
-    ORDER BY NB_REVIEWS DESC
-    LIMIT 20;
-""")
+df_kpi_m4 = sections["most_reviewed_products"]
 
 st.dataframe(df_kpi_m4, use_container_width=True)
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Benchmark mémoire de la politique de types (scripts/dags/utils/dtype_policy.py).
+
+Écrit les tables synthétiques en CSV (comme raw/ sur S3), puis exécute
+chargement + join_tables + clean_and_validate + score_reviews dans un
+processus séparé par mode, pour mesurer un pic de RSS propre :
+
+    default       : types par défaut de pandas (PIPELINE_COMPACT_DTYPES=0)
+    compact       : politique de types (category, Int8 / Int32, boolean)
+    compact_arrow : idem avec chaînes Arrow (PIPELINE_STRING_STORAGE=pyarrow,
+                    si pyarrow est installé)
+
+Les chaînes sont lues en object comme en pandas 2.x (version des
+requirements), y compris sous pandas 3.
+
+Pour chaque mode : mémoire (deep) des tables brutes, du résultat de la
+jointure, des lignes clean et scorées, pic de RSS du processus et temps mural ;
+puis la réduction de chaque mode compact par rapport à default.
+
+Usage:
+    python benchmarks/bench_dtype_memory.py --reviews 100000
+    python benchmarks/bench_dtype_memory.py --reviews 200000 --output reports/bench_dtype_memory.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts" / "dags"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+MODES = {
+    "default": {"PIPELINE_COMPACT_DTYPES": "0"},
+    "compact": {"PIPELINE_COMPACT_DTYPES": "1", "PIPELINE_STRING_STORAGE": ""},
+    "compact_arrow": {"PIPELINE_COMPACT_DTYPES": "1", "PIPELINE_STRING_STORAGE": "pyarrow"},
+}
+METRICS = ("raw_tables_bytes", "joined_bytes", "clean_bytes", "scored_bytes", "peak_rss_bytes")
+
+
+def run_mode(data_dir: str) -> dict:
+    """Load, join, clean and score the CSVs of data_dir in this process (mode set by the environment)."""
+    import pandas as pd
+
+    if pd.__version__ >= "3":
+        # Chaînes object par défaut comme en pandas 2.x (version des requirements)
+        pd.set_option("future.infer_string", False)
+
+    from utils.dtype_policy import STRING_STORAGE, memory_bytes, read_csv_compact
+    from utils.instrumentation import peak_rss_bytes
+    from utils.relevance_scoring import score_reviews
+    from utils.review_transforms import clean_and_validate, join_tables
+
+    start = time.perf_counter()
+    tables = {path.stem: read_csv_compact(path, path.stem) for path in sorted(Path(data_dir).glob("*.csv"))}
+    df_joined = join_tables(tables)
+    df_clean, df_rejected = clean_and_validate(df_joined)
+    df_scored = score_reviews(df_clean)
+    wall_s, peak = round(time.perf_counter() - start, 3), peak_rss_bytes()
+
+    return {
+        "raw_tables_bytes": sum(memory_bytes(df) for df in tables.values()),
+        "joined_bytes": memory_bytes(df_joined),
+        "clean_bytes": memory_bytes(df_clean),
+        "scored_bytes": memory_bytes(df_scored),
+        "peak_rss_bytes": peak,
+        "wall_s": wall_s,
+        "rows_clean": len(df_clean),
+        "rows_rejected": len(df_rejected),
+        "rows_relevant": int((df_scored["relevant_status"] == "RELEVANT").sum()),
+        "string_storage": STRING_STORAGE or "object",
+        "clean_dtypes": {column: str(dtype) for column, dtype in df_clean.dtypes.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory of the compact dtype policy")
+    parser.add_argument("--reviews", type=int, default=100_000, help="Number of synthetic reviews")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--dirty-rate", type=float, default=0.05, help="Fraction of invalid review rows")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)  # dossier CSV, exécution d'un mode
+    parser.add_argument("--generate", help=argparse.SUPPRESS)  # dossier CSV à écrire
+    args = parser.parse_args()
+
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    if args.worker:
+        print(json.dumps(run_mode(args.worker)))
+        return
+    if args.generate:
+        from synthetic_data import generate_tables
+        for name, df in generate_tables(args.reviews, args.seed, args.dirty_rate).items():
+            df.to_csv(Path(args.generate) / f"{name}.csv", index=False)
+        return
+
+    import pandas as pd
+    from utils.dtype_policy import ARROW_AVAILABLE
+
+    report = {
+        "benchmark": "dtype_memory",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "parameters": {"reviews": args.reviews, "seed": args.seed, "dirty_rate": args.dirty_rate},
+        "modes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Génération dans un sous-processus : ru_maxrss est conservé à travers
+        # fork/exec, un parent chargé fausserait le pic mesuré des workers
+        subprocess.run([sys.executable, __file__, "--generate", data_dir, "--reviews", str(args.reviews),
+                        "--seed", str(args.seed), "--dirty-rate", str(args.dirty_rate)], check=True)
+
+        for mode, overrides in MODES.items():
+            if mode == "compact_arrow" and not ARROW_AVAILABLE:
+                print("[SKIP] compact_arrow: pyarrow is not installed", file=sys.stderr)
+                continue
+            print(f"Running {mode} dtypes on {args.reviews:,} reviews...", file=sys.stderr)
+            env = {**os.environ, **overrides}
+            result = subprocess.run([sys.executable, __file__, "--worker", data_dir],
+                                    env=env, capture_output=True, text=True, check=True)
+            report["modes"][mode] = json.loads(result.stdout.strip().splitlines()[-1])
+
+    default = report["modes"]["default"]
+    counts = ("rows_clean", "rows_rejected", "rows_relevant")
+    report["reduction"], report["identical_rows"] = {}, {}
+    for mode, result in report["modes"].items():
+        if mode == "default":
+            continue
+        report["reduction"][mode] = {metric: round(1 - result[metric] / default[metric], 3) for metric in METRICS}
+        report["identical_rows"][mode] = all(result[key] == default[key] for key in counts)
+
+        print(f"{mode} vs default:", file=sys.stderr)
+        for metric, reduction in report["reduction"][mode].items():
+            print(f"  {metric:<18} {default[metric] / 1e6:>9.1f} MB -> {result[metric] / 1e6:>9.1f} MB  "
+                  f"({-reduction:+.0%})", file=sys.stderr)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(payload)
+        print(f"[OK] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
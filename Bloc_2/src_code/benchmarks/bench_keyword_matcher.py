@@ -0,0 +1,137 @@
+"""
+Benchmark du comptage de mots-clés pondérés (scripts/dags/utils/keyword_matcher.py).
+
+Compare, sur les descriptions synthétiques et pour des dictionnaires de
+taille croissante (lexiques du scoring complétés par des mots-clés générés) :
+
+    regex_per_keyword : une recherche str.count(r"\\bmot\\b") par mot-clé,
+                        O(mots-clés x texte)
+    aho_corasick      : KeywordMatcher, un seul passage par description
+                        (backend pyahocorasick si installé)
+    aho_corasick_py   : même automate en Python pur (--python-backend)
+
+Les comptages pondérés des trois méthodes doivent être identiques (vérifié).
+
+Usage:
+    python benchmarks/bench_keyword_matcher.py --reviews 20000 --keywords 100 1000 5000
+    python benchmarks/bench_keyword_matcher.py --reviews 50000 --output reports/bench_keywords.json
+"""
+import argparse
+import json
+import logging
+import platform
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts" / "dags"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from utils.keyword_matcher import KeywordMatcher, ahocorasick
+from utils.relevance_scoring import LEXICONS
+from synthetic_data import generate_tables
+from bench_pipeline_stages import stage_report, time_stage
+
+
+def build_lexicons(n_keywords: int, seed: int) -> dict:
+    """Scoring lexicons padded with generated keywords (mostly absent from the texts) up to n_keywords."""
+    rng = np.random.default_rng(seed)
+    lexicons = {name: dict(words) for name, words in LEXICONS.items()}
+    names = list(lexicons)
+    existing = sum(len(words) for words in lexicons.values())
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    for _ in range(max(0, n_keywords - existing)):
+        word = "".join(rng.choice(letters, rng.integers(4, 10)))
+        lexicons[names[rng.integers(len(names))]][word] = float(rng.integers(1, 4))
+    return lexicons
+
+
+def regex_per_keyword(texts: pd.Series, lexicons: dict) -> np.ndarray:
+    """Baseline: one vectorised regex count per keyword."""
+    lowered = texts.fillna("").str.lower()
+    hits = np.zeros((len(texts), len(lexicons)))
+    for j, words in enumerate(lexicons.values()):
+        for word, weight in words.items():
+            hits[:, j] += weight * lowered.str.count(rf"\b{re.escape(word)}\b").to_numpy()
+    return hits
+
+
+def bench_dictionary(texts: pd.Series, lexicons: dict, repeat: int, python_backend: bool) -> dict:
+    """Benchmark every method for one dictionary size."""
+    n_texts = len(texts)
+    n_keywords = sum(len(words) for words in lexicons.values())
+    run = {"keywords": n_keywords, "methods": {}}
+
+    reference, walls, cpus = time_stage(lambda: regex_per_keyword(texts, lexicons), 1)
+    run["methods"]["regex_per_keyword"] = stage_report(walls, cpus, n_texts, n_texts)
+
+    backends = [("aho_corasick", None)] + ([("aho_corasick_py", "python")] if python_backend else [])
+    identical = True
+    for name, backend in backends:
+        matcher, walls, cpus = time_stage(lambda: KeywordMatcher(lexicons, backend=backend), 1)
+        build_s = walls[0]
+        hits, walls, cpus = time_stage(lambda: matcher.hits_batch(texts.to_numpy()), repeat)
+        run["methods"][name] = stage_report(walls, cpus, n_texts, n_texts)
+        run["methods"][name]["build_s"] = round(build_s, 4)
+        identical = identical and bool(np.allclose(hits, reference))
+
+    run["identical"] = identical
+    run["speedup"] = round(run["methods"]["regex_per_keyword"]["wall_s_min"]
+                           / run["methods"]["aho_corasick"]["wall_s_min"], 1)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the keyword automaton against regex per keyword")
+    parser.add_argument("--reviews", type=int, default=20_000, help="Number of synthetic descriptions")
+    parser.add_argument("--keywords", type=int, nargs="+", default=[100, 1000], help="Dictionary sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the automaton scan")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--python-backend", action="store_true", help="Also time the pure-Python automaton")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    texts = generate_tables(args.reviews, args.seed, dirty_rate=0.0)["review"]["r_desc"]
+    report = {
+        "benchmark": "keyword_matcher",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "pyahocorasick": ahocorasick is not None,
+            "platform": platform.platform(),
+        },
+        "parameters": {"reviews": args.reviews, "repeat": args.repeat, "seed": args.seed,
+                       "avg_text_chars": round(texts.str.len().mean(), 1)},
+        "runs": [],
+    }
+
+    for n_keywords in args.keywords:
+        lexicons = build_lexicons(n_keywords, args.seed)
+        print(f"Benchmarking {sum(len(w) for w in lexicons.values()):,} keywords "
+              f"on {len(texts):,} descriptions...", file=sys.stderr)
+        run = bench_dictionary(texts, lexicons, args.repeat, args.python_backend)
+        for name, method in run["methods"].items():
+            print(f"  {name:<18} {method['wall_s_min']:>9.3f}s  {method['rows_per_s'] or 0:>12,.0f} texts/s",
+                  file=sys.stderr)
+        print(f"  speedup x{run['speedup']}, identical hits: {run['identical']}", file=sys.stderr)
+        report["runs"].append(run)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(payload)
+        print(f"[OK] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark de la transformation partitionnée (scripts/dags/utils/partitioned_transform.py).
+
+Mesure join_tables + clean_and_validate sur les tables synthétiques :
+
+    single_process : exécution mono-processus (référence)
+    workers_N      : transform_partitioned sur N processus, une partition par
+                     worker (--partitions pour en fixer le nombre)
+
+Pour chaque nombre de workers : temps mural, débit (reviews / s), accélération
+par rapport à la référence et égalité des sorties (clean trié par review_id,
+rejected hors rejected_at). L'accélération dépend du nombre de cœurs
+disponibles (reporté dans "environment").
+
+Usage:
+    python benchmarks/bench_partitioned_transform.py --reviews 100000 --workers 1 2 4 8
+    python benchmarks/bench_partitioned_transform.py --reviews 200000 --key p_id --output reports/bench_partitions.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts" / "dags"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from utils.partitioned_transform import transform_partitioned
+from utils.review_transforms import clean_and_validate, join_tables
+from synthetic_data import generate_tables
+from bench_pipeline_stages import stage_report, time_stage
+
+
+def single_process(tables: dict) -> tuple:
+    """Reference: join + clean in the current process, sorted like transform_partitioned."""
+    df_joined = join_tables(tables)
+    df_clean, df_rejected = clean_and_validate(df_joined)
+    df_clean = df_clean.sort_values("review_id", kind="stable").reset_index(drop=True)
+    return df_clean, df_rejected, len(df_joined)
+
+
+def same_output(result: tuple, reference: tuple) -> bool:
+    """Identical clean rows, rejected rows (except rejected_at) and joined count."""
+    def rejected(df):
+        # original_data est un dict : comparaison sur la représentation texte, dans un ordre canonique
+        df = df.drop(columns=["rejected_at"], errors="ignore").astype(str)
+        return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+    return (result[0].equals(reference[0])
+            and rejected(result[1]).equals(rejected(reference[1]))
+            and result[2] == reference[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the partitioned transform across worker processes")
+    parser.add_argument("--reviews", type=int, default=50_000, help="Number of synthetic reviews")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker process counts")
+    parser.add_argument("--partitions", type=int, help="Partitions per run (default: one per worker)")
+    parser.add_argument("--key", choices=["review_id", "p_id"], default="review_id", help="Partition key")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--dirty-rate", type=float, default=0.05, help="Fraction of invalid review rows")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    tables = generate_tables(args.reviews, args.seed, args.dirty_rate)
+    n_reviews = len(tables["review"])
+    report = {
+        "benchmark": "partitioned_transform",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "cpu_count": os.cpu_count(),
+            "platform": platform.platform(),
+        },
+        "parameters": {"reviews": args.reviews, "key": args.key, "partitions": args.partitions,
+                       "repeat": args.repeat, "seed": args.seed, "dirty_rate": args.dirty_rate},
+        "runs": {},
+    }
+
+    print(f"Benchmarking {n_reviews:,} reviews (key={args.key}, {os.cpu_count()} CPU)...", file=sys.stderr)
+    reference, walls, cpus = time_stage(lambda: single_process(tables), args.repeat)
+    report["runs"]["single_process"] = stage_report(walls, cpus, n_reviews, len(reference[0]))
+    baseline = report["runs"]["single_process"]["wall_s_min"]
+
+    for workers in args.workers:
+        partitions = args.partitions or workers
+        result, walls, cpus = time_stage(
+            lambda: transform_partitioned(tables, n_partitions=partitions, max_workers=workers, key=args.key),
+            args.repeat,
+        )
+        run = stage_report(walls, cpus, n_reviews, len(result[0]))
+        run.update({
+            "workers": workers,
+            "partitions": partitions,
+            "speedup": round(baseline / run["wall_s_min"], 2),
+            "identical": same_output(result, reference),
+        })
+        report["runs"][f"workers_{workers}"] = run
+
+    for name, run in report["runs"].items():
+        extra = f"  x{run['speedup']:<5} identical: {run['identical']}" if "speedup" in run else ""
+        print(f"  {name:<16} {run['wall_s_min']:>9.3f}s  {run['rows_per_s'] or 0:>12,.0f} reviews/s{extra}",
+              file=sys.stderr)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(payload)
+        print(f"[OK] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark des étapes du pipeline ETL (hors ligne).
+
+Génère des tables synthétiques (benchmarks/synthetic_data.py) puis mesure
+séparément chaque étape pure du pipeline, sans Airflow, S3, Snowflake ni
+MongoDB :
+
+    anonymize_buyer  : hachage des buyer_id (review + orders), fait à l'extraction
+    join_tables      : jointure SQL des tables brutes
+    clean_validate   : séparation lignes valides / rejetées
+    prepare_rows     : tuples pour l'INSERT Snowflake (save_to_snowflake)
+
+Pour chaque échelle et chaque étape : temps mural et CPU (min / médiane sur
+--repeat exécutions), lignes en entrée / sortie et débit. Le résultat est un
+JSON (stdout ou --output) à conserver pour suivre les régressions.
+
+Usage:
+    python benchmarks/bench_pipeline_stages.py --reviews 10000 50000 --repeat 3
+    python benchmarks/bench_pipeline_stages.py --reviews 100000 --output reports/bench_stages.json
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+# Mêmes imports que les DAGs (scripts/dags est le dossier des DAGs Airflow)
+sys.path.insert(0, str(ROOT / "scripts" / "dags"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from utils.review_transforms import (
+    anonymize_buyer_ids,
+    clean_and_validate,
+    join_tables,
+    prepare_snowflake_rows,
+)
+from synthetic_data import generate_tables
+
+SALT = "benchmark_salt"
+PIPELINE_VERSION = "benchmark"
+
+
+def time_stage(func, repeat: int):
+    """
+    Run func() `repeat` times.
+
+    Returns:
+        (last result, wall times, cpu times)
+    """
+    walls, cpus = [], []
+    result = None
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = func()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+    return result, walls, cpus
+
+
+def stage_report(walls: list, cpus: list, rows_in: int, rows_out: int) -> dict:
+    best = min(walls)
+    return {
+        "wall_s_min": round(best, 4),
+        "wall_s_median": round(statistics.median(walls), 4),
+        "cpu_s_median": round(statistics.median(cpus), 4),
+        "rows_in": int(rows_in),
+        "rows_out": int(rows_out),
+        "rows_per_s": round(rows_in / best, 1) if best > 0 else None,
+    }
+
+
+def bench_scale(n_reviews: int, repeat: int, seed: int, dirty_rate: float) -> dict:
+    """Benchmark every stage on one synthetic dataset."""
+    tables = generate_tables(n_reviews, seed, dirty_rate)
+    stages = {}
+
+    # Anonymisation (extract_to_s3) : sur les tables qui contiennent buyer_id
+    buyer_columns = [tables["review"]["buyer_id"], tables["orders"]["buyer_id"]]
+    n_buyer_rows = sum(len(c) for c in buyer_columns)
+    _, walls, cpus = time_stage(lambda: [anonymize_buyer_ids(c, SALT) for c in buyer_columns], repeat)
+    stages["anonymize_buyer"] = stage_report(walls, cpus, n_buyer_rows, n_buyer_rows)
+
+    df_joined, walls, cpus = time_stage(lambda: join_tables(tables), repeat)
+    stages["join_tables"] = stage_report(walls, cpus, len(tables["review"]), len(df_joined))
+
+    (df_clean, df_rejected), walls, cpus = time_stage(lambda: clean_and_validate(df_joined), repeat)
+    stages["clean_validate"] = stage_report(walls, cpus, len(df_joined), len(df_clean))
+    stages["clean_validate"]["rows_rejected"] = len(df_rejected)
+
+    rows, walls, cpus = time_stage(lambda: prepare_snowflake_rows(df_clean, PIPELINE_VERSION), repeat)
+    stages["prepare_rows"] = stage_report(walls, cpus, len(df_clean), len(rows))
+
+    return {
+        "reviews": n_reviews,
+        "table_rows": {name: len(df) for name, df in tables.items()},
+        "stages": stages,
+        "total_wall_s_min": round(sum(s["wall_s_min"] for s in stages.values()), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ETL pipeline stages on synthetic data")
+    parser.add_argument("--reviews", type=int, nargs="+", default=[10_000],
+                        help="Dataset sizes (number of reviews), one run per size")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the generator")
+    parser.add_argument("--dirty-rate", type=float, default=0.05, help="Fraction of invalid review rows")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    # Les étapes loggent en INFO à chaque appel : on ne garde que les erreurs
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    report = {
+        "benchmark": "pipeline_stages",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "parameters": {"repeat": args.repeat, "seed": args.seed, "dirty_rate": args.dirty_rate},
+        "runs": [],
+    }
+
+    for n_reviews in args.reviews:
+        print(f"Benchmarking {n_reviews:,} reviews...", file=sys.stderr)
+        run = bench_scale(n_reviews, args.repeat, args.seed, args.dirty_rate)
+        for name, stage in run["stages"].items():
+            print(f"  {name:<16} {stage['wall_s_min']:>9.3f}s  {stage['rows_per_s'] or 0:>12,.0f} rows/s",
+                  file=sys.stderr)
+        report["runs"].append(run)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(payload)
+        print(f"[OK] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark du scoring de pertinence (scripts/dags/utils/relevance_scoring.py).
+
+Compare, sur des reviews propres synthétiques (generate_tables ->
+join_tables -> clean_and_validate) :
+
+    vectorized : score_reviews(), opérations NumPy / pandas sur les colonnes
+    row_wise   : même calcul ligne à ligne (apply + recherche mot par mot),
+                 comme dans le notebook de l'étude de cas
+
+Le débit est donné en reviews/s (temps mural) et en reviews par seconde CPU,
+c.-à-d. par cœur : le scoring tourne sur un seul cœur. Les deux versions
+doivent produire les mêmes scores (vérifié à chaque échelle).
+
+Usage:
+    python benchmarks/bench_relevance_scoring.py --reviews 10000 100000 --repeat 3
+    python benchmarks/bench_relevance_scoring.py --reviews 200000 --skip-baseline --output reports/bench_scoring.json
+"""
+import argparse
+import json
+import logging
+import platform
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts" / "dags"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from utils import relevance_scoring as rs
+from utils.review_transforms import clean_and_validate, join_tables
+from synthetic_data import generate_tables
+from bench_pipeline_stages import stage_report, time_stage
+
+
+def score_row_wise(df: pd.DataFrame) -> pd.DataFrame:
+    """Reference implementation, one review at a time."""
+    weights = rs.load_weights()
+    labels = list(rs.CATEGORY_KEYWORDS)
+
+    def hits(text, keywords):
+        return sum(weight * len(re.findall(rf"\b{word}\b", text)) for word, weight in keywords.items())
+
+    def score(row):
+        text = row["description"].lower() if isinstance(row["description"], str) else ""
+        length_score = np.exp(-((row["text_length"] - rs.TEXT_LENGTH_OPTIMAL) ** 2) / (2 * rs.TEXT_LENGTH_SIGMA ** 2))
+        extreme = row["rating"] in [1, 5]
+
+        balance = hits(text, rs.POSITIVE_KEYWORDS) - hits(text, rs.NEGATIVE_KEYWORDS)
+        keyword = (balance / np.sqrt(balance ** 2 + rs.SENTIMENT_ALPHA) + 1) / 2 if text else 0.0
+
+        theme_hits = [hits(text, rs.CATEGORY_KEYWORDS[label]) for label in labels]
+        total = sum(theme_hits)
+        if total:
+            best = int(np.argmax(theme_hits))
+            category, confidence = labels[best], 100.0 * theme_hits[best] / total
+        else:
+            category, confidence = rs.DEFAULT_CATEGORY, 100.0 / len(labels)
+
+        relevance = 100 * (weights["text_length"] * length_score + weights["has_image"] * row["has_image"]
+                           + weights["has_orders"] * row["has_orders"]
+                           + weights["is_extreme_rating"] * extreme + weights["keyword"] * keyword)
+        status = ("RELEVANT" if confidence >= rs.DEFAULT_CONFIDENCE_THRESHOLD
+                  and relevance >= rs.DEFAULT_RELEVANCE_THRESHOLD else "IRRELEVANT")
+        return pd.Series([length_score, extreme, keyword, relevance, category, confidence, status],
+                         index=["text_length_score", "is_extreme_rating", "keyword_score", "relevance_score",
+                                "category_review", "confidence_score", "relevant_status"])
+
+    return pd.concat([df, df.apply(score, axis=1)], axis=1)[rs.RELEVANT_COLUMNS]
+
+
+def with_throughput(report: dict, rows: int) -> dict:
+    report["reviews_per_cpu_s"] = round(rows / report["cpu_s_median"], 1) if report["cpu_s_median"] > 0 else None
+    return report
+
+
+def bench_scale(n_reviews: int, repeat: int, seed: int, skip_baseline: bool) -> dict:
+    """Benchmark both implementations on one synthetic dataset."""
+    df_clean, _ = clean_and_validate(join_tables(generate_tables(n_reviews, seed, dirty_rate=0.0)))
+    rows = len(df_clean)
+    run = {"reviews": rows, "implementations": {}}
+
+    scored, walls, cpus = time_stage(lambda: rs.score_reviews(df_clean), repeat)
+    run["implementations"]["vectorized"] = with_throughput(stage_report(walls, cpus, rows, len(scored)), rows)
+
+    if not skip_baseline:
+        baseline, walls, cpus = time_stage(lambda: score_row_wise(df_clean), 1)
+        run["implementations"]["row_wise"] = with_throughput(stage_report(walls, cpus, rows, len(baseline)), rows)
+        numeric = ["text_length_score", "keyword_score", "relevance_score", "confidence_score"]
+        run["identical"] = bool(
+            np.allclose(scored[numeric].to_numpy(float), baseline[numeric].to_numpy(float))
+            and (scored["category_review"] == baseline["category_review"]).all()
+            and (scored["relevant_status"] == baseline["relevant_status"]).all()
+        )
+        run["speedup"] = round(run["implementations"]["row_wise"]["wall_s_min"]
+                               / run["implementations"]["vectorized"]["wall_s_min"], 1)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the relevance scoring stage")
+    parser.add_argument("--reviews", type=int, nargs="+", default=[20_000], help="Dataset sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the vectorized scoring")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the generator")
+    parser.add_argument("--skip-baseline", action="store_true", help="Do not run the row-wise baseline")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.getLogger("utils").setLevel(logging.WARNING)
+
+    report = {
+        "benchmark": "relevance_scoring",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "parameters": {"repeat": args.repeat, "seed": args.seed, "weights": rs.load_weights()},
+        "runs": [],
+    }
+
+    for n_reviews in args.reviews:
+        print(f"Benchmarking {n_reviews:,} reviews...", file=sys.stderr)
+        run = bench_scale(n_reviews, args.repeat, args.seed, args.skip_baseline)
+        for name, impl in run["implementations"].items():
+            print(f"  {name:<11} {impl['wall_s_min']:>9.3f}s  {impl['reviews_per_cpu_s'] or 0:>12,.0f} reviews/s/core",
+                  file=sys.stderr)
+        if "identical" in run:
+            print(f"  speedup x{run['speedup']}, identical scores: {run['identical']}", file=sys.stderr)
+        report["runs"].append(run)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(payload)
+        print(f"[OK] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Benchmark des lookups de l'API sur REVIEW_RELEVANT (Snowflake).
+
+Exécute les requêtes de l'API (Bloc_3 backend/snowflake_crud.py) pour un
+échantillon de couples (BUYER_ID, P_ID) pris dans la table :
+
+    product_reviews       : WHERE P_ID = ? AND RELEVANT_STATUS = 'RELEVANT'
+                            ORDER BY RELEVANCE_SCORE DESC LIMIT 10
+    buyer_product_reviews : WHERE BUYER_ID = ? AND P_ID = ? AND RELEVANT_STATUS = 'RELEVANT'
+                            ORDER BY RELEVANCE_SCORE DESC
+    buyer_products        : SELECT DISTINCT P_ID, ... WHERE BUYER_ID = ?
+
+Le cache de résultats est désactivé (USE_CACHED_RESULT = FALSE). Pour chaque
+lookup : latence client (p50 / p95), temps serveur médian et partitions
+scannées / totales (INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION), avec l'état
+du clustering et de la search optimization au moment de la mesure.
+
+Avant / après setup_snowflake.py --tuning-only (le clustering automatique et
+la construction de la search optimization prennent quelques minutes) :
+
+Usage:
+    python benchmarks/bench_snowflake_lookups.py --label before --output reports/lookups_before.json
+    python scripts/dags/setup_snowflake.py --tuning-only
+    python benchmarks/bench_snowflake_lookups.py --label after --compare reports/lookups_before.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts" / "dags"))
+
+from setup_snowflake import SERVING_TABLES, current_clustering, current_search_optimization, get_connection
+
+TABLE = "REVIEW_RELEVANT"
+
+LOOKUPS = {
+    "product_reviews": """
+        SELECT REVIEW_ID, BUYER_ID, P_ID, TITLE, DESCRIPTION, RATING, RELEVANCE_SCORE, REVIEW_IMG
+        FROM {table}
+        WHERE P_ID = %(p_id)s
+          AND RELEVANT_STATUS = 'RELEVANT'
+        ORDER BY RELEVANCE_SCORE DESC
+        LIMIT 10
+    """,
+    "buyer_product_reviews": """
+        SELECT REVIEW_ID, BUYER_ID, P_ID, TITLE, DESCRIPTION, RATING, RELEVANCE_SCORE, REVIEW_IMG
+        FROM {table}
+        WHERE BUYER_ID = %(buyer_id)s
+          AND P_ID = %(p_id)s
+          AND RELEVANT_STATUS = 'RELEVANT'
+        ORDER BY RELEVANCE_SCORE DESC
+    """,
+    "buyer_products": """
+        SELECT DISTINCT P_ID, PRODUCT_NAME, CATEGORY
+        FROM {table}
+        WHERE BUYER_ID = %(buyer_id)s
+        ORDER BY P_ID
+    """,
+}
+
+HISTORY_QUERY = """
+    SELECT QUERY_ID, TOTAL_ELAPSED_TIME, PARTITIONS_SCANNED, PARTITIONS_TOTAL, BYTES_SCANNED
+    FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => 10000))
+    WHERE QUERY_ID IN ({ids})
+"""
+
+
+def percentile(values: list, q: float) -> float:
+    """Percentile (nearest rank) of a non-empty list."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def sample_keys(cursor, n: int) -> list:
+    """n (BUYER_ID, P_ID) pairs of relevant reviews."""
+    cursor.execute(f"""
+        SELECT BUYER_ID, P_ID FROM {TABLE} SAMPLE ({n} ROWS)
+        WHERE RELEVANT_STATUS = 'RELEVANT'
+    """)
+    return cursor.fetchall()
+
+
+def query_stats(cursor, query_ids: list) -> dict:
+    """Server-side statistics by query id (query history of the session)."""
+    stats = {}
+    # Paquets : la liste IN reste courte
+    for start in range(0, len(query_ids), 500):
+        ids = ", ".join(f"'{qid}'" for qid in query_ids[start:start + 500])
+        cursor.execute(HISTORY_QUERY.format(ids=ids))
+        for qid, elapsed, scanned, total, scanned_bytes in cursor.fetchall():
+            stats[qid] = {"elapsed_ms": elapsed, "partitions_scanned": scanned,
+                          "partitions_total": total, "bytes_scanned": scanned_bytes}
+    return stats
+
+
+def run_lookup(cursor, name: str, keys: list) -> dict:
+    """Run one lookup pattern for every key and summarize latency and pruning."""
+    query = LOOKUPS[name].format(table=TABLE)
+    latencies, query_ids = [], []
+    for buyer_id, p_id in keys:
+        start = time.perf_counter()
+        cursor.execute(query, {"buyer_id": buyer_id, "p_id": p_id})
+        cursor.fetchall()
+        latencies.append((time.perf_counter() - start) * 1000)
+        query_ids.append(cursor.sfqid)
+
+    # QUERY_HISTORY est alimenté de façon asynchrone
+    time.sleep(2)
+    stats = list(query_stats(cursor, query_ids).values())
+    scanned = [s["partitions_scanned"] for s in stats if s["partitions_scanned"] is not None]
+    total = [s["partitions_total"] for s in stats if s["partitions_total"]]
+
+    return {
+        "queries": len(keys),
+        "latency_ms_p50": round(statistics.median(latencies), 1),
+        "latency_ms_p95": round(percentile(latencies, 0.95), 1),
+        "server_ms_median": statistics.median([s["elapsed_ms"] for s in stats]) if stats else None,
+        "partitions_scanned_mean": round(statistics.mean(scanned), 1) if scanned else None,
+        "partitions_total_mean": round(statistics.mean(total), 1) if total else None,
+        "bytes_scanned_mean": round(statistics.mean([s["bytes_scanned"] or 0 for s in stats])) if stats else None,
+    }
+
+
+def compare(before: dict, after: dict):
+    """Print the before / after deltas of each lookup."""
+    print(f"\n{before['label']} -> {after['label']}", file=sys.stderr)
+    for name, result in after["lookups"].items():
+        previous = before["lookups"].get(name)
+        if not previous:
+            continue
+        print(f"  {name}", file=sys.stderr)
+        for metric in ("latency_ms_p50", "latency_ms_p95", "server_ms_median", "partitions_scanned_mean"):
+            old, new = previous.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = f"({(new - old) / old:+.0%})" if old else ""
+            print(f"    {metric:<24} {old:>10} -> {new:>10}  {change}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API lookups on REVIEW_RELEVANT")
+    parser.add_argument("--keys", type=int, default=50, help="Number of sampled (buyer_id, p_id) pairs")
+    parser.add_argument("--lookups", nargs="+", choices=sorted(LOOKUPS), default=list(LOOKUPS),
+                        help="Lookup patterns to run")
+    parser.add_argument("--label", default="run", help="Label of this run (e.g. before / after)")
+    parser.add_argument("--compare", help="JSON report of a previous run to compare with")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"USE DATABASE {os.getenv('SNOWFLAKE_DATABASE', 'AMAZON_REVIEWS')}")
+        cursor.execute(f"USE SCHEMA {os.getenv('SNOWFLAKE_SCHEMA', 'ANALYTICS')}")
+        cursor.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+
+        report = {
+            "benchmark": "snowflake_lookups",
+            "label": args.label,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "table": TABLE,
+            "tuning": {
+                "cluster_by": current_clustering(cursor, TABLE),
+                "search_optimization": sorted(".".join(t) for t in current_search_optimization(cursor, TABLE)),
+                "target": SERVING_TABLES.get(TABLE),
+            },
+            "lookups": {},
+        }
+
+        keys = sample_keys(cursor, args.keys)
+        print(f"Running {len(args.lookups)} lookups on {len(keys)} sampled keys...", file=sys.stderr)
+        for name in args.lookups:
+            report["lookups"][name] = run_lookup(cursor, name, keys)
+            result = report["lookups"][name]
+            print(f"  {name:<22} p50 {result['latency_ms_p50']:>8} ms  p95 {result['latency_ms_p95']:>8} ms  "
+                  f"partitions {result['partitions_scanned_mean']}/{result['partitions_total_mean']}",
+                  file=sys.stderr)
+    finally:
+        cursor.close()
+        conn.close()
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
+
+    payload = json.dumps(report, indent=2, default=str)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(payload)
+        print(f"[OK] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Exécution hors ligne de ReviewProcessor.process() de bout en bout.
+
+Les services cloud sont remplacés par les backends locaux
+(scripts/dags/utils/storage_backends.py) :
+
+    S3        -> data lake sur le filesystem (ou MinIO via --s3-endpoint)
+    Snowflake -> DuckDB (table reviews)
+    MongoDB   -> mongomock en mémoire (ou MongoDB local via --mongo-uri)
+
+Les tables brutes sont générées (benchmarks/synthetic_data.py) ou lues depuis
+un dossier de CSV ayant la même arborescence que raw/ sur S3. Avec --profile,
+le run est profilé par cProfile (fichier .prof lisible par snakeviz / pstats).
+
+Usage:
+    python benchmarks/run_pipeline_offline.py --reviews 200000
+    python benchmarks/run_pipeline_offline.py --input-dir data/raw --duckdb data/warehouse.duckdb
+    python benchmarks/run_pipeline_offline.py --reviews 100000 --profile reports/pipeline.prof
+"""
+import argparse
+import cProfile
+import json
+import logging
+import pstats
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts" / "dags"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from utils.review_processor import ReviewProcessor
+from utils.storage_backends import local_backends
+from synthetic_data import generate_tables
+
+TABLES = ["product", "category", "review", "product_reviews", "review_images", "orders"]
+
+
+def stage_raw_tables(backends, bucket: str, args) -> dict:
+    """Écrit les CSV bruts dans l'object store et retourne les s3_paths attendus par process()."""
+    if args.input_dir:
+        csv_data = {t: (Path(args.input_dir) / t / f"{t}.csv").read_text(encoding="utf-8") for t in TABLES}
+    else:
+        tables = generate_tables(args.reviews, args.seed, args.dirty_rate)
+        csv_data = {t: tables[t].to_csv(index=False) for t in TABLES}
+
+    s3_paths = {}
+    for table, data in csv_data.items():
+        s3_paths[table] = backends.object_store.write_text(f"s3://{bucket}/raw/{table}/{table}.csv", data)
+    return s3_paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the review pipeline end to end on local backends")
+    parser.add_argument("--reviews", type=int, default=50_000, help="Synthetic dataset size")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the generator")
+    parser.add_argument("--dirty-rate", type=float, default=0.05, help="Fraction of invalid review rows")
+    parser.add_argument("--input-dir", help="Use existing CSVs (<dir>/<table>/<table>.csv) instead of synthetic data")
+    parser.add_argument("--lake", default="data/lake", help="Local object store root")
+    parser.add_argument("--bucket", default="local-bucket", help="Bucket name of the raw files")
+    parser.add_argument("--s3-endpoint", help="S3-compatible endpoint (MinIO) instead of the filesystem")
+    parser.add_argument("--duckdb", default=":memory:", help="DuckDB file standing in for Snowflake")
+    parser.add_argument("--mongo-uri", help="Local MongoDB URI (default: in-memory mongomock)")
+    parser.add_argument("--profile", help="Write a cProfile dump of process() to this file")
+    parser.add_argument("--top", type=int, default=20, help="Functions shown from the profile")
+    parser.add_argument("--quiet", action="store_true", help="Only log warnings from the pipeline")
+    args = parser.parse_args()
+
+    if args.quiet:
+        logging.getLogger("utils").setLevel(logging.WARNING)
+
+    backends = local_backends(args.lake, duckdb_path=args.duckdb, mongo_uri=args.mongo_uri,
+                              s3_endpoint_url=args.s3_endpoint)
+    s3_paths = stage_raw_tables(backends, args.bucket, args)
+
+    processor = ReviewProcessor(backends=backends, run_id=f"offline_{datetime.now():%Y%m%d_%H%M%S}")
+    profiler = cProfile.Profile() if args.profile else None
+    try:
+        if profiler:
+            profiler.enable()
+        stats = processor.process(s3_paths)
+    finally:
+        if profiler:
+            profiler.disable()
+
+    metadata = processor.mongo_conn["amazon_reviews"]["pipeline_metadata"].find_one(
+        {"run_id": processor.run_id}, {"_id": 0, "stages": 1}
+    )
+    stages = pd.DataFrame.from_dict(metadata["stages"], orient="index")
+    print(stages[["wall_s", "cpu_s", "rows_in", "rows_out", "bytes_read", "peak_rss_bytes"]].to_string())
+    print(json.dumps(stats, indent=2))
+
+    if profiler:
+        Path(args.profile).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(args.profile)
+        pstats.Stats(args.profile).sort_stats("cumulative").print_stats(args.top)
+        print(f"[OK] Profile written to {args.profile}")
+
+    processor.close()
+
+
+if __name__ == "__main__":
+    main()
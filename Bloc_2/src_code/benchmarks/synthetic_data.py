@@ -0,0 +1,171 @@
+"""
+Synthetic Data Generator
+========================
+Génère des tables brutes réalistes (mêmes colonnes que PostgreSQL / S3) pour
+mesurer le pipeline hors ligne : product, category, review, product_reviews,
+review_images, orders.
+
+- Popularité des produits et activité des acheteurs en loi de Zipf
+- Longueur des textes log-normale, ratings biaisés vers 5 étoiles
+- Une fraction `dirty_rate` de lignes invalides, répartie entre doublons de
+  review_id, rating NULL, rating hors 1-5 et description vide
+
+Usage:
+    python benchmarks/synthetic_data.py --reviews 100000 --output data/synthetic
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = [
+    "Electronics", "Books", "Home & Kitchen", "Beauty", "Toys & Games",
+    "Sports & Outdoors", "Clothing", "Health", "Grocery", "Automotive",
+    "Pet Supplies", "Office Products", "Garden", "Tools", "Music",
+    "Video Games", "Baby", "Jewelry", "Shoes", "Software",
+]
+
+WORDS = (
+    "good great bad quality product price delivery fast slow works broke love "
+    "hate recommend battery screen size color fit cheap expensive excellent poor "
+    "return refund seller package arrived damaged perfect easy hard use daily "
+    "month week year kids gift sound light heavy comfortable material plastic "
+    "metal stars value money worth again never always after before would could"
+).split()
+
+RATING_WEIGHTS = [0.07, 0.05, 0.09, 0.20, 0.59]
+
+
+def _zipf_choice(rng, n_items: int, size: int, a: float = 1.2) -> np.ndarray:
+    """Indices in [0, n_items) with a Zipf-like popularity skew."""
+    ranks = np.arange(1, n_items + 1)
+    weights = 1.0 / ranks ** a
+    return rng.choice(n_items, size=size, p=weights / weights.sum())
+
+
+def _sentences(rng, size: int, mean_words: float, sigma: float = 0.6) -> list:
+    """Random texts whose word count follows a log-normal distribution."""
+    lengths = np.maximum(1, rng.lognormal(np.log(mean_words), sigma, size).astype(int))
+    words = np.asarray(WORDS)[rng.integers(0, len(WORDS), lengths.sum())]
+    bounds = np.cumsum(lengths)[:-1]
+    return [" ".join(chunk) for chunk in np.split(words, bounds)]
+
+
+def generate_tables(n_reviews: int = 10_000, seed: int = 42, dirty_rate: float = 0.05) -> dict:
+    """
+    Generate the raw tables consumed by the transform step.
+
+    Args:
+        n_reviews: Number of distinct reviews (duplicates are added on top)
+        seed: Random seed (same seed -> same tables)
+        dirty_rate: Fraction of invalid review rows
+
+    Returns:
+        Dict mapping table names to DataFrames
+    """
+    rng = np.random.default_rng(seed)
+    n_products = max(10, n_reviews // 20)
+    n_buyers = max(10, n_reviews // 4)
+
+    # --- category / product -------------------------------------------------
+    category = pd.DataFrame({
+        "category_id": np.arange(1, len(CATEGORIES) + 1),
+        "name": CATEGORIES,
+        "c_desc": [name[:20].lower() for name in CATEGORIES],
+    })
+    p_ids = np.array([f"B{i:09d}" for i in range(n_products)])
+    product = pd.DataFrame({
+        "p_id": p_ids,
+        "p_name": _sentences(rng, n_products, 6, 0.3),
+        "p_desc": _sentences(rng, n_products, 40),
+        "price": np.round(rng.lognormal(3.0, 0.9, n_products), 2),
+        "qty": rng.integers(0, 500, n_products),
+        "category_id": rng.integers(1, len(CATEGORIES) + 1, n_products),
+    })
+
+    # --- review ------------------------------------------------------------------
+    buyer_ids = np.array([f"A{i:013d}" for i in range(n_buyers)])
+    review = pd.DataFrame({
+        "review_id": np.arange(1, n_reviews + 1),
+        "buyer_id": buyer_ids[_zipf_choice(rng, n_buyers, n_reviews, a=0.8)],
+        "r_desc": _sentences(rng, n_reviews, 50),
+        "title": _sentences(rng, n_reviews, 4, 0.4),
+        "rating": rng.choice(np.arange(1, 6), n_reviews, p=RATING_WEIGHTS).astype(float),
+        "seller_product_flag": rng.choice(["S", "P"], n_reviews),
+    })
+
+    # Lignes invalides : NULL rating, rating hors bornes, description vide, doublons
+    n_dirty = int(n_reviews * dirty_rate)
+    per_kind = n_dirty // 4
+    dirty_idx = rng.choice(n_reviews, size=3 * per_kind, replace=False)
+    null_idx, bad_idx, empty_idx = np.split(dirty_idx, 3)
+    review.loc[null_idx, "rating"] = np.nan
+    review.loc[bad_idx, "rating"] = rng.choice([0, 6], len(bad_idx))
+    review.loc[empty_idx, "r_desc"] = rng.choice(["", "   ", None], len(empty_idx))
+    duplicates = review.sample(n=per_kind, random_state=seed)
+    review = pd.concat([review, duplicates], ignore_index=True)
+
+    # --- product_reviews / review_images -------------------------------------
+    product_reviews = pd.DataFrame({
+        "p_id": p_ids[_zipf_choice(rng, n_products, n_reviews)],
+        "review_id": np.arange(1, n_reviews + 1),
+    })
+
+    with_images = rng.random(n_reviews) < 0.25
+    image_counts = rng.integers(1, 4, with_images.sum())
+    image_review_ids = np.repeat(np.arange(1, n_reviews + 1)[with_images], image_counts)
+    image_rank = np.concatenate([np.arange(c) for c in image_counts]) if len(image_counts) else []
+    review_images = pd.DataFrame({
+        "review_id": image_review_ids,
+        "review_img": [f"https://images.example.com/r/{rid}_{k}.jpg"
+                       for rid, k in zip(image_review_ids, image_rank)],
+    })
+
+    # --- orders (60 % des acheteurs ont commandé) ----------------------------
+    ordering = buyer_ids[rng.random(n_buyers) < 0.6]
+    n_orders = int(len(ordering) * 1.5)
+    orders = pd.DataFrame({
+        "order_id": np.arange(1, n_orders + 1),
+        "buyer_id": rng.choice(ordering, n_orders) if len(ordering) else [],
+        "discount_id": rng.integers(1, 20, n_orders),
+        "payment_id": rng.integers(1, 1_000, n_orders),
+        "order_date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n_orders), unit="D"),
+    })
+
+    return {
+        "product": product,
+        "category": category,
+        "review": review,
+        "product_reviews": product_reviews,
+        "review_images": review_images,
+        "orders": orders,
+    }
+
+
+def write_tables(tables: dict, output_dir: str) -> dict:
+    """Write tables as <output_dir>/<table>/<table>.csv (same layout as the S3 raw/ prefix)."""
+    paths = {}
+    for name, df in tables.items():
+        path = Path(output_dir) / name / f"{name}.csv"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(path, index=False)
+        paths[name] = str(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic raw tables for the ETL pipeline")
+    parser.add_argument("--reviews", type=int, default=10_000, help="Number of reviews")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--dirty-rate", type=float, default=0.05, help="Fraction of invalid review rows")
+    parser.add_argument("--output", default="data/synthetic", help="Output directory")
+    args = parser.parse_args()
+
+    tables = generate_tables(args.reviews, args.seed, args.dirty_rate)
+    for name, path in write_tables(tables, args.output).items():
+        print(f"[OK] {name}: {len(tables[name]):,} rows -> {path}")
+
+
+if __name__ == "__main__":
+    main()
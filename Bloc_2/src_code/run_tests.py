@@ -10,6 +10,8 @@ Usage:
     python run_tests.py --report         # Générer rapport HTML
     python run_tests.py --coverage       # Avec couverture de code
     python run_tests.py --fast           # Tests rapides uniquement
+    python run_tests.py --quality --exhaustive          # Qualité sur tables complètes
+    python run_tests.py --quality --confidence 0.99     # Qualité échantillonnée à 99%
 """
 
 import sys
@@ -60,6 +62,24 @@ def main():
         help='Run fast tests only (exclude slow tests)'
     )
 
+    parser.add_argument(
+        '--exhaustive',
+        action='store_true',
+        help='Run data quality tests on full tables instead of random samples'
+    )
+
+    parser.add_argument(
+        '--confidence',
+        type=float,
+        help='Confidence level of sampled quality estimates (default: 0.95)'
+    )
+
+    parser.add_argument(
+        '--margin',
+        type=float,
+        help='Margin of error of sampled quality estimates (default: 0.01)'
+    )
+
     parser.add_argument(
         '--report',
         action='store_true',
@@ -98,6 +118,13 @@ def main():
     elif args.fast:
         cmd.extend(['-m', 'not slow'])
 
+    # Add quality sampling mode
+    cmd.append(f"--quality-mode={'exhaustive' if args.exhaustive else 'fast'}")
+    if args.confidence is not None:
+        cmd.append(f'--confidence={args.confidence}')
+    if args.margin is not None:
+        cmd.append(f'--margin={args.margin}')
+
     # Add verbosity
     if args.verbose:
         cmd.append('-v')
@@ -4,7 +4,6 @@ from pathlib import Path
 import logging
 import sys
 import os
-import hashlib
 import io
 from utils.mongo_handler import MongoHandler
 from dotenv import load_dotenv
@@ -15,7 +14,17 @@ from airflow.providers.postgres.hooks.postgres import PostgresHook
 from airflow.providers.amazon.aws.hooks.s3 import S3Hook
 from airflow.hooks.base import BaseHook
 from airflow.operators.trigger_dagrun import TriggerDagRunOperator
+from airflow.utils.trigger_rule import TriggerRule
 from utils.email_alerter import EmailAlerter
+from utils.review_transforms import anonymize_buyer, anonymize_buyer_ids
+from utils.instrumentation import PipelineMetrics, save_stage_records
+from utils.column_profiler import (
+    compare_profiles,
+    load_previous_profile,
+    profile_csv,
+    save_profiles_to_mongodb,
+)
+from pymongo import MongoClient
 
 
 
@@ -51,13 +60,27 @@ mongo_handler.setLevel(logging.INFO)
 if not any(isinstance(h, MongoHandler) for h in logger.handlers):
     logger.addHandler(mongo_handler)
 
+# Tables extraites (None = SELECT *), une tâche mappée par table dans le DAG
+EXTRACT_TABLES = {
+    'product': None,
+    'category': None,
+    'buyer': None,
+    'review': None,
+    'product_reviews': None,
+    'review_images': None,
+    'orders': None,
+    'carrier': None,
+}
+
+
 class PostgresToS3Extractor:
     """Extract tables from PostgreSQL to S3"""
-    def __init__(self, postgres_conn_id: str, aws_conn_id: str):
+    def __init__(self, postgres_conn_id: str, aws_conn_id: str, run_id: str = None):
         self.pg_hook = PostgresHook(postgres_conn_id=postgres_conn_id)
         self.s3_hook = S3Hook(aws_conn_id=aws_conn_id)
         self.s3_conn = None
         self.salt = "default_salt"  
+        self.metrics = PipelineMetrics(run_id or datetime.now().strftime('%Y%m%d_%H%M%S'))
 
     """# Initiatlise S3 connection
     def _init_s3(self):
@@ -91,9 +114,7 @@ class PostgresToS3Extractor:
 
     def anonymize_buyer (self, input_string: str) -> str:
         """Anonymize buyer identifier using SHA-256 hashing."""
-        to_hash = (self.salt + input_string).encode('utf-8')
-        hash_value = hashlib.sha256(to_hash).hexdigest()
-        return hash_value
+        return anonymize_buyer(input_string, self.salt)
 
 
     def extract_table(self, table_name: str, query: str = None) -> pd.DataFrame:
@@ -134,8 +155,10 @@ class PostgresToS3Extractor:
         bucket = conn.extra_dejson.get('bucket_name', 'a-ns-bucket')
         logger.info(f"Uploading to S3 bucket: {bucket}")
 
+        csv_data = csv_buffer.getvalue()
+        self.metrics.add_bytes_written(len(csv_data.encode('utf-8')))
         self.s3_hook.load_string(
-            string_data=csv_buffer.getvalue(),
+            string_data=csv_data,
             bucket_name=bucket,
             key=s3_key,
             replace=True
@@ -155,84 +178,75 @@ class PostgresToS3Extractor:
         Returns:
             S3 URI
         """
-        # Extract
-        df = self.extract_table(table_name, query)
-
-        # Anonymize buyer identifiers if table contains 'buyer_id'
-        logger.info(f"Starting anonymize data for table {table_name}...")
-        if "buyer_id" in df.columns:
-            df["buyer_id"] = df["buyer_id"].astype(str).apply(self.anonymize_buyer)
-
-
-        # Generate S3 key with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        #s3_key = f"{prefix}{table_name}/{table_name}_{timestamp}.csv"
-        s3_key = f"{prefix}{table_name}/{table_name}.csv"
-
-        # Upload
-        return self.upload_df_to_s3(df, s3_key)
-
-    def extract_all_tables(self) -> dict:
-        """
-        Extract all required tables to S3.
-
-        Returns:
-            Dictionary mapping table names to S3 URIs
-        """
-
-        logger.info("STARTING EXTRACTION: PostgreSQL → S3 Data Lake")
-
+        with self.metrics.stage(f"extract_{table_name}") as stage:
+            # Extract
+            df = self.extract_table(table_name, query)
+            stage.rows_out = len(df)
 
-        results = {}
+            # Anonymize buyer identifiers if table contains 'buyer_id'
+            logger.info(f"Starting anonymize data for table {table_name}...")
+            if "buyer_id" in df.columns:
+                df["buyer_id"] = anonymize_buyer_ids(df["buyer_id"], self.salt)
 
-        # Define tables and queries
-        tables = {
-            'product': None, 
-            'category': None, 
-            'buyer' : None,    
-            'review': None,   
-            'product_reviews': None,  
-            'review_images': None,    
-            'orders': None,   
-            'carrier': None,  
-        }
 
-        # Extract each table
-        for table_name, query in tables.items():
-            try:
-                s3_uri = self.extract_and_upload_table(table_name, query)
-                results[table_name] = s3_uri
-            except Exception as e:
-                logger.error(f"Failed to process {table_name}: {e}")
-                results[table_name] = None
+            # Generate S3 key with timestamp
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            #s3_key = f"{prefix}{table_name}/{table_name}_{timestamp}.csv"
+            s3_key = f"{prefix}{table_name}/{table_name}.csv"
 
-
-        logger.info("EXTRACTION COMPLETED")
-
-
-        # Summary
-        successful = sum(1 for v in results.values() if v is not None)
-        logger.info(f"Successfully extracted {successful}/{len(tables)} tables")
-
-        for table_name, s3_uri in results.items():
-            if s3_uri:
-                logger.info(f"  [OK] {table_name}: {s3_uri}")
-            else:
-                logger.error(f"  [FAIL] {table_name}: Failed")
-
-        return results
+            # Upload
+            return self.upload_df_to_s3(df, s3_key)
 
 # DAG Airflow
 
-def airflow_run(**context):
+def extract_one_table(table_name: str, **context):
+    """Mapped task: extract one table to S3 (an exception fails, and retries, only this table)."""
     extractor = PostgresToS3Extractor(
         #postgres_conn_id="postgres_source",
         #aws_conn_id="aws_default",
         postgres_conn_id="pg_amazon",
         aws_conn_id="aws_s3_default",
+        run_id=context["run_id"],
     )
-    extracted_results = extractor.extract_all_tables()
-    return extracted_results
+    try:
+        s3_uri = extractor.extract_and_upload_table(table_name, EXTRACT_TABLES.get(table_name))
+    finally:
+        # Étape extract_<table> (même en échec) : enregistrée par extract_to_s3 en un seul
+        # upsert, les tâches mappées parallèles ne créent pas chacune le document du run
+        context["ti"].xcom_push(key="stage_metrics", value={
+            name: record.to_dict() for name, record in extractor.metrics.stages.items()
+        })
+    return {table_name: s3_uri}
+
+
+def collect_extraction_results(**context):
+    """Merge the mapped extract_table results into {table: s3_uri} (None for a failed table)."""
+    ti = context["ti"]
+    mapped_results = ti.xcom_pull(task_ids="extract_table") or []
+    results = {table_name: None for table_name in EXTRACT_TABLES}
+    for result in mapped_results:
+        if result:
+            results.update(result)
+
+    # Une étape extract_<table> par table dans le document du run
+    stage_records = {}
+    for records in ti.xcom_pull(task_ids="extract_table", key="stage_metrics") or []:
+        stage_records.update(records or {})
+    client = MongoClient(mongo_uri)
+    try:
+        save_stage_records(client["amazon_reviews"]["pipeline_metadata"], context["run_id"], stage_records)
+    finally:
+        client.close()
+
+    successful = sum(1 for v in results.values() if v is not None)
+    logger.info(f"Successfully extracted {successful}/{len(results)} tables")
+    for table_name, s3_uri in results.items():
+        if s3_uri:
+            logger.info(f"  [OK] {table_name}: {s3_uri}")
+        else:
+            logger.error(f"  [FAIL] {table_name}: Failed")
+
+    return results
 
 
 def check_extraction_results(**context):
@@ -272,6 +286,41 @@ def check_extraction_results(**context):
         logger.info("All tables extracted successfully, no alert needed")
 
 
+def profile_raw_tables(**context):
+    """Profile each extracted raw file (streamed from S3) and store the profiles per run."""
+    run_id = context["run_id"]
+    extracted_results = context["ti"].xcom_pull(task_ids="extract_to_s3") or {}
+    s3_hook = S3Hook(aws_conn_id="aws_s3_default")
+
+    profiles = {}
+    for table_name, s3_uri in extracted_results.items():
+        if not s3_uri:
+            continue
+        bucket, key = S3Hook.parse_s3_url(s3_uri)
+        body = s3_hook.get_key(key, bucket_name=bucket).get()["Body"]
+        profiles[table_name] = profile_csv(body, table_name)
+
+    client = MongoClient(mongo_uri)
+    try:
+        collection = client["amazon_reviews"]["pipeline_metadata"]
+        save_profiles_to_mongodb(collection, run_id, profiles)
+
+        # Drift vs. the previous profiled run
+        for table_name, profile in profiles.items():
+            previous = load_previous_profile(collection, table_name, exclude_run_id=run_id)
+            if previous is None:
+                continue
+            for drift in compare_profiles(previous, profile):
+                logger.warning(
+                    f"Drift on {table_name}.{drift['column']} ({drift['metric']}): "
+                    f"{drift['previous']} -> {drift['current']}"
+                )
+    finally:
+        client.close()
+
+    return {table_name: profile["rows"] for table_name, profile in profiles.items()}
+
+
 with DAG(
     "extract_postgres_to_s3",
     start_date=datetime(2024, 1, 1),
@@ -279,10 +328,19 @@ with DAG(
     catchup=False
 ) as dag:
 
+    # One mapped task instance per table: extracted in parallel, retried one by one
+    extract_tables = PythonOperator.partial(
+        task_id="extract_table",
+        python_callable=extract_one_table,
+        retries=2,
+    ).expand(op_kwargs=[{"table_name": table_name} for table_name in EXTRACT_TABLES])
+
+    # Same {table: s3_uri} XCom as before under "extract_to_s3" (read by the
+    # checks, the profiling and the transform DAG); runs even if a table failed
     extract_task = PythonOperator(
         task_id="extract_to_s3",
-        python_callable=airflow_run,
-        provide_context=True
+        python_callable=collect_extraction_results,
+        trigger_rule=TriggerRule.ALL_DONE,
     )
 
     # Check extraction results and send alert if needed
@@ -296,8 +354,18 @@ with DAG(
     trigger_transform = TriggerDagRunOperator(
         task_id="fetch_s3_paths",
         trigger_dag_id="transform_load_data",
+        # Le DAG de transformation écrit ses métriques dans le même document
+        conf={"pipeline_run_id": "{{ run_id }}"},
         wait_for_completion=False,
     )
 
-    extract_task >> check_results_task >> trigger_transform
+    # Profile the raw files (off the critical path of the transform DAG)
+    profile_task = PythonOperator(
+        task_id="profile_raw_tables",
+        python_callable=profile_raw_tables,
+        provide_context=True
+    )
+
+    extract_tables >> extract_task >> check_results_task >> trigger_transform
+    extract_task >> profile_task
 
@@ -63,6 +63,12 @@ def setup_mongodb_task():
     else:
         logger.info("rejected_reviews collection already exists")
 
+    # Unique key of the idempotent rejection upserts. The full-collection dedupe of
+    # legacy insert_many runs only happens when the index is missing (first run).
+    from utils.rejection_writer import ensure_rejection_index
+    ensure_rejection_index(db['rejected_reviews'], dedupe=True)
+    logger.info("Ensured unique index on rejected_reviews (review_id, rejection_reason)")
+
     # Create pipeline_metadata collection
     if 'pipeline_metadata' not in db.list_collection_names():
         db.create_collection('pipeline_metadata')
@@ -102,6 +102,11 @@ def setup_mongodb(connection_string: str = None):
     rejected_collection.create_index([('review_id', ASCENDING)], name='idx_rejected_review_id')
     rejected_collection.create_index([('rejection_reason', ASCENDING)], name='idx_rejection_reason')
     rejected_collection.create_index([('rejected_at', DESCENDING)], name='idx_rejected_at_desc')
+    # Clé des upserts idempotents (un rejet connu n'est pas réinséré à chaque run)
+    rejected_collection.create_index(
+        [('review_id', ASCENDING), ('rejection_reason', ASCENDING)],
+        unique=True, name='uniq_review_id_rejection_reason'
+    )
 
     print(f"  [OK] Created {len(list(rejected_collection.list_indexes()))} indexes")
 
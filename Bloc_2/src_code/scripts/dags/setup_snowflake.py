@@ -1,22 +1,43 @@
 """
 Snowflake Data Warehouse Setup
 ================================
-Creates database, schema, and tables for Amazon Review Analysis.
+Creates database, schema, and tables for Amazon Review Analysis, then the
+clustering keys and search optimization of the serving tables (read by the
+API with point lookups on P_ID / BUYER_ID).
+
+The tuning step is idempotent: it reads the current clustering key
+(SHOW TABLES) and search optimization (DESCRIBE SEARCH OPTIMIZATION) and
+only runs the missing ALTER TABLE statements.
+
+Usage:
+    python setup_snowflake.py                # full setup (recreates the tables)
+    python setup_snowflake.py --tuning-only  # clustering / search optimization only
 """
 
+import argparse
 import snowflake.connector
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Tables lues par l'API : filtres P_ID et/ou BUYER_ID, tri par RELEVANCE_SCORE.
+# Clustering sur P_ID (pruning des lookups produit) ; search optimization
+# EQUALITY pour les lookups par acheteur, que le clustering ne couvre pas.
+SERVING_TABLES = {
+    "REVIEW_RELEVANT": {
+        "cluster_by": ["P_ID"],
+        "search_optimization": {"EQUALITY": ["P_ID", "BUYER_ID"]},
+    },
+}
 
-def setup_snowflake():
-    """Initialize Snowflake data warehouse."""
+# Search optimization : édition Enterprise requise (0 = clustering seul)
+SEARCH_OPTIMIZATION = os.getenv('SNOWFLAKE_SEARCH_OPTIMIZATION', '1') != '0'
 
-    print("Connecting to Snowflake...")
 
-    conn = snowflake.connector.connect(
+def get_connection():
+    """Snowflake connection from the SNOWFLAKE_* environment variables."""
+    return snowflake.connector.connect(
         user=os.getenv('SNOWFLAKE_USER'),
         password=os.getenv('SNOWFLAKE_PASSWORD'),
         account=os.getenv('SNOWFLAKE_ACCOUNT'),
@@ -24,12 +45,130 @@ def setup_snowflake():
         role=os.getenv('SNOWFLAKE_ROLE', 'SYSADMIN')
     )
 
+
+# ========================================
+# Serving tables tuning
+# ========================================
+
+def clustering_statement(table: str, cluster_by: list, current: str = None):
+    """
+    ALTER TABLE ... CLUSTER BY, or None if the table already has this key.
+
+    Args:
+        table: Table name
+        cluster_by: Clustering columns
+        current: cluster_by of SHOW TABLES (e.g. "LINEAR(P_ID)"), None if unclustered
+    """
+    wanted = f"LINEAR({','.join(c.upper() for c in cluster_by)})"
+    if current and current.upper().replace(" ", "") == wanted:
+        return None
+    return f"ALTER TABLE {table} CLUSTER BY ({', '.join(cluster_by)})"
+
+
+def search_optimization_statements(table: str, methods: dict, current: set = frozenset()) -> list:
+    """
+    ALTER TABLE ... ADD SEARCH OPTIMIZATION for the (method, column) pairs not yet configured.
+
+    Args:
+        table: Table name
+        methods: {method: [columns]}, e.g. {"EQUALITY": ["P_ID"]}
+        current: Configured (METHOD, COLUMN) pairs (DESCRIBE SEARCH OPTIMIZATION)
+    """
+    statements = []
+    for method, columns in methods.items():
+        missing = [c for c in columns if (method.upper(), c.upper()) not in current]
+        if missing:
+            statements.append(f"ALTER TABLE {table} ADD SEARCH OPTIMIZATION ON {method}({', '.join(missing)})")
+    return statements
+
+
+def current_clustering(cursor, table: str):
+    """Clustering key of SHOW TABLES (None if the table is not clustered or does not exist)."""
+    cursor.execute(f"SHOW TABLES LIKE '{table}'")
+    columns = [desc[0].lower() for desc in cursor.description]
+    for row in cursor.fetchall():
+        values = dict(zip(columns, row))
+        if values.get("name", "").upper() == table.upper():
+            return values.get("cluster_by") or None
+    return None
+
+
+def current_search_optimization(cursor, table: str) -> set:
+    """(METHOD, COLUMN) pairs of DESCRIBE SEARCH OPTIMIZATION (empty if not enabled)."""
+    try:
+        cursor.execute(f"DESCRIBE SEARCH OPTIMIZATION ON {table}")
+    except snowflake.connector.errors.ProgrammingError:
+        return set()
+    columns = [desc[0].lower() for desc in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return {(str(r.get("method", "")).upper(), str(r.get("target", "")).upper()) for r in rows}
+
+
+def apply_serving_tuning(cursor, tables: dict = None) -> list:
+    """
+    Apply the clustering keys and search optimization of the serving tables.
+
+    Args:
+        cursor: Snowflake cursor (database / schema already selected)
+        tables: Table specs (default: SERVING_TABLES)
+
+    Returns:
+        List of the executed statements (empty when everything is already in place)
+    """
+    executed = []
+    for table, spec in (tables or SERVING_TABLES).items():
+        statement = clustering_statement(table, spec["cluster_by"], current_clustering(cursor, table))
+        if statement:
+            cursor.execute(statement)
+            executed.append(statement)
+        print(f"  [OK] {table}: CLUSTER BY ({', '.join(spec['cluster_by'])})"
+              + ("" if statement else " (unchanged)"))
+
+        if not SEARCH_OPTIMIZATION:
+            continue
+        statements = search_optimization_statements(
+            table, spec.get("search_optimization", {}), current_search_optimization(cursor, table)
+        )
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+                executed.append(statement)
+        except snowflake.connector.errors.ProgrammingError as e:
+            # p. ex. compte Standard : le clustering reste appliqué
+            print(f"  [WARN] {table}: search optimization not applied ({e.msg})")
+            continue
+        print(f"  [OK] {table}: search optimization "
+              + (", ".join(statements) if statements else "(unchanged)"))
+    return executed
+
+
+def tune_serving_tables():
+    """Only apply the serving tables tuning (tables must exist)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"USE DATABASE {os.getenv('SNOWFLAKE_DATABASE', 'AMAZON_REVIEWS')}")
+        cursor.execute(f"USE SCHEMA {os.getenv('SNOWFLAKE_SCHEMA', 'ANALYTICS')}")
+        print("Clustering & Search Optimization")
+        apply_serving_tuning(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def setup_snowflake():
+    """Initialize Snowflake data warehouse."""
+
+    print("Connecting to Snowflake...")
+
+    conn = get_connection()
+
     cursor = conn.cursor()
 
     # ========================================
     # 1. Database and Schema
     # ========================================
-    print("\n[STEP 1/4] Creating Database and Schema")
+    print("\n[STEP 1/5] Creating Database and Schema")
 
     database = os.getenv('SNOWFLAKE_DATABASE', 'AMAZON_REVIEWS')
     schema = os.getenv('SNOWFLAKE_SCHEMA', 'ANALYTICS')
@@ -45,7 +184,7 @@ def setup_snowflake():
     # ========================================
     # 2. Warehouse
     # ========================================
-    print("\n[STEP 2/4] Creating Warehouse")
+    print("\n[STEP 2/5] Creating Warehouse")
 
     warehouse = os.getenv('SNOWFLAKE_WAREHOUSE', 'COMPUTE_WH')
 
@@ -63,7 +202,7 @@ def setup_snowflake():
     # ========================================
     # 3. Main Table: reviews
     # ========================================
-    print("\n[STEP 3/4] Creating Table: reviews")
+    print("\n[STEP 3/5] Creating Tables: reviews, review_relevant")
 
     cursor.execute("""
         CREATE OR REPLACE TABLE reviews (
@@ -89,10 +228,39 @@ def setup_snowflake():
     print("               title, description, rating, has_image, has_orders, review_img")
     print("               ingestion_timestamp, pipeline_version")
 
+    # Scored reviews read by the API and the dashboards (written by the score step)
+    cursor.execute("""
+        CREATE OR REPLACE TABLE review_relevant (
+            review_id VARCHAR(50),
+            buyer_id VARCHAR(100),
+            p_id VARCHAR(50),
+            product_name VARCHAR(500),
+            category VARCHAR(100),
+            title VARCHAR(500),
+            description TEXT,
+            rating FLOAT,
+            text_length INTEGER,
+            has_image BOOLEAN,
+            has_orders BOOLEAN,
+            text_length_score FLOAT,
+            is_extreme_rating BOOLEAN,
+            keyword_score FLOAT,
+            relevance_score FLOAT,
+            category_review VARCHAR(100),
+            confidence_score FLOAT,
+            review_img VARCHAR(500),
+            relevant_status VARCHAR(20)
+        )
+    """)
+
+    print("  [OK] Table: review_relevant")
+    print("    - Columns: reviews columns + text_length_score, is_extreme_rating, keyword_score")
+    print("               relevance_score, category_review, confidence_score, relevant_status")
+
     # ========================================
     # 4. S3 Stage
     # ========================================
-    print("\n[STEP 4/4] Creating S3 Stage")
+    print("\n[STEP 4/5] Creating S3 Stage")
 
     aws_key_id = os.getenv('AWS_ACCESS_KEY_ID')
     aws_secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -126,7 +294,14 @@ def setup_snowflake():
     print(f"    - Format: CSV with header")
 
     # ========================================
-    # 5. Create Useful Views
+    # 5. Serving tables: clustering & search optimization
+    # ========================================
+    print("\n[STEP 5/5] Clustering & Search Optimization")
+
+    apply_serving_tuning(cursor)
+
+    # ========================================
+    # 6. Create Useful Views
     # ========================================
     print("\n[BONUS] Creating Views")
 
@@ -191,13 +366,26 @@ def setup_snowflake():
     print(f"Warehouse: {warehouse}")
     print("\nTables:")
     print("  - reviews: Main table for clean review data")
+    print("  - review_relevant: Scored reviews (relevance, category, status)")
     print("\nViews:")
     print("  - vw_reviews_by_product: Aggregated by product")
     print("  - vw_reviews_by_category: Aggregated by category")
     print("  - vw_data_quality: Data quality metrics")
     print("\nStage:")
     print(f"  - s3_review_stage: s3://{s3_bucket}/processed/")
+    print("\nServing tables:")
+    for table, spec in SERVING_TABLES.items():
+        print(f"  - {table}: CLUSTER BY ({', '.join(spec['cluster_by'])}), "
+              f"search optimization {spec.get('search_optimization', {})}")
 
 
 if __name__ == '__main__':
-    setup_snowflake()
+    parser = argparse.ArgumentParser(description="Snowflake data warehouse setup")
+    parser.add_argument("--tuning-only", action="store_true",
+                        help="Only apply clustering keys / search optimization (keeps the data)")
+    args = parser.parse_args()
+
+    if args.tuning_only:
+        tune_serving_tables()
+    else:
+        setup_snowflake()
@@ -5,8 +5,10 @@ from airflow.operators.python import PythonOperator
 from airflow.hooks.base import BaseHook
 import os
 from utils.mongo_handler import MongoHandler
-from utils.review_processor import ReviewProcessor
+from utils.review_processor import ReviewProcessor, plan_load_partitions, split_load_partitions
 from utils.email_alerter import EmailAlerter
+from utils.instrumentation import pipeline_run_id
+from utils.dtype_policy import to_xcom_dict
 import pandas as pd
 
 from dotenv import load_dotenv
@@ -38,6 +40,23 @@ if not any(isinstance(h, MongoHandler) for h in logger.handlers):
 
 
 
+def new_processor(context) -> ReviewProcessor:
+    """ReviewProcessor rattaché au run pipeline (même document pipeline_metadata que l'extraction)."""
+    return ReviewProcessor(
+        aws_conn_id="aws_s3_default",
+        snowflake_conn_id="snowflake_conn",
+        run_id=pipeline_run_id(context)
+    )
+
+
+def save_metrics(processor: ReviewProcessor):
+    """Write the stage metrics without failing the task: a MongoDB error must not trigger a retry of the step."""
+    try:
+        processor.save_stage_metrics()
+    except Exception as e:
+        logger.warning(f"Could not save stage metrics: {e}")
+
+
 # ============================================================================
 # DAG transform_load_data
 # ============================================================================
@@ -95,9 +114,11 @@ with DAG(
     # -------------------------------------------------------
     def load_from_s3(**context):
         s3_paths = context["ti"].xcom_pull(task_ids="fetch_s3_paths")
-        processor = ReviewProcessor(aws_conn_id="aws_s3_default", snowflake_conn_id="snowflake_conn")
-        tables = processor.load_all_tables(s3_paths)
-        return tables
+        processor = new_processor(context)
+        try:
+            return processor.load_all_tables(s3_paths)
+        finally:
+            save_metrics(processor)
 
 
     load_tables = PythonOperator(
@@ -165,9 +186,14 @@ with DAG(
             logger.error("No valid tables to join")
             raise ValueError("No valid tables loaded from S3")
 
-        processor = ReviewProcessor(aws_conn_id="aws_s3_default", snowflake_conn_id="snowflake_conn")
-        merged = processor.join_tables(valid_tables)
-        return merged.to_dict()
+        processor = new_processor(context)
+        try:
+            merged = processor.join_tables(valid_tables)
+        finally:
+            save_metrics(processor)
+        # Types compacts (Int8, boolean...) : pd.NA -> None pour le XCom JSON,
+        # clean_and_validate réapplique les types
+        return to_xcom_dict(merged)
 
 
     join_tables = PythonOperator(
@@ -184,11 +210,14 @@ with DAG(
         merged_dict = context["ti"].xcom_pull(task_ids="join_tables")
         df_joined = pd.DataFrame(merged_dict)
 
-        processor = ReviewProcessor(aws_conn_id="aws_s3_default", snowflake_conn_id="snowflake_conn")
-        df_clean, df_rejected = processor.clean_and_validate(df_joined)
+        processor = new_processor(context)
+        try:
+            df_clean, df_rejected = processor.clean_and_validate(df_joined)
+        finally:
+            save_metrics(processor)
 
         return {
-            "clean": df_clean.to_dict(),
+            "clean": to_xcom_dict(df_clean),
             "rejected": df_rejected.to_dict()
         }
 
@@ -201,19 +230,90 @@ with DAG(
 
 
     # -------------------------------------------------------
-    # 5. Load clean → Snowflake
+    # 5. Load clean → Snowflake (one mapped task per partition)
     # -------------------------------------------------------
-    def load_snowflake(**context):
-        data = context["ti"].xcom_pull(task_ids="clean_and_validate")
+    def prepare_snowflake_load(**context):
+        """Truncate reviews, split the clean rows and push one XCom per partition (one op_kwargs dict per mapped load)."""
+        ti = context["ti"]
+        data = ti.xcom_pull(task_ids="clean_and_validate")
         df_clean = pd.DataFrame(data["clean"])
+        n_partitions = plan_load_partitions(len(df_clean))
+
+        # Chaque tâche mappée ne lit que sa partition (XCom "partition_<i>")
+        for i, part in enumerate(split_load_partitions(df_clean, n_partitions)):
+            ti.xcom_push(key=f"partition_{i}", value=to_xcom_dict(part))
+
+        processor = new_processor(context)
+        try:
+            processor.truncate_reviews()
+        finally:
+            if processor.snowflake_conn:
+                processor.snowflake_conn.close()
+
+        logger.info(f"Loading {len(df_clean):,} clean rows in {n_partitions} partition(s)")
+        return [{"partition": i, "n_partitions": n_partitions} for i in range(n_partitions)]
+
+
+    prepare_clean_load = PythonOperator(
+        task_id="prepare_snowflake_load",
+        python_callable=prepare_snowflake_load,
+        provide_context=True
+    )
+
+
+    def load_snowflake_partition(partition: int, n_partitions: int, **context):
+        part = context["ti"].xcom_pull(task_ids="prepare_snowflake_load", key=f"partition_{partition}")
+        df_part = pd.DataFrame(part)
+
+        processor = new_processor(context)
+        try:
+            # DELETE + INSERT de la partition dans une transaction : un retry ne crée pas de doublons
+            return processor.save_partition_to_snowflake(df_part, partition, n_partitions)
+        finally:
+            save_metrics(processor)
+
+
+    load_clean_partitions = PythonOperator.partial(
+        task_id="load_clean_partition",
+        python_callable=load_snowflake_partition,
+        retries=2,
+    ).expand(op_kwargs=prepare_clean_load.output)
 
-        processor = ReviewProcessor(aws_conn_id="aws_s3_default", snowflake_conn_id="snowflake_conn")
-        return processor.save_to_snowflake(df_clean)
+
+    def sum_partition_loads(**context):
+        """Total rows inserted by the mapped loads (same XCom as the former single load task)."""
+        inserted = context["ti"].xcom_pull(task_ids="load_clean_partition") or []
+        total = sum(n or 0 for n in inserted)
+        logger.info(f"  [OK] Inserted {total:,} rows to Snowflake over {len(inserted)} partition(s)")
+        return total
 
 
     save_clean = PythonOperator(
         task_id="load_clean_to_snowflake",
-        python_callable=load_snowflake,
+        python_callable=sum_partition_loads,
+        provide_context=True
+    )
+
+
+    # -------------------------------------------------------
+    # 5b. Score relevance → Snowflake review_relevant
+    # -------------------------------------------------------
+    def load_relevant(**context):
+        data = context["ti"].xcom_pull(task_ids="clean_and_validate")
+        df_clean = pd.DataFrame(data["clean"])
+
+        processor = new_processor(context)
+        try:
+            # Scoring et chargement dans la même tâche : pas de DataFrame scoré en XCom
+            df_scored = processor.score_relevance(df_clean)
+            return processor.save_relevant_to_snowflake(df_scored)
+        finally:
+            save_metrics(processor)
+
+
+    save_relevant = PythonOperator(
+        task_id="load_relevant_to_snowflake",
+        python_callable=load_relevant,
         provide_context=True
     )
 
@@ -225,8 +325,11 @@ with DAG(
         data = context["ti"].xcom_pull(task_ids="clean_and_validate")
         df_rejected = pd.DataFrame(data["rejected"])
 
-        processor = ReviewProcessor(aws_conn_id="aws_s3_default", snowflake_conn_id="snowflake_conn")
-        return processor.save_rejected_to_mongodb(df_rejected)
+        processor = new_processor(context)
+        try:
+            return processor.save_rejected_to_mongodb(df_rejected)
+        finally:
+            save_metrics(processor)
 
 
     save_rejected = PythonOperator(
@@ -244,10 +347,11 @@ with DAG(
 
         stats = {
             "snowflake_inserts": ti.xcom_pull(task_ids="load_clean_to_snowflake"),
+            "relevant_inserts": ti.xcom_pull(task_ids="load_relevant_to_snowflake"),
             "mongodb_inserts": ti.xcom_pull(task_ids="load_rejected_to_mongodb"),
         }
 
-        processor = ReviewProcessor(aws_conn_id="aws_s3_default", snowflake_conn_id="snowflake_conn")
+        processor = new_processor(context)
         processor.save_metadata_to_mongodb(stats)
 
 
@@ -291,11 +395,33 @@ with DAG(
     )
 
 
+    # -------------------------------------------------------
+    # 8. Refresh KPI tables for the dashboards
+    # -------------------------------------------------------
+    def refresh_kpis(**context):
+        processor = new_processor(context)
+        try:
+            return processor.refresh_kpi_tables()
+        finally:
+            if processor.snowflake_conn:
+                processor.snowflake_conn.close()
+
+
+    refresh_kpi_tables = PythonOperator(
+        task_id="refresh_kpi_tables",
+        python_callable=refresh_kpis,
+        provide_context=True
+    )
+
+
     # =============================
     #         DAG FLOW
     # =============================
     fetch_paths >> load_tables >> check_s3_load >> join_tables >> clean_validate
-    clean_validate >> [save_clean, save_rejected] >> metadata >> check_snowflake_task
+    clean_validate >> prepare_clean_load >> load_clean_partitions >> save_clean
+    clean_validate >> [save_relevant, save_rejected]
+    [save_clean, save_relevant, save_rejected] >> metadata >> check_snowflake_task
+    save_relevant >> refresh_kpi_tables
 
 
 
@@ -3,7 +3,16 @@ Utils package for Airflow DAGs
 Contains helper classes and functions for the ETL pipeline.
 """
 
-from .mongo_handler import MongoHandler
-from .review_processor import ReviewProcessor
-
 __all__ = ['MongoHandler', 'ReviewProcessor']
+
+
+def __getattr__(name):
+    # Imports paresseux : review_processor dépend d'Airflow, les modules
+    # autonomes (column_profiler, ...) restent importables sans lui (tests)
+    if name == 'MongoHandler':
+        from .mongo_handler import MongoHandler
+        return MongoHandler
+    if name == 'ReviewProcessor':
+        from .review_processor import ReviewProcessor
+        return ReviewProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
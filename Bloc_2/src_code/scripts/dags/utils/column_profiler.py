@@ -0,0 +1,343 @@
+"""
+Column Profiler
+===============
+Profilage générique, en mémoire bornée, de n'importe quelle table extraite
+(PostgreSQL ou fichiers bruts CSV sur S3), lue par chunks.
+
+Pour chaque colonne :
+- count / null_count / null_rate
+- approx_distinct : HyperLogLog (2^p registres, erreur ~ 1.04 / sqrt(2^p))
+- min / max (et mean pour les colonnes numériques)
+- quantiles : approximés sur un échantillon réservoir de taille fixe
+- top_k : résumé Misra-Gries (comptes = bornes basses)
+
+Les profils sont stockés par run dans MongoDB (pipeline_metadata) et
+compare_profiles() signale les dérives entre deux runs.
+"""
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNKSIZE = 50_000
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+# ============================================================================
+# Sketches
+# ============================================================================
+
+class HyperLogLog:
+    """Estimateur de cardinalité HyperLogLog (registres uint8, fusionnable)."""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray):
+        """Ajoute des hashes 64 bits (np.uint64)."""
+        if len(hashes) == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # Les 64 - p bits restants tiennent exactement dans un float64 (< 2^53)
+        rest = (hashes & np.uint64((1 << (64 - self.p)) - 1)).astype(np.float64)
+        bit_length = np.frexp(rest)[1]  # 0 pour rest == 0
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            return int(round(self.m * np.log(self.m / zeros)))  # linear counting
+        return int(round(raw))
+
+
+class ReservoirSample:
+    """Échantillon uniforme de taille fixe (Algorithm R, vectorisé par chunk)."""
+
+    def __init__(self, size: int = 2048, seed: int = 0):
+        self.size = size
+        self.seen = 0
+        self.values = np.empty(0, dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        free = max(self.size - len(self.values), 0)
+        if free:
+            self.values = np.concatenate([self.values, values[:free]])
+        rest = values[free:]
+        if len(rest):
+            # Élément de rang t (1-based) gardé avec probabilité size / t
+            t = self.seen + free + np.arange(1, len(rest) + 1)
+            slots = (self._rng.random(len(rest)) * t).astype(np.int64)
+            keep = slots < self.size
+            self.values[slots[keep]] = rest[keep]
+        self.seen += len(values)
+
+    def quantiles(self, qs=QUANTILES) -> dict:
+        if not len(self.values):
+            return {}
+        return {str(q): float(v) for q, v in zip(qs, np.quantile(self.values, qs))}
+
+
+class MisraGries:
+    """Résumé Misra-Gries fusionnable pour les valeurs les plus fréquentes."""
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counters = {}
+
+    def update_counts(self, counts: pd.Series):
+        for value, count in counts.items():
+            self.counters[value] = self.counters.get(value, 0) + int(count)
+        if len(self.counters) > self.capacity:
+            # On retire le (capacity+1)-ième compte à tous les compteurs
+            cut = sorted(self.counters.values(), reverse=True)[self.capacity]
+            self.counters = {v: c - cut for v, c in self.counters.items() if c > cut}
+
+    def top(self, k: int = 10) -> list:
+        items = sorted(self.counters.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [{"value": _to_native(v), "count": c} for v, c in items]
+
+
+def _to_native(value):
+    """Convertit les scalaires numpy en types Python (sérialisables BSON/JSON)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# ============================================================================
+# Profils
+# ============================================================================
+
+class ColumnProfile:
+    """Profil incrémental d'une colonne."""
+
+    def __init__(self, name: str, hll_precision: int = 12, reservoir_size: int = 2048,
+                 top_k_capacity: int = 64):
+        self.name = name
+        self.count = 0
+        self.null_count = 0
+        self.numeric = None
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.hll = HyperLogLog(hll_precision)
+        self.reservoir = ReservoirSample(reservoir_size)
+        self.top_k = MisraGries(top_k_capacity)
+
+    def update(self, series: pd.Series):
+        self.count += len(series)
+        values = series.dropna()
+        self.null_count += len(series) - len(values)
+        if values.empty:
+            return
+
+        if self.numeric is None:
+            self.numeric = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+        if self.numeric:
+            values = pd.to_numeric(values, errors="coerce").dropna().astype(np.float64)
+            self.sum += float(values.sum())
+            self.reservoir.update(values.to_numpy())
+        else:
+            # Une même valeur doit avoir le même hash quel que soit le chunk
+            values = values.astype(str)
+
+        if values.empty:
+            return
+        chunk_min, chunk_max = values.min(), values.max()
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+        self.hll.update_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        self.top_k.update_counts(values.value_counts(sort=False))
+
+    def to_dict(self, top_k: int = 10) -> dict:
+        non_null = self.count - self.null_count
+        profile = {
+            "count": self.count,
+            "null_count": self.null_count,
+            "null_rate": round(self.null_count / self.count, 6) if self.count else 0.0,
+            "approx_distinct": self.hll.estimate() if non_null else 0,
+            "min": _to_native(self.min),
+            "max": _to_native(self.max),
+            "top_k": self.top_k.top(top_k),
+            "numeric": bool(self.numeric),
+        }
+        if self.numeric and non_null:
+            profile["mean"] = self.sum / non_null
+            profile["quantiles"] = self.reservoir.quantiles()
+        return profile
+
+
+class TableProfiler:
+    """Profile toutes les colonnes d'une table à partir de chunks DataFrame."""
+
+    def __init__(self, table_name: str, **column_options):
+        self.table_name = table_name
+        self.column_options = column_options
+        self.columns = {}
+        self.rows = 0
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        for column in chunk.columns:
+            if column not in self.columns:
+                self.columns[column] = ColumnProfile(column, **self.column_options)
+            self.columns[column].update(chunk[column])
+
+    def to_dict(self) -> dict:
+        return {
+            "table": self.table_name,
+            "rows": self.rows,
+            "profiled_at": datetime.now(),
+            "columns": {name: col.to_dict() for name, col in self.columns.items()},
+        }
+
+
+def profile_chunks(chunks, table_name: str, **column_options) -> dict:
+    """
+    Profile une table lue par chunks.
+
+    Args:
+        chunks: Itérable de DataFrames
+        table_name: Nom de la table (stocké dans le profil)
+        **column_options: hll_precision, reservoir_size, top_k_capacity
+
+    Returns:
+        Profil de la table (dict)
+    """
+    profiler = TableProfiler(table_name, **column_options)
+    for chunk in chunks:
+        profiler.update(chunk)
+    logger.info(f"[OK] Profiled {table_name}: {profiler.rows:,} rows, {len(profiler.columns)} columns")
+    return profiler.to_dict()
+
+
+# ============================================================================
+# Sources
+# ============================================================================
+
+def iter_postgres_chunks(conn, query: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Lit une requête PostgreSQL par chunks via un curseur serveur (mémoire bornée).
+
+    Args:
+        conn: Connexion psycopg2 (ex: PostgresHook.get_conn())
+        query: Requête SQL
+        chunksize: Nombre de lignes par chunk
+    """
+    cursor = conn.cursor(name="column_profiler")
+    cursor.itersize = chunksize
+    try:
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=[desc[0] for desc in cursor.description])
+    finally:
+        cursor.close()
+
+
+def profile_postgres_table(conn, table_name: str, query: str = None,
+                           chunksize: int = DEFAULT_CHUNKSIZE, **column_options) -> dict:
+    """Profile une table PostgreSQL (SELECT * par défaut)."""
+    query = query or f"SELECT * FROM {table_name}"
+    return profile_chunks(iter_postgres_chunks(conn, query, chunksize), table_name, **column_options)
+
+
+def profile_csv(source, table_name: str, chunksize: int = DEFAULT_CHUNKSIZE, **column_options) -> dict:
+    """
+    Profile un fichier CSV (chemin local, URI, ou objet fichier comme le
+    Body streamé d'un objet S3).
+    """
+    chunks = pd.read_csv(source, chunksize=chunksize)
+    return profile_chunks(chunks, table_name, **column_options)
+
+
+# ============================================================================
+# Stockage MongoDB et dérive
+# ============================================================================
+
+def save_profiles_to_mongodb(collection, run_id: str, profiles: dict) -> int:
+    """
+    Enregistre les profils dans le document pipeline_metadata du run.
+
+    Args:
+        collection: Collection pymongo pipeline_metadata
+        run_id: Identifiant du run
+        profiles: Dict {table: profil}
+
+    Returns:
+        Nombre de profils enregistrés
+    """
+    update = {f"column_profiles.{table}": profile for table, profile in profiles.items()}
+    collection.update_one({"run_id": run_id}, {"$set": update}, upsert=True)
+    logger.info(f"[OK] Saved {len(profiles)} table profile(s) for run {run_id}")
+    return len(profiles)
+
+
+def load_previous_profile(collection, table_name: str, exclude_run_id: str = None):
+    """Dernier profil enregistré pour une table (hors run courant)."""
+    query = {f"column_profiles.{table_name}": {"$exists": True}}
+    if exclude_run_id:
+        query["run_id"] = {"$ne": exclude_run_id}
+    doc = collection.find_one(
+        query,
+        sort=[(f"column_profiles.{table_name}.profiled_at", -1)],
+        projection={f"column_profiles.{table_name}": 1},
+    )
+    return doc["column_profiles"][table_name] if doc else None
+
+
+def compare_profiles(previous: dict, current: dict, null_rate_delta: float = 0.05,
+                     distinct_ratio: float = 0.2, median_shift: float = 0.2) -> list:
+    """
+    Compare deux profils d'une même table et liste les dérives.
+
+    Args:
+        previous: Profil du run précédent
+        current: Profil du run courant
+        null_rate_delta: Écart absolu de null_rate toléré
+        distinct_ratio: Variation relative tolérée de approx_distinct
+        median_shift: Variation relative tolérée de la médiane (colonnes numériques)
+
+    Returns:
+        Liste de dicts {column, metric, previous, current}
+    """
+    drifts = []
+
+    def flag(column, metric, before, after):
+        drifts.append({"column": column, "metric": metric, "previous": before, "current": after})
+
+    prev_cols, curr_cols = previous.get("columns", {}), current.get("columns", {})
+    for column in sorted(set(prev_cols) | set(curr_cols)):
+        before, after = prev_cols.get(column), curr_cols.get(column)
+        if before is None or after is None:
+            flag(column, "presence", before is not None, after is not None)
+            continue
+
+        if abs(after["null_rate"] - before["null_rate"]) > null_rate_delta:
+            flag(column, "null_rate", before["null_rate"], after["null_rate"])
+
+        d0, d1 = before["approx_distinct"], after["approx_distinct"]
+        if max(d0, d1) and abs(d1 - d0) / max(d0, 1) > distinct_ratio:
+            flag(column, "approx_distinct", d0, d1)
+
+        m0 = before.get("quantiles", {}).get("0.5")
+        m1 = after.get("quantiles", {}).get("0.5")
+        if m0 is not None and m1 is not None and abs(m1 - m0) > median_shift * max(abs(m0), 1e-9):
+            flag(column, "median", m0, m1)
+
+    return drifts
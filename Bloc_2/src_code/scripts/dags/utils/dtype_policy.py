@@ -0,0 +1,170 @@
+"""
+Dtype Policy
+============
+Types compacts des DataFrames du pipeline, définis par un schéma par table :
+
+- colonnes très répétitives après la jointure (category, product_name) :
+  category
+- rating, text_length : entiers nullables courts (Int8, Int32)
+- has_image, has_orders : boolean nullable
+- chaînes (optionnel, PIPELINE_STRING_STORAGE=pyarrow) : StringDtype adossé
+  à Arrow, valeur manquante NaN (même sémantique que le dtype "str" de
+  pandas 3 : isnull, .str inchangés)
+
+Appliqué au chargement (read_csv, par table), puis sur le résultat de la
+jointure (pandasql passe par SQLite et rend des types génériques) ; le
+nettoyage conserve ces types. Une conversion numérique avec perte (p. ex.
+rating = 4.5) n'est pas appliquée : la colonne garde son type d'origine.
+
+Les chaînes Arrow divisent par ~2 la taille des DataFrames, mais pas le pic
+mémoire : pandasql recopie chaque colonne en objets Python pour SQLite, et
+chaque filtre du nettoyage recopie les octets. Elles restent donc désactivées
+par défaut (les chaînes gardent le type lu par pandas).
+
+PIPELINE_COMPACT_DTYPES=0 désactive la politique (types par défaut de pandas,
+p. ex. pour comparer la mémoire : benchmarks/bench_dtype_memory.py).
+
+Usage:
+    df = read_csv_compact(StringIO(content), "review")
+    df_joined = apply_dtype_policy(df_joined, JOINED_DTYPES)
+"""
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+COMPACT_DTYPES = os.getenv("PIPELINE_COMPACT_DTYPES", "1") != "0"
+# "" (défaut) : chaînes non converties ; "pyarrow" ou "python" : StringDtype
+STRING_STORAGE = os.getenv("PIPELINE_STRING_STORAGE", "")
+if STRING_STORAGE == "pyarrow" and not ARROW_AVAILABLE:
+    logger.warning("PIPELINE_STRING_STORAGE=pyarrow but pyarrow is not installed, strings left unchanged")
+    STRING_STORAGE = ""
+STRING = pd.StringDtype(STRING_STORAGE, na_value=np.nan) if STRING_STORAGE else None
+CATEGORY = "category"
+
+
+def _with_strings(schema: dict, columns: list) -> dict:
+    """Schema plus STRING for the given columns (when string storage is enabled)."""
+    return {**{column: STRING for column in columns}, **schema} if STRING is not None else schema
+
+
+# Tables brutes (S3 raw/), colonnes lues par join_tables
+TABLE_DTYPES = {
+    "review": _with_strings({"rating": "Int8"}, ["buyer_id", "title", "r_desc"]),
+    "product": _with_strings({}, ["p_id", "p_name"]),
+    "category": _with_strings({}, ["name"]),
+    "product_reviews": _with_strings({}, ["p_id"]),
+    "review_images": _with_strings({}, ["review_img"]),
+    "orders": _with_strings({}, ["buyer_id"]),
+}
+
+# Sortie de join_tables (et de clean_and_validate)
+JOINED_DTYPES = _with_strings({
+    "product_name": CATEGORY,
+    "category": CATEGORY,
+    "rating": "Int8",
+    "text_length": "Int32",
+    "has_image": "boolean",
+    "has_orders": "boolean",
+}, ["buyer_id", "title", "description", "review_img", "p_id"])
+
+_INTEGER_BOUNDS = {"Int8": (-2**7, 2**7 - 1), "Int16": (-2**15, 2**15 - 1), "Int32": (-2**31, 2**31 - 1)}
+
+
+def _to_nullable_int(series: pd.Series, dtype: str) -> pd.Series:
+    """Cast to a nullable integer dtype when lossless, else return the series unchanged."""
+    values = pd.to_numeric(series, errors="coerce")
+    present = values.dropna()
+    low, high = _INTEGER_BOUNDS.get(dtype, (-2**63, 2**63 - 1))
+    lossless = (values.notna() == series.notna()).all() and (present % 1 == 0).all()
+    if not lossless or (len(present) and (present.min() < low or present.max() > high)):
+        logger.warning(f"  Column {series.name} kept as {series.dtype} (not losslessly castable to {dtype})")
+        return series
+    return values.astype(dtype)
+
+
+def _to_boolean(series: pd.Series) -> pd.Series:
+    """0/1 (or True/False) flags to nullable boolean."""
+    if series.dtype == "boolean":
+        return series
+    return pd.to_numeric(series, errors="coerce").astype("Float64").ne(0).astype("boolean").mask(series.isna())
+
+
+def apply_dtype_policy(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """
+    Cast the schema columns present in df (in place on a shallow copy).
+
+    Args:
+        df: DataFrame
+        schema: Dict {column: dtype} (TABLE_DTYPES[table] or JOINED_DTYPES)
+
+    Returns:
+        DataFrame with compact dtypes (other columns unchanged)
+    """
+    if not COMPACT_DTYPES:
+        return df
+    df = df.copy(deep=False)
+    for column, dtype in schema.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        if dtype == "boolean":
+            df[column] = _to_boolean(df[column])
+        elif dtype in _INTEGER_BOUNDS:
+            df[column] = _to_nullable_int(df[column], dtype)
+        elif dtype == CATEGORY:
+            df[column] = df[column].astype(STRING or object).astype(CATEGORY)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def policy_dtype(column: str, default):
+    """Compact dtype of a joined column, or `default` when the policy is disabled."""
+    return JOINED_DTYPES.get(column, default) if COMPACT_DTYPES else default
+
+
+def normalize_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Categorical columns with only their used categories, sorted.
+
+    Deux DataFrames de mêmes valeurs ont alors les mêmes catégories (sortie
+    mono-processus et concat des partitions identiques).
+    """
+    df = df.copy(deep=False)
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            values = df[column].cat.remove_unused_categories()
+            df[column] = values.cat.reorder_categories(sorted(values.cat.categories))
+    return df
+
+
+def read_csv_compact(source, table_name: str) -> pd.DataFrame:
+    """
+    read_csv with the table's compact dtypes.
+
+    Strings are parsed directly as STRING (no object column in between);
+    numeric casts are applied afterwards, only when lossless.
+    """
+    schema = TABLE_DTYPES.get(table_name, {}) if COMPACT_DTYPES else {}
+    string_columns = {column: dtype for column, dtype in schema.items() if STRING is not None and dtype is STRING}
+    df = pd.read_csv(source, dtype=string_columns or None)
+    return apply_dtype_policy(df, schema)
+
+
+def to_xcom_dict(df: pd.DataFrame) -> dict:
+    """df.to_dict() with missing values as None (pd.NA is not JSON serializable)."""
+    return df.astype(object).where(df.notna(), None).to_dict()
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    """Deep memory usage of a DataFrame (strings included)."""
+    return int(df.memory_usage(deep=True).sum())
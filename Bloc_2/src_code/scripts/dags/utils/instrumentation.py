@@ -0,0 +1,217 @@
+"""
+Pipeline Instrumentation
+========================
+Mesures structurées par étape du pipeline (extract par table, chargement S3,
+jointure, nettoyage, chargement Snowflake, chargement MongoDB) :
+
+- temps mural et temps CPU
+- lignes en entrée / en sortie
+- octets lus / écrits (quand l'étape fait l'I/O elle-même : CSV S3)
+- pic de mémoire résidente du process (high-water mark à la fin de l'étape)
+
+Toutes les étapes d'un run sont stockées dans UN document de
+amazon_reviews.pipeline_metadata (upsert sur run_id, sous `stages.<étape>`),
+le même que les profils de colonnes. Chaque tâche Airflow écrit ses propres
+étapes ; slowest_stages() compare les étapes sur les derniers runs.
+"""
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_bytes():
+    """Pic de RSS du process courant en octets (None si indisponible)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def pipeline_run_id(context: dict) -> str:
+    """
+    Identifiant du run pipeline dans un contexte de tâche Airflow.
+
+    Le DAG d'extraction transmet son run_id au DAG de transformation
+    (conf pipeline_run_id) : les deux DAGs alimentent le même document.
+    """
+    dag_run = context.get("dag_run")
+    conf = (getattr(dag_run, "conf", None) or {}) if dag_run is not None else {}
+    return conf.get("pipeline_run_id") or context["run_id"]
+
+
+class StageRecord:
+    """Mesures d'une étape ; rows_out / bytes_* / extra sont renseignés par le code instrumenté."""
+
+    def __init__(self, name: str, rows_in: int = None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes_read = None
+        self.bytes_written = None
+        self.extra = {}
+        self.status = "running"
+        self.error = None
+        self.started_at = datetime.now()
+        self.wall_s = None
+        self.cpu_s = None
+        self.peak_rss_bytes = None
+
+    def add_bytes_read(self, n: int):
+        self.bytes_read = (self.bytes_read or 0) + int(n)
+
+    def add_bytes_written(self, n: int):
+        self.bytes_written = (self.bytes_written or 0) + int(n)
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "started_at": self.started_at,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "error": self.error,
+            **self.extra,
+        }
+
+
+class PipelineMetrics:
+    """Collecte les étapes d'un run et les enregistre dans pipeline_metadata."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.stages = {}
+        self._open = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        """
+        Mesure le bloc `with` comme une étape.
+
+        Usage:
+            with metrics.stage("join", rows_in=n) as stage:
+                df = join(...)
+                stage.rows_out = len(df)
+
+        Une exception marque l'étape "failed" (avec le message) et est relancée.
+        """
+        # Les noms deviennent des clés MongoDB : pas de "." ni de "$"
+        record = StageRecord(name.replace(".", "_").replace("$", "_"), rows_in)
+        self._open.append(record)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+            record.status = "success"
+        except Exception as e:
+            record.status = "failed"
+            record.error = str(e)[:500]
+            raise
+        finally:
+            record.wall_s = round(time.perf_counter() - wall, 4)
+            record.cpu_s = round(time.process_time() - cpu, 4)
+            record.peak_rss_bytes = peak_rss_bytes()
+            self._open.pop()
+            self.stages[record.name] = record
+            logger.info(
+                f"  [{'OK' if record.status == 'success' else 'FAIL'}] stage {record.name}: "
+                f"{record.wall_s:.2f}s wall, {record.cpu_s:.2f}s cpu, "
+                f"rows {record.rows_in} -> {record.rows_out}"
+            )
+
+    @property
+    def current(self):
+        """Étape ouverte la plus interne (None hors étape)."""
+        return self._open[-1] if self._open else None
+
+    def add_bytes_read(self, n: int):
+        """Impute des octets lus à l'étape en cours (sans effet hors étape)."""
+        if self.current is not None:
+            self.current.add_bytes_read(n)
+
+    def add_bytes_written(self, n: int):
+        """Impute des octets écrits à l'étape en cours (sans effet hors étape)."""
+        if self.current is not None:
+            self.current.add_bytes_written(n)
+
+    def to_update(self) -> dict:
+        """Champs $set pour le document du run."""
+        return {f"stages.{name}": record.to_dict() for name, record in self.stages.items()}
+
+    def save(self, collection) -> int:
+        """
+        Enregistre les étapes mesurées dans le document du run (upsert sur run_id).
+
+        Args:
+            collection: Collection pymongo pipeline_metadata
+
+        Returns:
+            Nombre d'étapes enregistrées
+        """
+        return save_stage_records(collection, self.run_id,
+                                  {name: record.to_dict() for name, record in self.stages.items()})
+
+
+def save_stage_records(collection, run_id: str, records: dict) -> int:
+    """
+    Enregistre des étapes déjà sérialisées ({étape: StageRecord.to_dict()}).
+
+    Utilisé quand les étapes viennent de plusieurs tâches (tâches mappées
+    Airflow, via XCom) : un seul upsert, pas de course à la création du
+    document du run.
+
+    Returns:
+        Nombre d'étapes enregistrées
+    """
+    if not records:
+        return 0
+    now = datetime.now()
+    collection.update_one(
+        {"run_id": run_id},
+        {
+            "$set": {**{f"stages.{name}": record for name, record in records.items()}, "updated_at": now},
+            "$setOnInsert": {"created_at": now},
+        },
+        upsert=True,
+    )
+    logger.info(f"[OK] Saved {len(records)} stage metric(s) for run {run_id}")
+    return len(records)
+
+
+def slowest_stages(collection, last_runs: int = 20, limit: int = 10) -> list:
+    """
+    Étapes les plus lentes (temps mural moyen) sur les derniers runs.
+
+    Returns:
+        Liste de dicts {stage, runs, avg_wall_s, max_wall_s, avg_cpu_s, max_peak_rss_bytes}
+    """
+    pipeline = [
+        {"$match": {"stages": {"$exists": True}}},
+        {"$sort": {"updated_at": -1}},
+        {"$limit": last_runs},
+        {"$project": {"stages": {"$objectToArray": "$stages"}}},
+        {"$unwind": "$stages"},
+        {"$group": {
+            "_id": "$stages.k",
+            "runs": {"$sum": 1},
+            "avg_wall_s": {"$avg": "$stages.v.wall_s"},
+            "max_wall_s": {"$max": "$stages.v.wall_s"},
+            "avg_cpu_s": {"$avg": "$stages.v.cpu_s"},
+            "max_peak_rss_bytes": {"$max": "$stages.v.peak_rss_bytes"},
+        }},
+        {"$sort": {"avg_wall_s": -1}},
+        {"$limit": limit},
+    ]
+    return [{"stage": doc.pop("_id"), **doc} for doc in collection.aggregate(pipeline)]
@@ -0,0 +1,196 @@
+"""
+Keyword Matcher
+===============
+Recherche multi-motifs (Aho-Corasick) des mots-clés pondérés dans les
+descriptions de reviews.
+
+Un automate est compilé une fois pour un ensemble de lexiques
+({lexique: {mot-clé: poids}}, p. ex. sentiment positif / négatif et un
+lexique par thème) ; chaque description est ensuite parcourue UNE seule fois,
+quel que soit le nombre de mots-clés, au lieu d'un passage par mot-clé
+(str.contains / re.findall en boucle : O(mots-clés x texte)).
+
+- mots-clés simples ou expressions ("stopped working"), insensibles à la casse
+- mots entiers uniquement ("bad" ne compte pas dans "badge") : textes et
+  mots-clés sont normalisés (minuscules, ponctuation -> espace) puis le
+  mot-clé est cherché entouré d'espaces
+- les correspondances qui se chevauchent comptent toutes
+  ("not worth" et "worth" dans "not worth it")
+
+Backend : pyahocorasick (C) s'il est installé, sinon un automate en Python pur
+avec le même résultat.
+
+Usage:
+    matcher = get_matcher({"positive": {"great": 1.5}, "negative": {"broke": 1.5}})
+    hits = matcher.hits_frame(df["description"])    # une colonne par lexique
+"""
+import logging
+import string
+from array import array
+
+import numpy as np
+import pandas as pd
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+
+# Ponctuation traitée comme un espace : les mots-clés sont cherchés entourés
+# d'espaces dans le texte normalisé, ce qui garantit des mots entiers
+_SEPARATORS = str.maketrans({c: " " for c in string.punctuation.replace("_", "") + "’‘“”«»–—…"})
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, punctuation to spaces, single spaces, padded: "Great!! Item" -> " great item "."""
+    return f" {' '.join(text.lower().translate(_SEPARATORS).split())} "
+
+
+# ============================================================================
+# PURE PYTHON AUTOMATON
+# ============================================================================
+
+class _PythonAutomaton:
+    """Aho-Corasick automaton (goto / fail / output), used without pyahocorasick."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+    def add_word(self, word: str, value) -> None:
+        state = 0
+        for char in word:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append(value)
+
+    def make_automaton(self) -> None:
+        # Parcours en largeur : le lien d'échec d'un état pointe vers le plus
+        # long suffixe propre qui est aussi un préfixe d'un mot-clé
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def iter(self, text: str):
+        """Yield (end_index, value) for every keyword occurrence, like pyahocorasick."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for value in output[state]:
+                yield end, value
+
+
+# ============================================================================
+# MATCHER
+# ============================================================================
+
+class KeywordMatcher:
+    """Compiled automaton over several weighted keyword lexicons."""
+
+    def __init__(self, lexicons: dict, backend: str = None):
+        """
+        Compile the automaton.
+
+        Args:
+            lexicons: Dict {lexicon name: {keyword: weight}}
+            backend: "pyahocorasick" or "python" (default: pyahocorasick if installed)
+        """
+        self.names = list(lexicons)
+        self.backend = backend or ("pyahocorasick" if ahocorasick is not None else "python")
+        if self.backend == "pyahocorasick" and ahocorasick is None:
+            raise ImportError("pyahocorasick is not installed (pip install pyahocorasick)")
+
+        # Un mot-clé présent dans plusieurs lexiques n'est ajouté qu'une fois,
+        # avec son vecteur de poids (un par lexique)
+        keyword_weights = {}
+        for j, name in enumerate(self.names):
+            for keyword, weight in lexicons[name].items():
+                key = normalize_text(keyword)
+                if key.strip():
+                    keyword_weights.setdefault(key, np.zeros(len(self.names)))[j] += weight
+
+        self.keywords = list(keyword_weights)
+        self.weights = (np.vstack([keyword_weights[k] for k in self.keywords])
+                        if self.keywords else np.zeros((0, len(self.names))))
+
+        self._automaton = ahocorasick.Automaton() if self.backend == "pyahocorasick" else _PythonAutomaton()
+        for keyword_id, key in enumerate(self.keywords):
+            self._automaton.add_word(key, keyword_id)
+        if self.keywords:
+            self._automaton.make_automaton()
+
+    def hits(self, text: str) -> np.ndarray:
+        """Weighted whole-word hits of each lexicon in one text."""
+        return self.hits_batch([text])[0]
+
+    def hits_batch(self, texts) -> np.ndarray:
+        """
+        Weighted hits of a batch of texts, one automaton scan per text.
+
+        Args:
+            texts: Iterable of texts (None / NaN count as empty)
+
+        Returns:
+            Array of shape (n_texts, n_lexicons)
+        """
+        # Tampons int32 (4 octets par correspondance) plutôt qu'une liste d'int
+        # Python et une matrice de poids (correspondances x lexiques) : quelques
+        # millions de correspondances faisaient le pic mémoire du scoring
+        keyword_ids, counts = array("i"), array("i")
+        scan = self._automaton.iter
+        for text in texts:
+            if not self.keywords or not isinstance(text, str):
+                counts.append(0)
+                continue
+            before = len(keyword_ids)
+            keyword_ids.extend(keyword_id for _, keyword_id in scan(normalize_text(text)))
+            counts.append(len(keyword_ids) - before)
+
+        n_texts = len(counts)
+        ids = np.frombuffer(keyword_ids, dtype=np.int32) if keyword_ids else np.zeros(0, dtype=np.int32)
+        text_pos = np.repeat(np.arange(n_texts, dtype=np.int32), np.frombuffer(counts, dtype=np.int32)) \
+            if n_texts else np.zeros(0, dtype=np.int32)
+        hits = np.zeros((n_texts, len(self.names)))
+        for j in range(len(self.names)):
+            hits[:, j] = np.bincount(text_pos, weights=self.weights[ids, j], minlength=n_texts)
+        return hits
+
+    def hits_frame(self, descriptions: pd.Series) -> pd.DataFrame:
+        """hits_batch as a DataFrame (one column per lexicon) aligned on descriptions.index."""
+        return pd.DataFrame(self.hits_batch(descriptions.to_numpy()),
+                            index=descriptions.index, columns=self.names)
+
+
+_MATCHERS = {}
+
+
+def get_matcher(lexicons: dict, backend: str = None) -> KeywordMatcher:
+    """KeywordMatcher compiled once per lexicon set (and backend), then reused."""
+    key = (backend, tuple(
+        (name, tuple(sorted(words.items()))) for name, words in lexicons.items()
+    ))
+    if key not in _MATCHERS:
+        _MATCHERS[key] = KeywordMatcher(lexicons, backend=backend)
+        logger.info(f"  [OK] Compiled keyword automaton: {len(_MATCHERS[key].keywords)} keywords, "
+                    f"{len(lexicons)} lexicons ({_MATCHERS[key].backend})")
+    return _MATCHERS[key]
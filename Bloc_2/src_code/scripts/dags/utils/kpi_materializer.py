@@ -0,0 +1,224 @@
+"""
+KPI Materializer
+================
+Pré-calcule les KPIs des dashboards analytics dans de petites tables Snowflake
+(une par graphique), après chaque chargement de REVIEW_RELEVANT.
+
+- Un seul scan de la table source : un cube GROUPING SETS (KPI_CUBE) est
+  matérialisé d'abord, chaque table KPI est ensuite calculée depuis ce cube.
+- Chaque table KPI contient les colonnes attendues par les dashboards, plus
+  KPI_RANK (ordre d'affichage), RUN_ID et COMPUTED_AT.
+
+Les dashboards lisent ces tables (SELECT ... ORDER BY KPI_RANK) et ne
+retombent sur le calcul à la volée que si elles n'existent pas encore.
+
+Publication : toutes les tables KPI sont d'abord construites dans des tables
+de staging (suffixe _STAGING), puis échangées avec les tables publiées
+(ALTER TABLE ... SWAP WITH) une fois toutes prêtes. Pendant le calcul, les
+dashboards lisent donc l'ancien jeu complet. Chaque SWAP est atomique, mais
+Snowflake valide chaque DDL séparément (commit implicite) : les SWAP ne
+forment pas une seule transaction. Un dashboard qui lit pendant la phase
+d'échange (quelques opérations de métadonnées) peut encore voir un mélange
+d'ancien et de nouveau ; la colonne RUN_ID permet de le détecter.
+"""
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+KPI_SCHEMA = os.getenv("KPI_SNOWFLAKE_SCHEMA", "DB_AMZ.ANALYTICS")
+KPI_SOURCE_TABLE = os.getenv("KPI_SOURCE_TABLE", f"{KPI_SCHEMA}.REVIEW_RELEVANT")
+KPI_TOP_N = int(os.getenv("KPI_TOP_N", "20"))
+
+_AVG_COLUMNS = ["RATING", "RELEVANCE_SCORE", "CONFIDENCE_SCORE", "TEXT_LENGTH"]
+
+CUBE_SQL = """
+    CREATE OR REPLACE TRANSIENT TABLE {schema}.KPI_CUBE AS
+    SELECT
+        CASE GROUPING(PRODUCT_NAME, BUYER_ID, CATEGORY, CATEGORY_REVIEW)
+            WHEN 15 THEN 'STATUS'
+            WHEN 13 THEN 'CATEGORY'
+            WHEN 14 THEN 'CATEGORY_REVIEW'
+            WHEN 6 THEN 'PRODUCT'
+            WHEN 11 THEN 'BUYER'
+        END AS GROUPING_SET,
+        PRODUCT_NAME,
+        BUYER_ID,
+        CATEGORY,
+        CATEGORY_REVIEW,
+        RELEVANT_STATUS,
+        COUNT(*) AS NB_REVIEWS,
+        IFF(RELEVANT_STATUS = 'RELEVANT', COUNT(*), 0) AS NB_RELEVANT,
+        {measures}
+    FROM {source}
+    GROUP BY GROUPING SETS (
+        (RELEVANT_STATUS),
+        (CATEGORY, RELEVANT_STATUS),
+        (CATEGORY_REVIEW, RELEVANT_STATUS),
+        (PRODUCT_NAME, CATEGORY_REVIEW, RELEVANT_STATUS),
+        (BUYER_ID, RELEVANT_STATUS)
+    )
+"""
+
+
+def _avg(column: str) -> str:
+    return f"ROUND(SUM(SUM_{column}) / NULLIF(SUM(NB_{column}), 0), 2)"
+
+
+# table -> (requête sur KPI_CUBE, ordre d'affichage, limite ou None)
+KPI_TABLES = {
+    "KPI_GLOBAL": (f"""
+        SELECT
+            SUM(NB_REVIEWS) AS TOTAL_REVIEWS,
+            SUM(NB_RELEVANT) AS NB_RELEVANT,
+            {_avg("RATING")} AS AVG_RATING,
+            {_avg("RELEVANCE_SCORE")} AS AVG_RELEVANCE_SCORE,
+            {_avg("CONFIDENCE_SCORE")} AS AVG_CONFIDENCE_SCORE,
+            {_avg("TEXT_LENGTH")} AS AVG_TEXT_LENGTH
+        FROM {{cube}} WHERE GROUPING_SET = 'STATUS'
+    """, "TOTAL_REVIEWS", None),
+    "KPI_STATUS": ("""
+        SELECT RELEVANT_STATUS, NB_REVIEWS
+        FROM {cube} WHERE GROUPING_SET = 'STATUS'
+    """, "NB_REVIEWS DESC", None),
+    "KPI_CATEGORY": (f"""
+        SELECT
+            CATEGORY,
+            SUM(NB_REVIEWS) AS NB_REVIEWS,
+            SUM(NB_RELEVANT) AS NB_RELEVANT,
+            ROUND(SUM(NB_RELEVANT) / SUM(NB_REVIEWS), 3) AS POURCENTAGE_RELEVANT,
+            {_avg("RATING")} AS AVG_RATING
+        FROM {{cube}} WHERE GROUPING_SET = 'CATEGORY'
+        GROUP BY CATEGORY
+    """, "NB_REVIEWS DESC", None),
+    "KPI_TOP_PRODUCTS_RELEVANT": ("""
+        SELECT PRODUCT_NAME, SUM(NB_REVIEWS) AS NB_RELEVANT_REVIEWS
+        FROM {cube} WHERE GROUPING_SET = 'PRODUCT' AND RELEVANT_STATUS = 'RELEVANT'
+        GROUP BY PRODUCT_NAME
+    """, "NB_RELEVANT_REVIEWS DESC", KPI_TOP_N),
+    "KPI_CATEGORY_REVIEW": ("""
+        SELECT CATEGORY_REVIEW, NB_REVIEWS AS NB_RELEVANT
+        FROM {cube} WHERE GROUPING_SET = 'CATEGORY_REVIEW' AND RELEVANT_STATUS = 'RELEVANT'
+    """, "NB_RELEVANT DESC", None),
+    "KPI_TOP_BUYERS_RELEVANT": ("""
+        SELECT BUYER_ID, NB_REVIEWS AS NB_RELEVANT_REVIEWS
+        FROM {cube} WHERE GROUPING_SET = 'BUYER' AND RELEVANT_STATUS = 'RELEVANT'
+    """, "NB_RELEVANT_REVIEWS DESC", KPI_TOP_N),
+    "KPI_LEAST_PRODUCTS_RELEVANT": ("""
+        SELECT PRODUCT_NAME, SUM(NB_REVIEWS) AS NB_REVIEWS
+        FROM {cube} WHERE GROUPING_SET = 'PRODUCT' AND RELEVANT_STATUS = 'RELEVANT'
+        GROUP BY PRODUCT_NAME
+    """, "NB_REVIEWS ASC", KPI_TOP_N),
+    "KPI_LEAST_PRODUCTS_BY_CATEGORY_REVIEW": ("""
+        SELECT PRODUCT_NAME, SUM(NB_REVIEWS) AS NB_REVIEWS, CATEGORY_REVIEW
+        FROM {cube} WHERE GROUPING_SET = 'PRODUCT'
+        GROUP BY PRODUCT_NAME, CATEGORY_REVIEW
+    """, "NB_REVIEWS ASC", KPI_TOP_N),
+    "KPI_ACTIVE_BUYERS": ("""
+        SELECT
+            BUYER_ID,
+            SUM(NB_REVIEWS) AS TOTAL_REVIEWS,
+            SUM(NB_RELEVANT) AS NB_RELEVANT,
+            ROUND(SUM(NB_RELEVANT) / SUM(NB_REVIEWS), 3) AS PCT_RELEVANT
+        FROM {cube} WHERE GROUPING_SET = 'BUYER'
+        GROUP BY BUYER_ID
+    """, "TOTAL_REVIEWS DESC", KPI_TOP_N),
+    "KPI_MOST_REVIEWED_PRODUCTS": ("""
+        SELECT PRODUCT_NAME, SUM(NB_REVIEWS) AS NB_REVIEWS
+        FROM {cube} WHERE GROUPING_SET = 'PRODUCT'
+        GROUP BY PRODUCT_NAME
+    """, "NB_REVIEWS DESC", KPI_TOP_N),
+}
+
+
+STAGING_SUFFIX = "_STAGING"
+
+
+def build_kpi_statements(schema: str = KPI_SCHEMA, source_table: str = KPI_SOURCE_TABLE) -> list:
+    """
+    Génère les requêtes de matérialisation (cube puis une CTAS par table KPI,
+    écrite dans sa table de staging).
+
+    Args:
+        schema: Schéma cible (DATABASE.SCHEMA)
+        source_table: Table source des reviews enrichies
+
+    Returns:
+        Liste de tuples (nom de table publiée, requête SQL) ; RUN_ID est un paramètre %(run_id)s
+    """
+    measures = ",\n        ".join(
+        f"SUM({c}) AS SUM_{c}, COUNT({c}) AS NB_{c}" for c in _AVG_COLUMNS
+    )
+    statements = [("KPI_CUBE", CUBE_SQL.format(schema=schema, source=source_table, measures=measures))]
+
+    cube = f"{schema}.KPI_CUBE"
+    for table, (select, order_by, limit) in KPI_TABLES.items():
+        qualify = f"QUALIFY KPI_RANK <= {limit}" if limit else ""
+        statements.append((table, f"""
+            CREATE OR REPLACE TABLE {schema}.{table}{STAGING_SUFFIX} AS
+            SELECT
+                kpi.*,
+                ROW_NUMBER() OVER (ORDER BY {order_by}) AS KPI_RANK,
+                %(run_id)s AS RUN_ID,
+                CURRENT_TIMESTAMP() AS COMPUTED_AT
+            FROM ({select.format(cube=cube)}) kpi
+            {qualify}
+        """))
+    return statements
+
+
+def build_swap_statements(schema: str = KPI_SCHEMA) -> list:
+    """
+    Requêtes de publication : chaque table de staging est échangée avec la table
+    publiée (créée vide au premier run pour que SWAP soit possible), puis
+    supprimée (elle contient alors l'ancien jeu).
+    """
+    statements = []
+    for table in KPI_TABLES:
+        published, staging = f"{schema}.{table}", f"{schema}.{table}{STAGING_SUFFIX}"
+        statements.append(f"CREATE TABLE IF NOT EXISTS {published} LIKE {staging}")
+        statements.append(f"ALTER TABLE {published} SWAP WITH {staging}")
+    statements += [f"DROP TABLE IF EXISTS {schema}.{table}{STAGING_SUFFIX}" for table in KPI_TABLES]
+    return statements
+
+
+def materialize_kpi_tables(conn, run_id: str, schema: str = KPI_SCHEMA,
+                           source_table: str = KPI_SOURCE_TABLE) -> dict:
+    """
+    Recalcule toutes les tables KPI dans leurs tables de staging, puis les
+    publie ensemble (SWAP) une fois toutes construites.
+
+    Args:
+        conn: Connexion snowflake.connector ouverte
+        run_id: Identifiant du run du pipeline (stocké dans chaque table)
+        schema: Schéma cible (DATABASE.SCHEMA)
+        source_table: Table source des reviews enrichies
+
+    Returns:
+        Dict {table: nombre de lignes}
+    """
+    logger.info(f"Materializing KPI tables in {schema} from {source_table} (run_id={run_id})")
+
+    results = {}
+    cursor = conn.cursor()
+    try:
+        # 1. Construction : les tables publiées ne sont pas touchées
+        for table, sql in build_kpi_statements(schema, source_table):
+            cursor.execute(sql, {"run_id": run_id})
+            built = table if table == "KPI_CUBE" else f"{table}{STAGING_SUFFIX}"
+            cursor.execute(f"SELECT COUNT(*) FROM {schema}.{built}")
+            results[table] = cursor.fetchone()[0]
+            logger.info(f"  [OK] {table}: {results[table]:,} rows")
+
+        # 2. Publication : uniquement des opérations de métadonnées
+        for sql in build_swap_statements(schema):
+            cursor.execute(sql)
+        logger.info(f"  [OK] {len(KPI_TABLES)} KPI tables published (run_id={run_id})")
+    except Exception as e:
+        # Un échec pendant la construction laisse les tables publiées intactes
+        logger.error(f"[FAIL] KPI materialization failed: {e}")
+        raise
+    finally:
+        cursor.close()
+
+    return results
@@ -0,0 +1,173 @@
+"""
+Partitioned Transform
+=====================
+Exécution partitionnée de join_tables + clean_and_validate sur plusieurs
+processus.
+
+Les reviews sont réparties par hachage en N partitions indépendantes :
+
+- key="review_id" : hash(review_id)
+- key="p_id"      : hash du premier p_id de la review (product_reviews), pour
+                    garder les reviews d'un même produit ensemble (les
+                    produits populaires rendent les partitions inégales) ;
+                    les reviews sans produit sont réparties par review_id
+
+Dans les deux cas, toutes les lignes d'un même review_id tombent dans la même
+partition : la déduplication de clean_and_validate reste exacte. Chaque
+partition reçoit ses lignes de review / product_reviews / review_images et
+les seules lignes de product / orders qu'elle référence (category est
+diffusée telle quelle).
+
+Les sorties clean / rejected des partitions sont concaténées puis triées par
+review_id (tri stable) : le résultat est le même qu'en mode mono-processus
+trié de la même façon.
+
+Usage:
+    df_clean, df_rejected, joined_rows = transform_partitioned(tables, n_partitions=8)
+"""
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils import review_transforms
+from utils.dtype_policy import JOINED_DTYPES, apply_dtype_policy, normalize_categories
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEYS = ("review_id", "p_id")
+TRANSFORM_PARTITIONS = int(os.getenv("TRANSFORM_PARTITIONS", "1"))
+TRANSFORM_WORKERS = int(os.getenv("TRANSFORM_WORKERS", "0")) or None  # None = os.cpu_count()
+
+
+def hash_partition(values: pd.Series, n_partitions: int) -> np.ndarray:
+    """Partition number of each value (hash_pandas_object: stable across processes and runs)."""
+    return (pd.util.hash_pandas_object(values, index=False).to_numpy() % n_partitions).astype(np.int64)
+
+
+def review_partitions(tables: dict, n_partitions: int, key: str = "review_id") -> pd.Series:
+    """
+    Partition of every review_id.
+
+    Args:
+        tables: Raw tables (review, product_reviews, ...)
+        n_partitions: Number of partitions
+        key: "review_id" or "p_id"
+
+    Returns:
+        Series review_id -> partition number
+    """
+    if key not in PARTITION_KEYS:
+        raise ValueError(f"Unknown partition key '{key}' (expected one of {PARTITION_KEYS})")
+
+    review_ids = pd.Series(tables["review"]["review_id"].dropna().unique())
+    partitions = pd.Series(hash_partition(review_ids, n_partitions), index=review_ids.to_numpy())
+
+    if key == "p_id":
+        product_reviews = tables["product_reviews"].dropna(subset=["review_id", "p_id"])
+        # Plus petit p_id de chaque review (tri + dédoublonnage : plus rapide qu'un groupby.min sur des str)
+        first_product = (product_reviews.sort_values(["review_id", "p_id"])
+                         .drop_duplicates("review_id").set_index("review_id")["p_id"])
+        by_product = pd.Series(hash_partition(first_product.reset_index(drop=True), n_partitions),
+                               index=first_product.index)
+        product_part = partitions.index.map(by_product).to_numpy(dtype="float64")
+        partitions[:] = np.where(np.isnan(product_part), partitions.to_numpy(), product_part)
+
+    return partitions.astype(np.int64)
+
+
+def split_tables(tables: dict, n_partitions: int, key: str = "review_id") -> list:
+    """
+    Split the raw tables into n_partitions independent table sets.
+
+    Returns:
+        List of table dicts (same keys as `tables`), one per partition
+    """
+    partitions = review_partitions(tables, n_partitions, key)
+
+    def part_of(review_ids: pd.Series) -> np.ndarray:
+        # review_id absent de review (ou NULL) : partition -1, jamais jointe
+        return review_ids.map(partitions).fillna(-1).to_numpy()
+
+    review = tables["review"]
+    review_part = part_of(review["review_id"])
+    product_reviews = tables["product_reviews"]
+    product_reviews_part = part_of(product_reviews["review_id"])
+    review_images = tables.get("review_images", pd.DataFrame(columns=["review_id", "review_img"]))
+    review_images_part = part_of(review_images["review_id"]) if len(review_images) else np.array([])
+    orders = tables.get("orders", pd.DataFrame(columns=["buyer_id"]))
+
+    # Les lignes de review sans review_id (rejetées par clean_and_validate) vont en partition 0
+    review_part = np.where(review["review_id"].isna().to_numpy(), 0, review_part)
+
+    parts = []
+    for i in range(n_partitions):
+        part_review = review[review_part == i]
+        part_product_reviews = product_reviews[product_reviews_part == i]
+        part = dict(tables)
+        part["review"] = part_review
+        part["product_reviews"] = part_product_reviews
+        part["product"] = tables["product"][tables["product"]["p_id"].isin(part_product_reviews["p_id"])]
+        if "review_images" in tables:
+            part["review_images"] = review_images[review_images_part == i]
+        if "orders" in tables:
+            part["orders"] = orders[orders["buyer_id"].isin(part_review["buyer_id"])]
+        parts.append(part)
+    return parts
+
+
+def _transform_partition(tables: dict, product_id: str = None) -> tuple:
+    """join + clean of one partition (runs in a worker process)."""
+    df_joined = review_transforms.join_tables(tables, product_id)
+    df_clean, df_rejected = review_transforms.clean_and_validate(df_joined)
+    return df_clean, df_rejected, len(df_joined)
+
+
+def _sort_by_review_id(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty or "review_id" not in df.columns:
+        return df.reset_index(drop=True)
+    return df.sort_values("review_id", kind="stable").reset_index(drop=True)
+
+
+def transform_partitioned(tables: dict, n_partitions: int = None, max_workers: int = None,
+                          key: str = "review_id", product_id: str = None) -> tuple:
+    """
+    join_tables + clean_and_validate on hash partitions, in a process pool.
+
+    Args:
+        tables: Raw tables (same dict as join_tables)
+        n_partitions: Number of partitions (default: TRANSFORM_PARTITIONS, or the worker count)
+        max_workers: Worker processes (default: TRANSFORM_WORKERS, or os.cpu_count())
+        key: Partition key, "review_id" or "p_id"
+        product_id: Optional product filter
+
+    Returns:
+        Tuple of (df_clean, df_rejected, joined_rows), sorted by review_id
+    """
+    max_workers = max_workers or TRANSFORM_WORKERS or os.cpu_count() or 1
+    n_partitions = n_partitions or (TRANSFORM_PARTITIONS if TRANSFORM_PARTITIONS > 1 else max_workers)
+    start = time.perf_counter()
+
+    parts = split_tables(tables, n_partitions, key)
+    logger.info(f"Transforming {n_partitions} partitions (key={key}) on {max_workers} worker(s)...")
+
+    if max_workers > 1 and n_partitions > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, n_partitions)) as executor:
+            results = list(executor.map(_transform_partition, parts, [product_id] * n_partitions))
+    else:
+        results = [_transform_partition(part, product_id) for part in parts]
+
+    # concat de catégories différentes -> object : on réapplique les types compacts
+    df_clean = pd.concat([r[0] for r in results], ignore_index=True)
+    df_clean = normalize_categories(apply_dtype_policy(df_clean, JOINED_DTYPES))
+    df_clean = _sort_by_review_id(df_clean)
+    rejected = [r[1] for r in results if not r[1].empty]
+    df_rejected = _sort_by_review_id(pd.concat(rejected, ignore_index=True)) if rejected else pd.DataFrame()
+    joined_rows = sum(r[2] for r in results)
+
+    logger.info(f"  [OK] {joined_rows:,} joined rows -> {len(df_clean):,} clean, {len(df_rejected):,} rejected "
+                f"({time.perf_counter() - start:.2f}s)")
+    return df_clean, df_rejected, joined_rows
@@ -0,0 +1,136 @@
+"""
+Rejection Writer
+================
+Écriture idempotente des reviews rejetées dans amazon_reviews.rejected_reviews.
+
+Chaque rejet est un upsert sur la clé (review_id, rejection_reason) :
+un rejet déjà connu n'est pas réinséré à chaque run quotidien, la collection
+et ses index ne grossissent qu'avec les NOUVEAUX rejets.
+
+- rejected_at est fixé à la première détection ($setOnInsert)
+- original_data / error_details sont mis à jour ($set) ; identiques, MongoDB
+  ne modifie rien et le rejet est compté "unchanged"
+- bulk_write non ordonnés, par lots bornés, envoyés en parallèle
+"""
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import ASCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+REJECTION_KEY = ("review_id", "rejection_reason")
+REJECTION_INDEX_NAME = "uniq_review_id_rejection_reason"
+BULK_BATCH_SIZE = int(os.getenv("REJECTED_BULK_BATCH_SIZE", "1000"))
+BULK_WORKERS = int(os.getenv("REJECTED_BULK_WORKERS", "4"))
+
+
+def ensure_rejection_index(collection, dedupe: bool = True) -> str:
+    """
+    Crée l'index unique (review_id, rejection_reason) s'il manque.
+
+    Si l'index existe déjà (cas de tous les runs après le premier), rien
+    d'autre n'est fait : la déduplication, qui parcourt toute la collection,
+    ne tourne qu'une fois, au moment de créer l'index.
+
+    Args:
+        collection: Collection rejected_reviews
+        dedupe: Supprime d'abord les doublons hérités des runs en insert_many
+                (garde le rejet le plus ancien), sinon la création échoue
+
+    Returns:
+        Nom de l'index
+    """
+    if REJECTION_INDEX_NAME in collection.index_information():
+        return REJECTION_INDEX_NAME
+
+    if dedupe:
+        duplicates = collection.aggregate([
+            {"$sort": {"rejected_at": ASCENDING}},
+            {"$group": {
+                "_id": {"review_id": "$review_id", "rejection_reason": "$rejection_reason"},
+                "ids": {"$push": "$_id"},
+                "n": {"$sum": 1},
+            }},
+            {"$match": {"n": {"$gt": 1}}},
+        ], allowDiskUse=True)
+        removed = 0
+        for group in duplicates:
+            removed += collection.delete_many({"_id": {"$in": group["ids"][1:]}}).deleted_count
+        if removed:
+            logger.info(f"  [OK] Removed {removed:,} duplicate rejected reviews")
+
+    return collection.create_index(
+        [(field, ASCENDING) for field in REJECTION_KEY],
+        unique=True,
+        name=REJECTION_INDEX_NAME,
+    )
+
+
+def _key(record: dict) -> tuple:
+    # NaN (review_id manquant) -> None : NaN != NaN casserait la déduplication
+    return tuple(None if isinstance(v, float) and math.isnan(v) else v
+                 for v in (record.get(field) for field in REJECTION_KEY))
+
+
+def _upsert(record: dict) -> UpdateOne:
+    key = dict(zip(REJECTION_KEY, _key(record)))
+    content = {k: v for k, v in record.items() if k not in REJECTION_KEY and k != "rejected_at"}
+    update = {"$setOnInsert": {"rejected_at": record.get("rejected_at")}}
+    if content:
+        update["$set"] = content
+    return UpdateOne(key, update, upsert=True)
+
+
+def _write_batch(collection, records: list) -> dict:
+    result = collection.bulk_write([_upsert(r) for r in records], ordered=False)
+    return {
+        "inserted": result.upserted_count,
+        "updated": result.modified_count,
+        "unchanged": result.matched_count - result.modified_count,
+    }
+
+
+def upsert_rejections(collection, records: list, batch_size: int = BULK_BATCH_SIZE,
+                      max_workers: int = BULK_WORKERS) -> dict:
+    """
+    Upsert des rejets par lots non ordonnés, en parallèle.
+
+    Args:
+        collection: Collection rejected_reviews
+        records: Dicts {review_id, rejection_reason, rejected_at, original_data, error_details}
+        batch_size: Taille maximale d'un bulk_write
+        max_workers: Lots envoyés en parallèle (1 = séquentiel)
+
+    Returns:
+        Dict {inserted, updated, unchanged, batches, seconds}
+        (les rejets de même clé dans `records` ne comptent qu'une fois)
+    """
+    start = time.perf_counter()
+
+    # Une seule opération par clé : deux upserts de la même clé dans des lots
+    # non ordonnés ou parallèles pourraient insérer deux fois (E11000)
+    unique_records = list({_key(r): r for r in records}.values())
+    batches = [unique_records[i:i + batch_size] for i in range(0, len(unique_records), batch_size)]
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    if max_workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            results = list(executor.map(lambda batch: _write_batch(collection, batch), batches))
+    else:
+        results = [_write_batch(collection, batch) for batch in batches]
+
+    for result in results:
+        for counter, value in result.items():
+            totals[counter] += value
+
+    totals["batches"] = len(batches)
+    totals["seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(
+        f"  [OK] Rejected reviews: {totals['inserted']:,} new, {totals['updated']:,} updated, "
+        f"{totals['unchanged']:,} unchanged ({totals['batches']} batch(es), {totals['seconds']}s)"
+    )
+    return totals
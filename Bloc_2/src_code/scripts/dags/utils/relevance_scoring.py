@@ -0,0 +1,248 @@
+"""
+Relevance Scoring
+=================
+Étape de scoring après clean_and_validate : calcule les colonnes de
+REVIEW_RELEVANT lues par l'API et les dashboards, en opérations vectorisées
+NumPy / pandas (aucun apply ligne à ligne).
+
+    TEXT_LENGTH_SCORE : gaussienne centrée sur 300 caractères (sigma 200)
+    IS_EXTREME_RATING : rating 1 ou 5
+    KEYWORD_SCORE     : sentiment lexical normalisé dans [0, 1] (0.5 = neutre)
+    RELEVANCE_SCORE   : somme pondérée des composantes x 100
+    CATEGORY_REVIEW   : thème majoritaire parmi les mots-clés détectés
+    CONFIDENCE_SCORE  : part des mots-clés du thème retenu (0-100)
+    RELEVANT_STATUS   : RELEVANT si confiance >= 78.3 et pertinence >= 58.8
+
+Pondérations et seuils reprennent l'étude de cas (Step_4_Case_Study_Analysis) ;
+ils sont configurables par variables d'environnement (RELEVANCE_WEIGHTS en
+JSON, RELEVANCE_THRESHOLD, CONFIDENCE_THRESHOLD) ou en argument.
+
+Le sentiment VADER et la classification zero-shot du notebook ne passent pas
+à l'échelle du run quotidien : ils sont remplacés par des lexiques pondérés
+(mots et expressions), évalués ensemble en un seul passage d'un automate
+Aho-Corasick sur les descriptions (utils/keyword_matcher.py).
+"""
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.keyword_matcher import get_matcher
+
+logger = logging.getLogger(__name__)
+
+TEXT_LENGTH_OPTIMAL = 300
+TEXT_LENGTH_SIGMA = 200
+
+DEFAULT_WEIGHTS = {
+    "text_length": 0.30,
+    "has_image": 0.20,
+    "has_orders": 0.10,
+    "is_extreme_rating": 0.15,
+    "keyword": 0.25,
+}
+DEFAULT_RELEVANCE_THRESHOLD = 58.8
+DEFAULT_CONFIDENCE_THRESHOLD = 78.3
+
+# Normalisation du score composé, comme le "compound" VADER : x / sqrt(x² + alpha)
+SENTIMENT_ALPHA = 15
+
+POSITIVE_KEYWORDS = {
+    "good": 1.0, "great": 1.5, "love": 2.0, "excellent": 2.0, "perfect": 2.0,
+    "amazing": 2.0, "best": 1.5, "nice": 1.0, "recommend": 1.5, "happy": 1.5,
+    "comfortable": 1.0, "worth": 1.0, "easy": 0.5, "fast": 0.5, "works": 0.5,
+    "highly recommend": 1.0, "works great": 1.0,
+}
+NEGATIVE_KEYWORDS = {
+    "bad": 1.5, "poor": 1.5, "hate": 2.0, "terrible": 2.0, "worst": 2.0,
+    "awful": 2.0, "broke": 1.5, "broken": 1.5, "damaged": 1.5, "defective": 2.0,
+    "disappointed": 1.5, "waste": 1.5, "refund": 1.0, "slow": 0.5, "cheap": 0.5,
+    "not worth": 2.0, "stopped working": 2.0, "fell apart": 2.0, "waste of money": 1.0,
+}
+
+# Mêmes thèmes que la classification zero-shot du notebook
+CATEGORY_KEYWORDS = {
+    "product quality or satisfaction": {
+        "quality": 1.0, "works": 1.0, "love": 1.0, "great": 1.0, "good": 1.0,
+        "excellent": 1.0, "perfect": 1.0, "comfortable": 1.0, "material": 1.0,
+        "fit": 1.0, "size": 1.0, "value": 1.0, "worth": 1.0, "sound": 1.0, "battery": 1.0,
+    },
+    "product defect or damaged item": {
+        "broke": 1.0, "broken": 1.0, "damaged": 1.0, "defective": 1.0, "faulty": 1.0,
+        "cracked": 1.0, "stopped": 1.0, "missing": 1.0, "leak": 1.0, "poor": 1.0,
+        "stopped working": 1.0, "fell apart": 1.0, "missing parts": 1.0,
+    },
+    "delivery issue or shipping delay": {
+        "delivery": 1.0, "shipping": 1.0, "shipped": 1.0, "arrived": 1.0, "late": 1.0,
+        "package": 1.0, "delayed": 1.0, "tracking": 1.0, "courier": 1.0, "slow": 1.0,
+        "never arrived": 2.0, "wrong item": 1.0,
+    },
+    "customer service or support": {
+        "seller": 1.0, "refund": 1.0, "return": 1.0, "service": 1.0, "support": 1.0,
+        "customer": 1.0, "replacement": 1.0, "warranty": 1.0, "contact": 1.0, "response": 1.0,
+        "customer service": 1.0, "no response": 1.0,
+    },
+}
+DEFAULT_CATEGORY = "product quality or satisfaction"
+
+# Tous les lexiques, évalués ensemble par un seul automate
+LEXICONS = {"positive": POSITIVE_KEYWORDS, "negative": NEGATIVE_KEYWORDS, **CATEGORY_KEYWORDS}
+
+# Ordre des colonnes de la table Snowflake REVIEW_RELEVANT
+RELEVANT_COLUMNS = [
+    "review_id", "buyer_id", "p_id", "product_name", "category",
+    "title", "description", "rating", "text_length", "has_image", "has_orders",
+    "text_length_score", "is_extreme_rating", "keyword_score", "relevance_score",
+    "category_review", "confidence_score", "review_img", "relevant_status",
+]
+
+
+def load_weights(weights: dict = None) -> dict:
+    """
+    Weights of the relevance score: defaults < RELEVANCE_WEIGHTS (JSON) < `weights`.
+
+    Raises:
+        ValueError: unknown component or weights not summing to 1
+    """
+    merged = dict(DEFAULT_WEIGHTS)
+    merged.update(json.loads(os.getenv("RELEVANCE_WEIGHTS", "{}")))
+    merged.update(weights or {})
+
+    unknown = set(merged) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown relevance components: {sorted(unknown)}")
+    if not np.isclose(sum(merged.values()), 1.0):
+        raise ValueError(f"Relevance weights must sum to 1 (got {sum(merged.values()):.3f})")
+    return merged
+
+
+# ========================================
+# COMPONENTS
+# ========================================
+
+def text_length_score(text_length: pd.Series) -> pd.Series:
+    """Gaussian score in [0, 1], 1 at TEXT_LENGTH_OPTIMAL characters."""
+    length = text_length.fillna(0).to_numpy(dtype="float64")
+    score = np.exp(-((length - TEXT_LENGTH_OPTIMAL) ** 2) / (2 * TEXT_LENGTH_SIGMA ** 2))
+    return pd.Series(score, index=text_length.index)
+
+
+def is_extreme_rating(rating: pd.Series) -> pd.Series:
+    """True for 1 and 5 star ratings."""
+    return rating.isin([1, 5])
+
+
+def lexicon_hits(descriptions: pd.Series) -> pd.DataFrame:
+    """
+    Weighted keyword hits of every lexicon (LEXICONS), in a single pass over the texts.
+
+    The lexicons are compiled once into an Aho-Corasick automaton
+    (utils/keyword_matcher.py) that scans each description one time.
+
+    Args:
+        descriptions: Review texts (NaN allowed)
+
+    Returns:
+        DataFrame (one column per lexicon) aligned on descriptions.index
+    """
+    return get_matcher(LEXICONS).hits_frame(descriptions)
+
+
+def keyword_score(descriptions: pd.Series, hits: pd.DataFrame = None) -> pd.Series:
+    """
+    Lexical sentiment normalised to [0, 1] like the notebook's (compound + 1) / 2.
+
+    Neutral texts score 0.5, missing descriptions 0.0.
+    """
+    if hits is None:
+        hits = lexicon_hits(descriptions)
+    balance = (hits["positive"] - hits["negative"]).to_numpy()
+    compound = balance / np.sqrt(balance ** 2 + SENTIMENT_ALPHA)
+    score = (compound + 1) / 2
+    return pd.Series(np.where(descriptions.isna().to_numpy(), 0.0, score), index=descriptions.index)
+
+
+def categorize(descriptions: pd.Series, hits: pd.DataFrame = None) -> tuple:
+    """
+    Theme of each review and confidence in percent.
+
+    The theme with the most weighted keyword hits wins (ties: CATEGORY_KEYWORDS
+    order); confidence is its share of all theme hits. Without any hit the
+    review falls back to DEFAULT_CATEGORY with a uniform 100 / n_themes.
+
+    Returns:
+        (category Series, confidence Series)
+    """
+    if hits is None:
+        hits = lexicon_hits(descriptions)
+    labels = list(CATEGORY_KEYWORDS)
+    theme_hits = hits[labels].to_numpy()
+    total = theme_hits.sum(axis=1)
+    best = theme_hits.argmax(axis=1)
+
+    has_hits = total > 0
+    confidence = np.full(len(descriptions), 100.0 / len(labels))
+    confidence[has_hits] = 100.0 * theme_hits[has_hits, best[has_hits]] / total[has_hits]
+    category = np.where(has_hits, np.asarray(labels, dtype=object)[best], DEFAULT_CATEGORY)
+
+    return (pd.Series(category, index=descriptions.index),
+            pd.Series(confidence, index=descriptions.index))
+
+
+# ========================================
+# SCORING STAGE
+# ========================================
+
+def score_reviews(df: pd.DataFrame, weights: dict = None, relevance_threshold: float = None,
+                  confidence_threshold: float = None) -> pd.DataFrame:
+    """
+    Add the REVIEW_RELEVANT score columns to clean reviews.
+
+    Args:
+        df: Output of clean_and_validate
+        weights: Overrides of DEFAULT_WEIGHTS (see load_weights)
+        relevance_threshold: Minimum RELEVANCE_SCORE of a RELEVANT review
+        confidence_threshold: Minimum CONFIDENCE_SCORE of a RELEVANT review
+
+    Returns:
+        DataFrame with RELEVANT_COLUMNS
+    """
+    weights = load_weights(weights)
+    if relevance_threshold is None:
+        relevance_threshold = float(os.getenv("RELEVANCE_THRESHOLD", DEFAULT_RELEVANCE_THRESHOLD))
+    if confidence_threshold is None:
+        confidence_threshold = float(os.getenv("CONFIDENCE_THRESHOLD", DEFAULT_CONFIDENCE_THRESHOLD))
+
+    logger.info("Scoring review relevance...")
+    scored = df.copy()
+
+    scored["text_length_score"] = text_length_score(scored["text_length"])
+    scored["is_extreme_rating"] = is_extreme_rating(scored["rating"])
+    # Un seul passage sur les textes pour le sentiment et les thèmes
+    hits = lexicon_hits(scored["description"])
+    scored["keyword_score"] = keyword_score(scored["description"], hits)
+    scored["category_review"], scored["confidence_score"] = categorize(scored["description"], hits)
+
+    scored["relevance_score"] = 100 * (
+        weights["text_length"] * scored["text_length_score"]
+        + weights["has_image"] * scored["has_image"].astype("float64")
+        + weights["has_orders"] * scored["has_orders"].astype("float64")
+        + weights["is_extreme_rating"] * scored["is_extreme_rating"].astype("float64")
+        + weights["keyword"] * scored["keyword_score"]
+    )
+
+    relevant = ((scored["confidence_score"] >= confidence_threshold)
+                & (scored["relevance_score"] >= relevance_threshold))
+    scored["relevant_status"] = np.where(relevant, "RELEVANT", "IRRELEVANT")
+
+    logger.info(f"  [OK] Scored {len(scored):,} reviews ({int(relevant.sum()):,} relevant)")
+    return scored[RELEVANT_COLUMNS]
+
+
+def prepare_relevant_rows(df: pd.DataFrame) -> list:
+    """Tuples for the REVIEW_RELEVANT INSERT (RELEVANT_COLUMNS order, NaN -> None)."""
+    rows = df[RELEVANT_COLUMNS].astype(object)
+    rows = rows.where(rows.notna(), None)
+    return list(rows.itertuples(index=False, name=None))
@@ -5,14 +5,14 @@ Unified script that:
 1. Loads raw data from S3
 2. Joins tables using SQL
 3. Cleans data and detects rejections
-4. Stores clean data in Snowflake
-5. Stores rejected data in MongoDB
+4. Scores review relevance
+5. Stores clean and scored data in Snowflake
+6. Stores rejected data in MongoDB
 """
 
 import pandas as pd
 import boto3
 from io import StringIO
-from pandasql import sqldf
 from datetime import datetime
 import os
 import sys
@@ -21,13 +21,22 @@ from dotenv import load_dotenv
 from pymongo import MongoClient
 import snowflake.connector
 
-from airflow import DAG
-from airflow.operators.python import PythonOperator
-from airflow.providers.postgres.hooks.postgres import PostgresHook
-from airflow.providers.amazon.aws.hooks.s3 import S3Hook
-from airflow.hooks.base import BaseHook
+# Airflow est optionnel : sans lui, ReviewProcessor tourne avec des backends
+# locaux (utils/storage_backends.py), p. ex. pour profiler un run hors ligne
+try:
+    from airflow.providers.amazon.aws.hooks.s3 import S3Hook
+    from airflow.hooks.base import BaseHook
+except ImportError:
+    S3Hook = BaseHook = None
 
 from utils.mongo_handler import MongoHandler
+from utils.kpi_materializer import materialize_kpi_tables
+from utils import review_transforms
+from utils.relevance_scoring import score_reviews, prepare_relevant_rows
+from utils.partitioned_transform import TRANSFORM_PARTITIONS, hash_partition, transform_partitioned
+from utils.instrumentation import PipelineMetrics
+from utils.dtype_policy import read_csv_compact
+from utils.rejection_writer import ensure_rejection_index, upsert_rejections
 
 # Load environment variables
 load_dotenv()
@@ -40,49 +49,102 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# get Airflow connection "mongodb"
-logger.info("Starting MongoDB logging handler setup...")
-conn = BaseHook.get_connection("mongo")
+mongo_handler = None
+
+if BaseHook is not None:
+    # get Airflow connection "mongodb"
+    logger.info("Starting MongoDB logging handler setup...")
+    conn = BaseHook.get_connection("mongo")
+
+    # Get l'URI
+    mongo_uri = conn.get_uri()
+    logger.info(f"Using Mongo URI: {mongo_uri}")
+
+    # Add MongoDB handler to logger
+    mongo_handler = MongoHandler(
+        uri=mongo_uri,
+        db_name="airflow_logs",
+        collection="transform_load_logs"
+    )
+
+    mongo_handler.setLevel(logging.INFO)
+
+    # Avoid duplicate logs
+    if not any(isinstance(h, MongoHandler) for h in logger.handlers):
+        logger.addHandler(mongo_handler)
+
+# INSERT des lignes clean (save_to_snowflake ; table de staging de save_partition_to_snowflake)
+REVIEWS_INSERT_INTO = """
+INSERT INTO {table} (
+    review_id, buyer_id, p_id, product_name, category,
+    title, description, rating, text_length, has_image, has_orders,
+    review_img, ingestion_timestamp, pipeline_version
+) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+REVIEWS_INSERT = REVIEWS_INSERT_INTO.format(table="reviews")
 
-# Get l'URI
-mongo_uri = conn.get_uri()
-logger.info(f"Using Mongo URI: {mongo_uri}")
+# Partitions du chargement Snowflake en tâches mappées (DAG transform_load_data)
+SNOWFLAKE_LOAD_PARTITIONS = int(os.getenv("SNOWFLAKE_LOAD_PARTITIONS", "4"))
+SNOWFLAKE_ROWS_PER_PARTITION = int(os.getenv("SNOWFLAKE_ROWS_PER_PARTITION", "50000"))
 
-# Add MongoDB handler to logger
-mongo_handler = MongoHandler(
-    uri=mongo_uri,
-    db_name="airflow_logs",
-    collection="transform_load_logs"
-)
 
-mongo_handler.setLevel(logging.INFO)
+def plan_load_partitions(n_rows: int, max_partitions: int = None, rows_per_partition: int = None) -> int:
+    """Number of Snowflake load partitions: one per rows_per_partition rows, at most max_partitions."""
+    max_partitions = max_partitions or SNOWFLAKE_LOAD_PARTITIONS
+    rows_per_partition = rows_per_partition or SNOWFLAKE_ROWS_PER_PARTITION
+    return max(1, min(max_partitions, -(-n_rows // rows_per_partition)))
 
-# Avoid duplicate logs
-if not any(isinstance(h, MongoHandler) for h in logger.handlers):
-    logger.addHandler(mongo_handler)
+
+def split_load_partitions(df: pd.DataFrame, n_partitions: int) -> list:
+    """Split the clean data into n_partitions hash partitions of review_id (save_partition_to_snowflake)."""
+    if not len(df):
+        return [df] * n_partitions
+    ids = hash_partition(df["review_id"], n_partitions)
+    return [df[ids == partition] for partition in range(n_partitions)]
 
 
 class ReviewProcessor:
     """Processes reviews from S3 to Snowflake and MongoDB."""
 
-    def __init__(self, aws_conn_id, snowflake_conn_id, mongo_conn_id="mongo"):
-        """Initialize connections."""
-        # S3 connection
-        self.s3_hook = S3Hook(aws_conn_id=aws_conn_id)
-        logger.info(f"DEBUG -> S3 hook initialized: {self.s3_hook}")
-        if not self.s3_hook:
-            logger.error("DEBUG -> S3 hook initialization failed!")
-            raise ValueError("DEBUG -> S3 hook initialization failed!")
+    def __init__(self, aws_conn_id=None, snowflake_conn_id=None, mongo_conn_id="mongo", run_id=None,
+                 backends=None, partitions=None, partition_key=None):
+        """
+        Initialize connections.
+
+        Args:
+            aws_conn_id / snowflake_conn_id / mongo_conn_id: Airflow connection ids
+            run_id: Pipeline run the stage metrics belong to
+            backends: StorageBackends (utils/storage_backends.py) replacing the
+                      Airflow connections, e.g. local_backends() for offline runs
+            partitions: > 1 runs join + clean on that many hash partitions in a
+                        process pool (default: TRANSFORM_PARTITIONS, i.e. 1)
+            partition_key: "review_id" (default) or "p_id"
+        """
+        self.backends = backends
         self.s3_client = None
-        # MongoDB connection
-        self.mongo_conn_hook = BaseHook.get_connection(mongo_conn_id)
-        self.mongo_ = None
-        # Snowflake connection
-        self.snowflake_conn_hook = BaseHook.get_connection(snowflake_conn_id)
+        self.mongo_conn = None
         self.snowflake_conn = None
+
+        if backends is None:
+            if S3Hook is None:
+                raise ImportError("Airflow is not installed: pass backends=local_backends(...) to run offline")
+            # S3 connection
+            self.s3_hook = S3Hook(aws_conn_id=aws_conn_id)
+            logger.info(f"DEBUG -> S3 hook initialized: {self.s3_hook}")
+            if not self.s3_hook:
+                logger.error("DEBUG -> S3 hook initialization failed!")
+                raise ValueError("DEBUG -> S3 hook initialization failed!")
+            # MongoDB connection
+            self.mongo_conn_hook = BaseHook.get_connection(mongo_conn_id)
+            # Snowflake connection
+            self.snowflake_conn_hook = BaseHook.get_connection(snowflake_conn_id)
         
+        self.partitions = partitions or TRANSFORM_PARTITIONS
+        self.partition_key = partition_key or os.getenv("TRANSFORM_PARTITION_KEY", "review_id")
+
         self.pipeline_version = "1.0.0"
-        self.run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.metrics = PipelineMetrics(self.run_id)
 
     # ========================================
     # S3: Load Data
@@ -106,12 +168,13 @@ class ReviewProcessor:
         logger.info("S3 client initialized successfully.")
 
 
-    def load_table_from_s3(self, s3_uri: str) -> pd.DataFrame:
+    def load_table_from_s3(self, s3_uri: str, table_name: str = None) -> pd.DataFrame:
         """
         Load a table from S3.
 
         Args:
             s3_uri: S3 URI (e.g., s3://bucket/raw/product/product.csv)
+            table_name: Table whose compact dtypes apply (utils/dtype_policy.py)
 
         Returns:
             DataFrame
@@ -124,6 +187,13 @@ class ReviewProcessor:
         key = parts[1]
         logger.info(f"DEBUG ---> Loading from S3 bucket: {bucket}, key: {key}")
 
+        if self.backends is not None:
+            file_content = self.backends.object_store.read_text(s3_uri)
+            self.metrics.add_bytes_read(len(file_content.encode('utf-8')))
+            df = read_csv_compact(StringIO(file_content), table_name)
+            logger.info(f"  [OK] Loaded {len(df):,} rows from {s3_uri}")
+            return df
+
         # Use boto3 directly with credentials from Airflow Variables to avoid URL encoding issues
         import boto3
         from airflow.models import Variable
@@ -146,8 +216,9 @@ class ReviewProcessor:
             logger.info("Falling back to S3Hook")
             file_content = self.s3_hook.read_key(key=key, bucket_name=bucket)
 
+        self.metrics.add_bytes_read(len(file_content.encode('utf-8')))
         csv_buffer = StringIO(file_content)
-        df = pd.read_csv(csv_buffer)
+        df = read_csv_compact(csv_buffer, table_name)
         logger.info(f"  [OK] Loaded {len(df):,} rows from {s3_uri}")
         return df
 
@@ -164,14 +235,18 @@ class ReviewProcessor:
         logger.info("Loading tables from S3...")
         tables = {}
 
-        for table_name, s3_uri in s3_paths.items():
-            try:
-                df = self.load_table_from_s3(s3_uri)
-                tables[table_name] = df
-                logger.info(f"  [OK] {table_name}: {len(df):,} rows")
-            except Exception as e:
-                logger.error(f"  [FAIL] {table_name}: {e}")
-                tables[table_name] = None  # Mark as failed but continue
+        with self.metrics.stage("s3_load") as stage:
+            for table_name, s3_uri in s3_paths.items():
+                try:
+                    df = self.load_table_from_s3(s3_uri, table_name)
+                    tables[table_name] = df
+                    logger.info(f"  [OK] {table_name}: {len(df):,} rows")
+                except Exception as e:
+                    logger.error(f"  [FAIL] {table_name}: {e}")
+                    tables[table_name] = None  # Mark as failed but continue
+
+            stage.rows_out = sum(len(df) for df in tables.values() if df is not None)
+            stage.extra["failed_tables"] = [name for name, df in tables.items() if df is None]
 
         return tables
 
@@ -190,65 +265,10 @@ class ReviewProcessor:
         Returns:
             Joined DataFrame
         """
-        logger.info("Joining tables using SQL...")
-
-        # Extract tables
-        product = tables['product']
-        category = tables.get('category', pd.DataFrame())
-        review = tables['review']
-        product_reviews = tables['product_reviews']
-        review_images = tables.get('review_images', pd.DataFrame())
-        orders = tables.get('orders', pd.DataFrame())
-
-        # Build WHERE clause
-        where_clause = f"WHERE pr.p_id = '{product_id}'" if product_id else ""
-
-        # SQL query
-        query = f"""
-        WITH first_image_per_review AS (
-            SELECT
-                review_id,
-                review_img,
-                ROW_NUMBER() OVER (PARTITION BY review_id ORDER BY review_img) AS rn
-            FROM review_images
-        ),
-        orders_per_buyer AS (
-            SELECT
-                buyer_id,
-                COUNT(*) AS order_count
-            FROM orders
-            GROUP BY buyer_id
-        )
-        SELECT
-            r.buyer_id,
-            r.review_id,
-            r.title,
-            r.r_desc AS description,
-            r.rating,
-            fi.review_img,  -- une seule image par review
-            LENGTH(r.r_desc) AS text_length,
-            CASE WHEN fi.review_img IS NOT NULL THEN 1 ELSE 0 END AS has_image,
-            CASE WHEN opb.order_count IS NOT NULL THEN 1 ELSE 0 END AS has_orders,
-            p.p_id,
-            p.p_name AS product_name,
-            c.name AS category
-        FROM review r
-        LEFT JOIN first_image_per_review fi
-            ON r.review_id = fi.review_id AND fi.rn = 1
-        LEFT JOIN product_reviews pr
-            ON r.review_id = pr.review_id
-        LEFT JOIN product p
-            ON pr.p_id = p.p_id
-        LEFT JOIN category c
-            ON p.category_id = c.category_id
-        LEFT JOIN orders_per_buyer opb
-            ON r.buyer_id = opb.buyer_id
-        {where_clause};  
-        """
-        
-        df = sqldf(query, locals())
-        logger.info(f"  [OK] Joined {len(df):,} rows")
-
+        rows_in = sum(len(df) for df in tables.values() if df is not None)
+        with self.metrics.stage("join", rows_in=rows_in) as stage:
+            df = review_transforms.join_tables(tables, product_id)
+            stage.rows_out = len(df)
         return df
 
     def clean_and_validate(self, df: pd.DataFrame) -> tuple:
@@ -261,93 +281,54 @@ class ReviewProcessor:
         Returns:
             Tuple of (df_clean, df_rejected)
         """
-        logger.info("Cleaning and validating data...")
-
-        df_clean = df.copy()
-        rejected_records = []
-
-        # 1. Remove duplicates based on review_id
-        initial_count = len(df_clean)
-        duplicates = df_clean[df_clean.duplicated(subset=['review_id'], keep='first')]
-
-        for _, dup in duplicates.iterrows():
-            rejected_records.append({
-                'review_id': dup['review_id'],
-                'rejection_reason': 'duplicate_review_id',
-                'rejected_at': datetime.now(),
-                'original_data': dup.to_dict(),
-                'error_details': 'Duplicate review_id found'
-            })
-
-        df_clean = df_clean.drop_duplicates(subset=['review_id'], keep='first')
-        logger.info(f"  [OK] Removed {initial_count - len(df_clean)} duplicates")
-
-        # 2. Check for missing required fields
-        required_fields = ['review_id', 'rating']
-        missing_mask = df_clean[required_fields].isnull().any(axis=1)
-        missing_records = df_clean[missing_mask]
-
-        for _, rec in missing_records.iterrows():
-            rejected_records.append({
-                'review_id': rec.get('review_id', 'UNKNOWN'),
-                'rejection_reason': 'missing_required_fields',
-                'rejected_at': datetime.now(),
-                'original_data': rec.to_dict(),
-                'error_details': f"Missing required fields: {', '.join([f for f in required_fields if pd.isna(rec.get(f))])}"
-            })
+        with self.metrics.stage("clean", rows_in=len(df)) as stage:
+            df_clean, df_rejected = review_transforms.clean_and_validate(df)
+            stage.rows_out = len(df_clean)
+            stage.extra["rows_rejected"] = len(df_rejected)
+        return df_clean, df_rejected
 
-        df_clean = df_clean[~missing_mask]
-        logger.info(f"  [OK] Removed {len(missing_records)} records with missing required fields")
+    def score_relevance(self, df_clean: pd.DataFrame, weights: dict = None) -> pd.DataFrame:
+        """
+        Compute the REVIEW_RELEVANT scores of clean reviews.
 
-        # 3. Validate rating (1-5)
-        invalid_rating = df_clean[(df_clean['rating'] < 1) | (df_clean['rating'] > 5)]
+        Args:
+            df_clean: Clean DataFrame
+            weights: Optional overrides of the relevance weights
 
-        for _, rec in invalid_rating.iterrows():
-            rejected_records.append({
-                'review_id': rec['review_id'],
-                'rejection_reason': 'invalid_rating',
-                'rejected_at': datetime.now(),
-                'original_data': rec.to_dict(),
-                'error_details': f"Invalid rating: {rec['rating']}"
-            })
+        Returns:
+            Scored DataFrame (RELEVANT_COLUMNS)
+        """
+        with self.metrics.stage("score", rows_in=len(df_clean)) as stage:
+            df_scored = score_reviews(df_clean, weights=weights)
+            stage.rows_out = len(df_scored)
+            stage.extra["rows_relevant"] = int((df_scored["relevant_status"] == "RELEVANT").sum())
+        return df_scored
 
-        df_clean = df_clean[(df_clean['rating'] >= 1) & (df_clean['rating'] <= 5)]
-        logger.info(f"  [OK] Removed {len(invalid_rating)} records with invalid rating")
+    def join_and_clean_partitioned(self, tables: dict, product_id: str = None) -> tuple:
+        """
+        Join and clean on hash partitions in a process pool (same output as
+        join_tables + clean_and_validate, sorted by review_id).
 
-        empty_description = df_clean['description'].isnull() | (df_clean['description'].str.strip().str.len() == 0)
-        empty_description_records = df_clean[empty_description]
+        Args:
+            tables: Dict of DataFrames
+            product_id: Optional product filter
 
-        for _, rec in empty_description_records.iterrows():
-            rejected_records.append({
-                'review_id': rec.get('review_id', 'UNKNOWN'),
-                'rejection_reason': 'empty_description',
-                'rejected_at': datetime.now(),
-                'original_data': rec.to_dict(),
-                'error_details': 'Description is empty or null'
+        Returns:
+            Tuple of (df_clean, df_rejected, joined_rows)
+        """
+        rows_in = sum(len(df) for df in tables.values() if df is not None)
+        with self.metrics.stage("transform_partitioned", rows_in=rows_in) as stage:
+            df_clean, df_rejected, joined_rows = transform_partitioned(
+                tables, n_partitions=self.partitions, key=self.partition_key, product_id=product_id
+            )
+            stage.rows_out = len(df_clean)
+            stage.extra.update({
+                "partitions": self.partitions,
+                "partition_key": self.partition_key,
+                "rows_joined": joined_rows,
+                "rows_rejected": len(df_rejected),
             })
-
-        df_clean = df_clean[~empty_description]
-        logger.info(f"  [OK] Removed {len(empty_description_records)} records with empty/null description")
-
-        # 4. Fill missing values
-        df_clean['title'] = df_clean['title'].fillna('')
-        df_clean['description'] = df_clean['description'].fillna('')
-        df_clean['category'] = df_clean['category'].fillna('Unknown')
-        df_clean['text_length'] = df_clean['text_length'].fillna(0).astype(int)
-        df_clean['has_image'] = df_clean['has_image'].fillna(0).astype(bool)
-        df_clean['has_orders'] = df_clean['has_orders'].fillna(0).astype(bool)
-        # review_img: Keep NaN values as-is, they're handled properly in save_to_snowflake()
-
-        logger.info(f"  [OK] Final clean dataset: {len(df_clean):,} rows")
-        logger.info(f"  [OK] Total rejected: {len(rejected_records)} records")
-
-        df_rejected = pd.DataFrame(rejected_records) if rejected_records else pd.DataFrame()
-
-        # 6. Convert datetime fields to strings because Airflow XCom has issues with datetime objects
-        if 'rejected_at' in df_rejected.columns:
-            df_rejected['rejected_at'] = df_rejected['rejected_at'].astype(str)
-
-        return df_clean, df_rejected
+        return df_clean, df_rejected, joined_rows
 
     # ========================================
     # STORAGE: Snowflake
@@ -355,6 +336,10 @@ class ReviewProcessor:
 
     def _init_snowflake(self):
         #Initialize Snowflake connection from Airflow conn.
+        if self.backends is not None:
+            self.snowflake_conn = self.backends.connect_warehouse()
+            return
+
         conn = self.snowflake_conn_hook
         # Get schema and database 
         schema_raw = conn.extra_dejson.get("schema") or conn.schema or "" # "DB_AMZ/REVIEW"
@@ -389,76 +374,151 @@ class ReviewProcessor:
             Number of rows inserted
         """
 
-        if not self.snowflake_conn:
-            self._init_snowflake()
+        with self.metrics.stage("snowflake_load", rows_in=len(df)) as stage:
+            if not self.snowflake_conn:
+                self._init_snowflake()
 
 
-        logger.info("Saving to Snowflake...")
-        logger.info("Debug Snowflake connection:" + str(self.snowflake_conn))
+            logger.info("Saving to Snowflake...")
+            logger.info("Debug Snowflake connection:" + str(self.snowflake_conn))
 
-        cursor = self.snowflake_conn.cursor()
+            cursor = self.snowflake_conn.cursor()
 
-        # TRUNCATE table to avoid duplicates (anonymization creates different hashes each run)
-        logger.info("Truncating existing data in Snowflake reviews table...")
-        cursor.execute("TRUNCATE TABLE reviews")
-        logger.info("  [OK] Table truncated")
+            # TRUNCATE table to avoid duplicates (anonymization creates different hashes each run)
+            logger.info("Truncating existing data in Snowflake reviews table...")
+            cursor.execute("TRUNCATE TABLE reviews")
+            logger.info("  [OK] Table truncated")
+
+            # TRUNCATE table to remove all existing data (full refresh)
+            logger.info("Truncating reviews table...")
+            cursor.execute("TRUNCATE TABLE reviews")
+            logger.info("  [OK] Table truncated")
 
-        # Prepare data
-        df_to_insert = df.copy()
-        df_to_insert['ingestion_timestamp'] = datetime.now()
-        df_to_insert['pipeline_version'] = self.pipeline_version
+            # Convert to list of tuples for executemany
+            rows = review_transforms.prepare_snowflake_rows(df, self.pipeline_version)
 
-        # Convert boolean to int for Snowflake
-        df_to_insert['has_image'] = df_to_insert['has_image'].astype(int)
-        df_to_insert['has_orders'] = df_to_insert['has_orders'].astype(int)
+            # Execute batch insert (much faster than individual inserts)
+            cursor.executemany(REVIEWS_INSERT, rows)
+            cursor.close()
+
+            logger.info(f"  [OK] Inserted {len(rows):,} rows to Snowflake (full refresh)")
+
+            stage.rows_out = len(rows)
+            return len(rows)
+
+    def truncate_reviews(self):
+        """Empty the reviews table before a partitioned load (full refresh)."""
+        if not self.snowflake_conn:
+            self._init_snowflake()
 
-        # TRUNCATE table to remove all existing data (full refresh)
         logger.info("Truncating reviews table...")
+        cursor = self.snowflake_conn.cursor()
         cursor.execute("TRUNCATE TABLE reviews")
+        cursor.close()
         logger.info("  [OK] Table truncated")
 
-        # INSERT all rows in batch
-        insert_query = """
-        INSERT INTO reviews (
-            review_id, buyer_id, p_id, product_name, category,
-            title, description, rating, text_length, has_image, has_orders,
-            review_img, ingestion_timestamp, pipeline_version
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    def save_partition_to_snowflake(self, part: pd.DataFrame, partition: int, n_partitions: int) -> int:
         """
+        Load one hash partition (review_id) of the clean data into reviews.
 
-        # Convert to list of tuples for executemany
-        rows = []
-        for record in df_to_insert.to_dict('records'):
-            # Handle NaN values properly
-            buyer_id = record['buyer_id'] if pd.notna(record['buyer_id']) else None
-            p_id = record['p_id'] if pd.notna(record['p_id']) else None
-            product_name = record['product_name'] if pd.notna(record['product_name']) else None
-            review_img = record['review_img'] if pd.notna(record['review_img']) else None
-
-            rows.append((
-                record['review_id'],
-                buyer_id,
-                p_id,
-                product_name,
-                record['category'],
-                record['title'],
-                record['description'],
-                int(record['rating']),
-                int(record['text_length']),
-                bool(record['has_image']),
-                bool(record['has_orders']),
-                review_img,
-                record['ingestion_timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
-                record['pipeline_version']
-            ))
-
-        # Execute batch insert (much faster than individual inserts)
-        cursor.executemany(insert_query, rows)
-        cursor.close()
+        The rows are first written to a temporary staging table, then the
+        partition replaces its review_ids in reviews (DELETE + INSERT) in a
+        single transaction. Loading the same partition twice, e.g. when the
+        task is retried after the COMMIT, leaves one copy of each row.
+
+        Args:
+            part: Rows of this partition (split_load_partitions)
+            partition: Partition number, 0 <= partition < n_partitions
+            n_partitions: Number of partitions
+
+        Returns:
+            Number of rows loaded
+        """
+        staging = f"reviews_load_{partition}"
 
-        logger.info(f"  [OK] Inserted {len(rows):,} rows to Snowflake (full refresh)")
+        with self.metrics.stage(f"snowflake_load_{partition}", rows_in=len(part)) as stage:
+            if not self.snowflake_conn:
+                self._init_snowflake()
 
-        return len(rows)
+            rows = review_transforms.prepare_snowflake_rows(part, self.pipeline_version)
+            cursor = self.snowflake_conn.cursor()
+            try:
+                # DDL hors transaction : Snowflake valide implicitement un CREATE
+                cursor.execute(f"CREATE OR REPLACE TEMPORARY TABLE {staging} AS SELECT * FROM reviews WHERE 1 = 0")
+                if rows:
+                    cursor.executemany(REVIEWS_INSERT_INTO.format(table=staging), rows)
+
+                cursor.execute("BEGIN")
+                try:
+                    cursor.execute(f"DELETE FROM reviews WHERE review_id IN (SELECT review_id FROM {staging})")
+                    cursor.execute(f"INSERT INTO reviews SELECT * FROM {staging}")
+                    cursor.execute("COMMIT")
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
+                cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            finally:
+                cursor.close()
+
+            logger.info(f"  [OK] Partition {partition + 1}/{n_partitions}: loaded {len(rows):,} rows")
+            stage.rows_out = len(rows)
+            stage.extra["partitions"] = n_partitions
+            return len(rows)
+
+    def save_relevant_to_snowflake(self, df_scored: pd.DataFrame) -> int:
+        """
+        Save scored reviews to REVIEW_RELEVANT (full refresh, like reviews).
+
+        Args:
+            df_scored: Output of score_relevance
+
+        Returns:
+            Number of rows inserted
+        """
+        with self.metrics.stage("relevant_load", rows_in=len(df_scored)) as stage:
+            if not self.snowflake_conn:
+                self._init_snowflake()
+
+            logger.info("Saving scored reviews to Snowflake...")
+            cursor = self.snowflake_conn.cursor()
+
+            logger.info("Truncating review_relevant table...")
+            cursor.execute("TRUNCATE TABLE review_relevant")
+            logger.info("  [OK] Table truncated")
+
+            insert_query = """
+            INSERT INTO review_relevant (
+                review_id, buyer_id, p_id, product_name, category,
+                title, description, rating, text_length, has_image, has_orders,
+                text_length_score, is_extreme_rating, keyword_score, relevance_score,
+                category_review, confidence_score, review_img, relevant_status
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+
+            rows = prepare_relevant_rows(df_scored)
+            cursor.executemany(insert_query, rows)
+            cursor.close()
+
+            logger.info(f"  [OK] Inserted {len(rows):,} rows to review_relevant (full refresh)")
+
+            stage.rows_out = len(rows)
+            return len(rows)
+
+    def refresh_kpi_tables(self, run_id: str = None) -> dict:
+        """
+        Recompute the dashboard KPI tables from REVIEW_RELEVANT.
+
+        Args:
+            run_id: Pipeline run identifier stored in each KPI table
+                    (defaults to this processor's run_id)
+
+        Returns:
+            Dict mapping KPI table names to row counts
+        """
+        if not self.snowflake_conn:
+            self._init_snowflake()
+
+        return materialize_kpi_tables(self.snowflake_conn, run_id or self.run_id)
 
     # ========================================
     # STORAGE: MongoDB
@@ -466,6 +526,11 @@ class ReviewProcessor:
 
     def _init_mongodb(self):
         """Initialize MongoDB connection."""
+        if self.backends is not None:
+            self.mongo_conn = self.backends.mongo_client()
+            logger.info("[OK] MongoDB connection established (local backend)")
+            return
+
         conn = self.mongo_conn_hook
         self.mongo_conn = MongoClient(conn.get_uri())
 
@@ -474,45 +539,54 @@ class ReviewProcessor:
 
     def save_rejected_to_mongodb(self, df_rejected: pd.DataFrame) -> int:
         """
-        Save rejected records to MongoDB.
+        Save rejected records to MongoDB (idempotent upserts keyed on
+        review_id + rejection_reason: a rejection seen in a previous run is
+        not inserted again).
 
         Args:
             df_rejected: DataFrame with rejected records
 
         Returns:
-            Number of documents inserted
+            Number of new rejected documents
         """
-        if df_rejected.empty:
-            logger.info("No rejected records to save")
-            return 0
+        with self.metrics.stage("mongo_load", rows_in=len(df_rejected)) as stage:
+            if df_rejected.empty:
+                logger.info("No rejected records to save")
+                stage.rows_out = 0
+                return 0
 
-         # Init client if needed
-        if not hasattr(self, "mongo_conn") or self.mongo_conn is None:
-            self._init_mongodb()
-
-        logger.info("Saving rejected records to MongoDB...")
+            # Init client if needed
+            if not hasattr(self, "mongo_conn") or self.mongo_conn is None:
+                self._init_mongodb()
 
-        db = self.mongo_conn["amazon_reviews"]
-        collection = db["rejected_reviews"]
+            logger.info("Saving rejected records to MongoDB...")
 
-        records = df_rejected.to_dict("records")
-        result = collection.insert_many(records)
+            db = self.mongo_conn["amazon_reviews"]
+            collection = db["rejected_reviews"]
 
-        count = len(result.inserted_ids)
+            try:
+                ensure_rejection_index(collection, dedupe=False)
+            except Exception as e:
+                # Doublons hérités des anciens insert_many : les upserts restent corrects
+                logger.warning(f"  [FAIL] Unique index on rejected_reviews not created ({e}); "
+                               f"run setup_mongodb to deduplicate")
+            result = upsert_rejections(collection, df_rejected.to_dict("records"))
 
-        logger.info(f"  [OK] Inserted {len(result.inserted_ids)} rejected records to MongoDB")
+            stage.rows_out = result["inserted"] + result["updated"]
+            stage.extra.update(result)
 
-        return len(result.inserted_ids)
+            return result["inserted"]
 
     def save_metadata_to_mongodb(self, stats: dict) -> int:
         """
-        Save pipeline metadata to MongoDB.
+        Save pipeline metadata to MongoDB (one document per run_id, shared
+        with the stage metrics and column profiles of the same run).
 
         Args:
             stats: Dictionary with pipeline statistics
 
         Returns:
-            Number of documents inserted
+            Number of documents upserted
         """
         # Init client if needed
         if not hasattr(self, "mongo_conn") or self.mongo_conn is None:
@@ -523,18 +597,41 @@ class ReviewProcessor:
         db = self.mongo_conn["amazon_reviews"]
         collection = db["pipeline_metadata"]
 
+        now = datetime.now()
         metadata = {
-            "run_id": self.run_id,
             "pipeline_version": self.pipeline_version,
-            "execution_timestamp": datetime.now(),
-            "statistics": stats
+            "execution_timestamp": now,
+            "statistics": stats,
+            "updated_at": now,
+            **self.metrics.to_update(),
         }
 
-        result = collection.insert_one(metadata)
+        collection.update_one(
+            {"run_id": self.run_id},
+            {"$set": metadata, "$setOnInsert": {"created_at": now}},
+            upsert=True
+        )
 
         logger.info(f"  [OK] Saved pipeline metadata to MongoDB")
 
-        return 1 if result.inserted_id else 0
+        return 1
+
+    def save_stage_metrics(self) -> int:
+        """
+        Save the stage metrics measured by this processor into the run's
+        pipeline_metadata document (called at the end of each Airflow task).
+
+        Returns:
+            Number of stages saved
+        """
+        if not self.metrics.stages:
+            return 0
+
+        # Init client if needed
+        if not hasattr(self, "mongo_conn") or self.mongo_conn is None:
+            self._init_mongodb()
+
+        return self.metrics.save(self.mongo_conn["amazon_reviews"]["pipeline_metadata"])
 
     # ========================================
     # MAIN PROCESS
@@ -557,32 +654,45 @@ class ReviewProcessor:
             logger.info("=" * 80)
 
             # Step 1: Load from S3
-            logger.info("\n[STEP 1/4] LOAD DATA FROM S3")
+            logger.info("\n[STEP 1/5] LOAD DATA FROM S3")
             tables = self.load_all_tables(s3_paths)
 
-            # Step 2: Join tables
-            logger.info("\n[STEP 2/4] JOIN TABLES")
-            df_joined = self.join_tables(tables, product_id)
+            if self.partitions > 1:
+                # Steps 2-3 on hash partitions, in parallel
+                logger.info(f"\n[STEP 2-3/5] JOIN, CLEAN & VALIDATE ({self.partitions} PARTITIONS)")
+                df_clean, df_rejected, joined_rows = self.join_and_clean_partitioned(tables, product_id)
+            else:
+                # Step 2: Join tables
+                logger.info("\n[STEP 2/5] JOIN TABLES")
+                df_joined = self.join_tables(tables, product_id)
+                joined_rows = len(df_joined)
+
+                # Step 3: Clean and validate
+                logger.info("\n[STEP 3/5] CLEAN & VALIDATE")
+                df_clean, df_rejected = self.clean_and_validate(df_joined)
 
-            # Step 3: Clean and validate
-            logger.info("\n[STEP 3/4] CLEAN & VALIDATE")
-            df_clean, df_rejected = self.clean_and_validate(df_joined)
+            # Step 4: Score relevance
+            logger.info("\n[STEP 4/5] SCORE RELEVANCE")
+            df_scored = self.score_relevance(df_clean)
 
-            # Step 4: Store
-            logger.info("\n[STEP 4/4] STORE DATA")
+            # Step 5: Store
+            logger.info("\n[STEP 5/5] STORE DATA")
 
-            # Store clean data in Snowflake
+            # Store clean and scored data in Snowflake
             snowflake_count = self.save_to_snowflake(df_clean)
+            relevant_count = self.save_relevant_to_snowflake(df_scored)
 
             # Store rejected data in MongoDB
             rejected_count = self.save_rejected_to_mongodb(df_rejected)
 
             # Store metadata
             stats = {
-                'total_records_processed': len(df_joined),
+                'total_records_processed': joined_rows,
                 'clean_records': len(df_clean),
                 'rejected_records': len(df_rejected),
                 'snowflake_inserts': snowflake_count,
+                'relevant_inserts': relevant_count,
+                'relevant_reviews': int((df_scored['relevant_status'] == 'RELEVANT').sum()),
                 'mongodb_inserts': rejected_count
             }
             self.save_metadata_to_mongodb(stats)
@@ -591,8 +701,9 @@ class ReviewProcessor:
             logger.info("\n" + "=" * 80)
             logger.info("PIPELINE COMPLETED SUCCESSFULLY")
             logger.info("=" * 80)
-            logger.info(f"Total processed: {len(df_joined):,}")
+            logger.info(f"Total processed: {joined_rows:,}")
             logger.info(f"Clean records (Snowflake): {len(df_clean):,}")
+            logger.info(f"Relevant reviews (review_relevant): {stats['relevant_reviews']:,}")
             logger.info(f"Rejected records (MongoDB): {len(df_rejected):,}")
             logger.info("=" * 80)
 
@@ -600,6 +711,11 @@ class ReviewProcessor:
 
         except Exception as e:
             logger.error(f"Pipeline failed: {e}", exc_info=True)
+            # Garder la trace des étapes mesurées jusqu'à l'échec
+            try:
+                self.save_stage_metrics()
+            except Exception as save_error:
+                logger.error(f"[FAIL] Could not save stage metrics: {save_error}")
             raise
 
     def close(self):
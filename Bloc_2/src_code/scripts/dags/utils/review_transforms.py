@@ -0,0 +1,312 @@
+"""
+Review Transforms
+=================
+Étapes pures du pipeline (sans Airflow, S3, Snowflake ni MongoDB) :
+
+- join_tables            : jointure SQL des tables brutes (pandasql)
+- clean_and_validate     : séparation lignes valides / rejetées
+  (les deux rendent les types compacts de utils/dtype_policy.py)
+- prepare_snowflake_rows : tuples prêts pour l'INSERT Snowflake
+- anonymize_buyer_ids    : hachage SHA-256 salé des buyer_id
+
+ReviewProcessor et PostgresToS3Extractor délèguent à ces fonctions, ce qui
+permet de les tester et de les mesurer (benchmarks/) hors ligne.
+"""
+import hashlib
+import logging
+from datetime import datetime
+
+import pandas as pd
+from pandasql import sqldf
+
+from utils.dtype_policy import JOINED_DTYPES, apply_dtype_policy, normalize_categories, policy_dtype
+
+logger = logging.getLogger(__name__)
+
+SNOWFLAKE_COLUMNS = [
+    "review_id", "buyer_id", "p_id", "product_name", "category",
+    "title", "description", "rating", "text_length", "has_image", "has_orders",
+    "review_img", "ingestion_timestamp", "pipeline_version",
+]
+
+JOIN_QUERY = """
+    WITH first_image_per_review AS (
+        SELECT
+            review_id,
+            review_img,
+            ROW_NUMBER() OVER (PARTITION BY review_id ORDER BY review_img) AS rn
+        FROM review_images
+    ),
+    orders_per_buyer AS (
+        SELECT
+            buyer_id,
+            COUNT(*) AS order_count
+        FROM orders
+        GROUP BY buyer_id
+    )
+    SELECT
+        r.buyer_id,
+        r.review_id,
+        r.title,
+        r.r_desc AS description,
+        r.rating,
+        fi.review_img,  -- une seule image par review
+        LENGTH(r.r_desc) AS text_length,
+        CASE WHEN fi.review_img IS NOT NULL THEN 1 ELSE 0 END AS has_image,
+        CASE WHEN opb.order_count IS NOT NULL THEN 1 ELSE 0 END AS has_orders,
+        p.p_id,
+        p.p_name AS product_name,
+        c.name AS category
+    FROM review r
+    LEFT JOIN first_image_per_review fi
+        ON r.review_id = fi.review_id AND fi.rn = 1
+    LEFT JOIN product_reviews pr
+        ON r.review_id = pr.review_id
+    LEFT JOIN product p
+        ON pr.p_id = p.p_id
+    LEFT JOIN category c
+        ON p.category_id = c.category_id
+    LEFT JOIN orders_per_buyer opb
+        ON r.buyer_id = opb.buyer_id
+    {where_clause};
+"""
+
+# Colonnes lues par JOIN_QUERY : seules celles-ci sont copiées dans SQLite
+JOIN_COLUMNS = {
+    "product": ["p_id", "p_name", "category_id"],
+    "category": ["category_id", "name"],
+    "review": ["buyer_id", "review_id", "title", "r_desc", "rating"],
+    "product_reviews": ["review_id", "p_id"],
+    "review_images": ["review_id", "review_img"],
+    "orders": ["buyer_id"],
+}
+
+
+def _join_input(tables: dict, name: str) -> pd.DataFrame:
+    """Table projected on JOIN_COLUMNS (columns absent from the table are ignored)."""
+    df = tables.get(name)
+    if df is None:
+        return pd.DataFrame(columns=JOIN_COLUMNS[name])
+    return df[[c for c in JOIN_COLUMNS[name] if c in df.columns]]
+
+
+
+# ========================================
+# JOIN & CLEAN
+# ========================================
+
+def join_tables(tables: dict, product_id: str = None) -> pd.DataFrame:
+    """
+    Join tables using SQL.
+
+    Args:
+        tables: Dict of DataFrames
+        product_id: Optional product filter
+
+    Returns:
+        Joined DataFrame
+    """
+    logger.info("Joining tables using SQL...")
+
+    # Noms de variables = noms de tables dans la requête (sqldf lit locals())
+    product = _join_input(tables, 'product')
+    category = _join_input(tables, 'category')
+    review = _join_input(tables, 'review')
+    product_reviews = _join_input(tables, 'product_reviews')
+    review_images = _join_input(tables, 'review_images')
+    orders = _join_input(tables, 'orders')
+
+    where_clause = f"WHERE pr.p_id = '{product_id}'" if product_id else ""
+
+    df = sqldf(JOIN_QUERY.format(where_clause=where_clause), locals())
+    # SQLite rend des types génériques (object / float64) : retour aux types compacts
+    df = apply_dtype_policy(df, JOINED_DTYPES)
+    logger.info(f"  [OK] Joined {len(df):,} rows")
+
+    return df
+
+
+def _original_data(row: pd.Series) -> dict:
+    """Row as a dict for MongoDB (pd.NA of the nullable dtypes -> None)."""
+    return {k: (None if v is pd.NA else v) for k, v in row.to_dict().items()}
+
+
+def clean_and_validate(df: pd.DataFrame) -> tuple:
+    """
+    Clean data and separate valid/rejected records.
+
+    Args:
+        df: Joined DataFrame
+
+    Returns:
+        Tuple of (df_clean, df_rejected)
+    """
+    logger.info("Cleaning and validating data...")
+
+    # No-op après join_tables ; retype un DataFrame reconstruit depuis un XCom
+    df_clean = apply_dtype_policy(df, JOINED_DTYPES).copy()
+    rejected_records = []
+
+    # 1. Remove duplicates based on review_id
+    initial_count = len(df_clean)
+    duplicates = df_clean[df_clean.duplicated(subset=['review_id'], keep='first')]
+
+    for _, dup in duplicates.iterrows():
+        rejected_records.append({
+            'review_id': dup['review_id'],
+            'rejection_reason': 'duplicate_review_id',
+            'rejected_at': datetime.now(),
+            'original_data': _original_data(dup),
+            'error_details': 'Duplicate review_id found'
+        })
+
+    df_clean = df_clean.drop_duplicates(subset=['review_id'], keep='first')
+    logger.info(f"  [OK] Removed {initial_count - len(df_clean)} duplicates")
+
+    # 2. Check for missing required fields
+    required_fields = ['review_id', 'rating']
+    missing_mask = df_clean[required_fields].isnull().any(axis=1)
+    missing_records = df_clean[missing_mask]
+
+    for _, rec in missing_records.iterrows():
+        rejected_records.append({
+            'review_id': rec.get('review_id', 'UNKNOWN'),
+            'rejection_reason': 'missing_required_fields',
+            'rejected_at': datetime.now(),
+            'original_data': _original_data(rec),
+            'error_details': f"Missing required fields: {', '.join([f for f in required_fields if pd.isna(rec.get(f))])}"
+        })
+
+    df_clean = df_clean[~missing_mask]
+    logger.info(f"  [OK] Removed {len(missing_records)} records with missing required fields")
+
+    # 3. Validate rating (1-5)
+    invalid_rating = df_clean[(df_clean['rating'] < 1) | (df_clean['rating'] > 5)]
+
+    for _, rec in invalid_rating.iterrows():
+        rejected_records.append({
+            'review_id': rec['review_id'],
+            'rejection_reason': 'invalid_rating',
+            'rejected_at': datetime.now(),
+            'original_data': _original_data(rec),
+            'error_details': f"Invalid rating: {rec['rating']}"
+        })
+
+    df_clean = df_clean[(df_clean['rating'] >= 1) & (df_clean['rating'] <= 5)]
+    logger.info(f"  [OK] Removed {len(invalid_rating)} records with invalid rating")
+
+    empty_description = df_clean['description'].isnull() | (df_clean['description'].str.strip().str.len() == 0)
+    empty_description_records = df_clean[empty_description]
+
+    for _, rec in empty_description_records.iterrows():
+        rejected_records.append({
+            'review_id': rec.get('review_id', 'UNKNOWN'),
+            'rejection_reason': 'empty_description',
+            'rejected_at': datetime.now(),
+            'original_data': _original_data(rec),
+            'error_details': 'Description is empty or null'
+        })
+
+    df_clean = df_clean[~empty_description]
+    logger.info(f"  [OK] Removed {len(empty_description_records)} records with empty/null description")
+
+    # 4. Fill missing values
+    df_clean['title'] = df_clean['title'].fillna('')
+    df_clean['description'] = df_clean['description'].fillna('')
+    if isinstance(df_clean['category'].dtype, pd.CategoricalDtype) \
+            and 'Unknown' not in df_clean['category'].cat.categories:
+        df_clean['category'] = df_clean['category'].cat.add_categories('Unknown')
+    df_clean['category'] = df_clean['category'].fillna('Unknown')
+    df_clean['text_length'] = df_clean['text_length'].fillna(0).astype(policy_dtype('text_length', int))
+    for flag in ('has_image', 'has_orders'):
+        missing = False if df_clean[flag].dtype == 'boolean' else 0
+        df_clean[flag] = df_clean[flag].fillna(missing).astype(policy_dtype(flag, bool))
+    # review_img: Keep NaN values as-is, they're handled properly in prepare_snowflake_rows()
+    df_clean = normalize_categories(df_clean)
+
+    logger.info(f"  [OK] Final clean dataset: {len(df_clean):,} rows")
+    logger.info(f"  [OK] Total rejected: {len(rejected_records)} records")
+
+    df_rejected = pd.DataFrame(rejected_records) if rejected_records else pd.DataFrame()
+
+    # 5. Convert datetime fields to strings because Airflow XCom has issues with datetime objects
+    if 'rejected_at' in df_rejected.columns:
+        df_rejected['rejected_at'] = df_rejected['rejected_at'].astype(str)
+
+    return df_clean, df_rejected
+
+
+# ========================================
+# SNOWFLAKE ROWS
+# ========================================
+
+def prepare_snowflake_rows(df: pd.DataFrame, pipeline_version: str,
+                           ingestion_timestamp: datetime = None) -> list:
+    """
+    Convert clean reviews to tuples for the Snowflake INSERT (SNOWFLAKE_COLUMNS order).
+
+    Args:
+        df: Clean DataFrame
+        pipeline_version: Version stored with each row
+        ingestion_timestamp: Load timestamp (defaults to now)
+
+    Returns:
+        List of tuples
+    """
+    df_to_insert = df.copy()
+    df_to_insert['ingestion_timestamp'] = ingestion_timestamp or datetime.now()
+    df_to_insert['pipeline_version'] = pipeline_version
+
+    # Convert boolean to int for Snowflake
+    df_to_insert['has_image'] = df_to_insert['has_image'].astype(int)
+    df_to_insert['has_orders'] = df_to_insert['has_orders'].astype(int)
+
+    rows = []
+    for record in df_to_insert.to_dict('records'):
+        # Handle NaN values properly
+        buyer_id = record['buyer_id'] if pd.notna(record['buyer_id']) else None
+        p_id = record['p_id'] if pd.notna(record['p_id']) else None
+        product_name = record['product_name'] if pd.notna(record['product_name']) else None
+        review_img = record['review_img'] if pd.notna(record['review_img']) else None
+
+        rows.append((
+            record['review_id'],
+            buyer_id,
+            p_id,
+            product_name,
+            record['category'],
+            record['title'],
+            record['description'],
+            int(record['rating']),
+            int(record['text_length']),
+            bool(record['has_image']),
+            bool(record['has_orders']),
+            review_img,
+            record['ingestion_timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+            record['pipeline_version']
+        ))
+
+    return rows
+
+
+# ========================================
+# ANONYMIZATION
+# ========================================
+
+def anonymize_buyer(input_string: str, salt: str) -> str:
+    """Anonymize buyer identifier using SHA-256 hashing."""
+    return hashlib.sha256((salt + input_string).encode('utf-8')).hexdigest()
+
+
+def anonymize_buyer_ids(buyer_ids: pd.Series, salt: str) -> pd.Series:
+    """
+    Anonymize a buyer_id column (values are cast to str, NaN becomes 'nan' as before).
+
+    Args:
+        buyer_ids: buyer_id column
+        salt: Hash salt
+
+    Returns:
+        Series of SHA-256 hex digests, same index
+    """
+    return buyer_ids.astype(str).apply(anonymize_buyer, salt=salt)
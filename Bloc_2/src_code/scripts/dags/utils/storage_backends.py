@@ -0,0 +1,257 @@
+"""
+Storage Backends
+================
+Couche de stockage interchangeable pour ReviewProcessor.
+
+En production (backends=None), ReviewProcessor utilise les connexions
+Airflow : S3Hook, snowflake.connector et MongoClient. Les backends locaux
+permettent d'exécuter et de profiler process() de bout en bout sans cloud :
+
+- objets S3 : LocalObjectStore (s3://bucket/key -> <root>/bucket/key)
+              ou Boto3ObjectStore(endpoint_url=...) pour MinIO
+- Snowflake : DuckDBWarehouse (tables reviews et review_relevant créées au premier usage)
+- MongoDB   : mongomock (en mémoire) ou un MongoDB local via son URI
+
+Usage:
+    backends = local_backends("data/lake", duckdb_path="data/warehouse.duckdb")
+    processor = ReviewProcessor(backends=backends)
+    processor.process(s3_paths)
+"""
+import inspect
+import logging
+import re
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+REVIEWS_DDL = """
+    CREATE TABLE IF NOT EXISTS reviews (
+        review_id INTEGER,
+        buyer_id VARCHAR,
+        p_id VARCHAR,
+        product_name VARCHAR,
+        category VARCHAR,
+        title VARCHAR,
+        description VARCHAR,
+        rating INTEGER,
+        text_length INTEGER,
+        has_image BOOLEAN,
+        has_orders BOOLEAN,
+        review_img VARCHAR,
+        ingestion_timestamp TIMESTAMP,
+        pipeline_version VARCHAR
+    )
+"""
+
+REVIEW_RELEVANT_DDL = """
+    CREATE TABLE IF NOT EXISTS review_relevant (
+        review_id INTEGER,
+        buyer_id VARCHAR,
+        p_id VARCHAR,
+        product_name VARCHAR,
+        category VARCHAR,
+        title VARCHAR,
+        description VARCHAR,
+        rating DOUBLE,
+        text_length INTEGER,
+        has_image BOOLEAN,
+        has_orders BOOLEAN,
+        text_length_score DOUBLE,
+        is_extreme_rating BOOLEAN,
+        keyword_score DOUBLE,
+        relevance_score DOUBLE,
+        category_review VARCHAR,
+        confidence_score DOUBLE,
+        review_img VARCHAR,
+        relevant_status VARCHAR
+    )
+"""
+
+
+def split_s3_uri(s3_uri: str) -> tuple:
+    """s3://bucket/path/key.csv -> (bucket, path/key.csv)"""
+    bucket, _, key = s3_uri.replace("s3://", "", 1).partition("/")
+    return bucket, key
+
+
+# ============================================================================
+# OBJECT STORES (S3)
+# ============================================================================
+
+class LocalObjectStore:
+    """Object store on the local filesystem, laid out like a MinIO data directory."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, s3_uri: str) -> Path:
+        bucket, key = split_s3_uri(s3_uri)
+        return self.root / bucket / key
+
+    def read_text(self, s3_uri: str) -> str:
+        return self.path(s3_uri).read_text(encoding="utf-8")
+
+    def write_text(self, s3_uri: str, data: str) -> str:
+        path = self.path(s3_uri)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(data, encoding="utf-8")
+        return s3_uri
+
+
+class Boto3ObjectStore:
+    """S3 or any S3-compatible endpoint (MinIO: endpoint_url="http://localhost:9000")."""
+
+    def __init__(self, endpoint_url: str = None, **client_kwargs):
+        import boto3
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, **client_kwargs)
+
+    def read_text(self, s3_uri: str) -> str:
+        bucket, key = split_s3_uri(s3_uri)
+        return self.client.get_object(Bucket=bucket, Key=key)["Body"].read().decode("utf-8")
+
+    def write_text(self, s3_uri: str, data: str) -> str:
+        bucket, key = split_s3_uri(s3_uri)
+        self.client.put_object(Bucket=bucket, Key=key, Body=data.encode("utf-8"))
+        return s3_uri
+
+
+# ============================================================================
+# WAREHOUSE (Snowflake)
+# ============================================================================
+
+_INSERT_RE = re.compile(r"INSERT\s+INTO\s+([\w.]+)\s*\(([^)]*)\)", re.IGNORECASE)
+
+
+class _DuckDBCursor:
+    """DB-API cursor accepting the %s placeholders used for snowflake.connector."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=None):
+        query = query.replace("%s", "?")
+        return self._cursor.execute(query, params) if params is not None else self._cursor.execute(query)
+
+    def executemany(self, query, rows):
+        if not rows:
+            return
+        match = _INSERT_RE.search(query)
+        if match is None:
+            self._cursor.executemany(query.replace("%s", "?"), rows)
+            return
+        # executemany DuckDB insère ligne à ligne (très lent) : un INSERT ... SELECT
+        # depuis un DataFrame garde le coût du stand-in négligeable dans les profils
+        import pandas as pd
+        table, columns = match.group(1), [c.strip() for c in match.group(2).split(",")]
+        self._cursor.register("_executemany_rows", pd.DataFrame(rows, columns=columns))
+        try:
+            column_list = ", ".join(columns)
+            self._cursor.execute(
+                f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM _executemany_rows"
+            )
+        finally:
+            self._cursor.unregister("_executemany_rows")
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class _DuckDBConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return _DuckDBCursor(self._conn.cursor())
+
+    def close(self):
+        self._conn.close()
+
+
+class DuckDBWarehouse:
+    """Local stand-in for the Snowflake target (same `reviews` and `review_relevant` tables)."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+
+    def connect(self):
+        import duckdb
+        conn = duckdb.connect(self.path)
+        conn.execute(REVIEWS_DDL)
+        conn.execute(REVIEW_RELEVANT_DDL)
+        logger.info(f"[OK] DuckDB warehouse connected ({self.path})")
+        return _DuckDBConnection(conn)
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class StorageBackends:
+    """Les trois backends utilisés par ReviewProcessor."""
+
+    def __init__(self, object_store, warehouse, mongo_client_factory):
+        self.object_store = object_store
+        self.warehouse = warehouse
+        self.mongo_client_factory = mongo_client_factory
+
+    def connect_warehouse(self):
+        return self.warehouse.connect()
+
+    def mongo_client(self):
+        return self.mongo_client_factory()
+
+
+def mongomock_client():
+    """
+    Client mongomock en mémoire.
+
+    pymongo >= 4.11 passe `sort=` aux bulk UpdateOne, que mongomock 4.x
+    n'accepte pas encore : l'argument est ignoré (les upserts par clé n'en ont pas besoin).
+    """
+    import mongomock
+    from mongomock.collection import BulkOperationBuilder
+
+    add_update = BulkOperationBuilder.add_update
+    if "sort" not in inspect.signature(add_update).parameters:
+        def add_update_compat(self, *args, sort=None, **kwargs):
+            return add_update(self, *args, **kwargs)
+        BulkOperationBuilder.add_update = add_update_compat
+
+    return mongomock.MongoClient()
+
+
+def local_backends(lake_root: str, duckdb_path: str = ":memory:", mongo_uri: str = None,
+                   s3_endpoint_url: str = None) -> StorageBackends:
+    """
+    Backends locaux pour exécuter le pipeline hors ligne.
+
+    Args:
+        lake_root: Racine du data lake local (ignorée si s3_endpoint_url est fourni)
+        duckdb_path: Fichier DuckDB (":memory:" par défaut)
+        mongo_uri: MongoDB local ; mongomock en mémoire si None
+        s3_endpoint_url: Endpoint S3-compatible (MinIO) au lieu du filesystem
+
+    Returns:
+        StorageBackends
+    """
+    object_store = Boto3ObjectStore(s3_endpoint_url) if s3_endpoint_url else LocalObjectStore(lake_root)
+
+    if mongo_uri:
+        from pymongo import MongoClient
+
+        def mongo_client_factory():
+            return MongoClient(mongo_uri)
+    else:
+        # Un seul client en mémoire : les données survivent aux appels successifs
+        shared_client = mongomock_client()
+
+        def mongo_client_factory():
+            return shared_client
+
+    return StorageBackends(object_store, DuckDBWarehouse(duckdb_path), mongo_client_factory)
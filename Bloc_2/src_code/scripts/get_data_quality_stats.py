@@ -16,6 +16,40 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 load_dotenv()
 
+# Une ligne par review_id et une ligne par rating (GROUPING SETS), puis
+# agrégation finale. by_rating = 1 pour les lignes du groupe "rating".
+# Les NULL de review_id sont exclus du total à rejeter comme dans l'ancien
+# "review_id IN (...)"/COUNT(DISTINCT review_id).
+QUALITY_PROFILE_QUERY = """
+    WITH grouped AS (
+        SELECT
+            GROUPING(review_id) AS by_rating,
+            review_id,
+            rating,
+            COUNT(*) AS n,
+            COUNT(*) FILTER (WHERE rating IS NULL) AS null_ratings,
+            COUNT(*) FILTER (WHERE rating < 1 OR rating > 5) AS invalid_ratings,
+            COUNT(*) FILTER (WHERE buyer_id IS NULL) AS null_buyers,
+            COUNT(*) FILTER (WHERE r_desc IS NULL OR TRIM(r_desc) = '') AS empty_descriptions
+        FROM review
+        GROUP BY GROUPING SETS ((review_id), (rating))
+    )
+    SELECT
+        COALESCE(SUM(n) FILTER (WHERE by_rating = 0), 0)::bigint AS total_reviews,
+        COUNT(*) FILTER (WHERE by_rating = 0 AND n > 1) AS duplicates,
+        COALESCE(SUM(null_ratings) FILTER (WHERE by_rating = 0), 0)::bigint AS null_ratings,
+        COALESCE(SUM(invalid_ratings) FILTER (WHERE by_rating = 0), 0)::bigint AS invalid_ratings,
+        COALESCE(SUM(null_buyers) FILTER (WHERE by_rating = 0), 0)::bigint AS null_buyers,
+        COALESCE(SUM(empty_descriptions) FILTER (WHERE by_rating = 0), 0)::bigint AS empty_descriptions,
+        COUNT(*) FILTER (
+            WHERE by_rating = 0
+              AND review_id IS NOT NULL
+              AND (n > 1 OR null_ratings + invalid_ratings + null_buyers + empty_descriptions > 0)
+        ) AS total_problematic,
+        jsonb_object_agg(rating, n) FILTER (WHERE by_rating = 1 AND rating IS NOT NULL) AS rating_distribution
+    FROM grouped;
+"""
+
 def get_quality_stats():
     """Obtenir les statistiques de qualité des données."""
 
@@ -27,65 +61,39 @@ def get_quality_stats():
     print("=" * 80)
     print()
 
-    # 1. Total des reviews
+    # Tous les compteurs en UNE requête / un seul scan de la table :
+    # GROUPING SETS agrège à la fois par review_id (doublons, problèmes par id)
+    # et par rating (distribution), les compteurs sont des agrégats FILTER.
     cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM review;")
-    total_reviews = cursor.fetchone()[0]
+    cursor.execute(QUALITY_PROFILE_QUERY)
+    (total_reviews, duplicates, null_ratings, invalid_ratings, null_buyers,
+     empty_descriptions, total_problematic, rating_distribution) = cursor.fetchone()
+
+    total_reviews = total_reviews or 0
+    rating_distribution = rating_distribution or {}
+
+    # 1. Total des reviews
     print(f"[Total] Reviews dans la base: {total_reviews:,}")
 
     # 2. Reviews avec doublons
-    cursor.execute("""
-        SELECT COUNT(*)
-        FROM (
-            SELECT review_id, COUNT(*) as cnt
-            FROM review
-            GROUP BY review_id
-            HAVING COUNT(*) > 1
-        ) duplicates;
-    """)
-    duplicates = cursor.fetchone()[0]
     print(f"[Doublons] Reviews avec review_id duplique: {duplicates:,}")
 
     # 3. Reviews avec rating NULL
-    cursor.execute("SELECT COUNT(*) FROM review WHERE rating IS NULL;")
-    null_ratings = cursor.fetchone()[0]
     print(f"[NULL] Reviews avec rating NULL: {null_ratings:,}")
 
     # 4. Reviews avec ratings invalides (< 1 ou > 5)
-    cursor.execute("""
-        SELECT COUNT(*)
-        FROM review
-        WHERE rating < 1 OR rating > 5;
-    """)
-    invalid_ratings = cursor.fetchone()[0]
     print(f"[Invalide] Reviews avec rating invalide (< 1 ou > 5): {invalid_ratings:,}")
 
     # 5. Reviews avec buyer_id NULL
-    cursor.execute("SELECT COUNT(*) FROM review WHERE buyer_id IS NULL;")
-    null_buyers = cursor.fetchone()[0]
     print(f"[NULL Buyer] Reviews avec buyer_id NULL: {null_buyers:,}")
 
     # 6. Reviews avec description vide ou NULL
-    cursor.execute("""
-        SELECT COUNT(*)
-        FROM review
-        WHERE r_desc IS NULL OR TRIM(r_desc) = '';
-    """)
-    empty_descriptions = cursor.fetchone()[0]
     print(f"[Desc vide] Reviews avec description vide/NULL: {empty_descriptions:,}")
 
     # 7. Distribution des ratings
     print()
     print("Distribution des ratings:")
-    cursor.execute("""
-        SELECT rating, COUNT(*) as count
-        FROM review
-        WHERE rating IS NOT NULL
-        GROUP BY rating
-        ORDER BY rating;
-    """)
-    for row in cursor.fetchall():
-        rating, count = row
+    for rating, count in sorted((int(r), c) for r, c in rating_distribution.items()):
         print(f"  Rating {rating}: {count:,}")
 
     # 8. Calcul du taux de rejet potentiel
@@ -94,26 +102,6 @@ def get_quality_stats():
     print("ANALYSE DE REJET")
     print("=" * 80)
 
-    # Total des problèmes (en comptant les duplicatas aussi)
-    cursor.execute("""
-        WITH duplicate_reviews AS (
-            SELECT review_id
-            FROM review
-            GROUP BY review_id
-            HAVING COUNT(*) > 1
-        )
-        SELECT COUNT(DISTINCT r.review_id)
-        FROM review r
-        WHERE r.review_id IN (SELECT review_id FROM duplicate_reviews)
-           OR r.rating IS NULL
-           OR r.rating < 1
-           OR r.rating > 5
-           OR r.buyer_id IS NULL
-           OR r.r_desc IS NULL
-           OR TRIM(r.r_desc) = '';
-    """)
-    total_problematic = cursor.fetchone()[0]
-
     clean_reviews = total_reviews - total_problematic
     rejection_rate = (total_problematic / total_reviews * 100) if total_reviews > 0 else 0
 
@@ -0,0 +1,227 @@
+"""
+Quality Sampling
+================
+Estimation statistique des taux de violation pour la suite de tests qualité.
+
+Deux modes :
+- "exhaustive" : les tests lisent les tables complètes (résultat exact) ;
+- "fast" : les tests lisent un échantillon aléatoire (TABLESAMPLE BERNOULLI)
+  dont la taille est dérivée de la marge d'erreur et du niveau de confiance
+  demandés, et rapportent un taux estimé avec un intervalle de Wilson.
+
+Les contrôles d'unicité et d'intégrité référentielle sont estimés en SQL :
+seules les lignes échantillonnées sont vérifiées contre la table complète,
+rien n'est rapatrié dans pandas.
+"""
+import math
+from statistics import NormalDist
+
+import pandas as pd
+
+QUALITY_MODES = ("fast", "exhaustive")
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MARGIN = 0.01
+DEFAULT_SEED = 42
+
+
+def z_score(confidence: float) -> float:
+    """Quantile normal bilatéral pour un niveau de confiance (0.95 -> 1.96)."""
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be in ]0, 1[, got {confidence}")
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def required_sample_size(margin: float = DEFAULT_MARGIN, confidence: float = DEFAULT_CONFIDENCE,
+                         expected_rate: float = 0.5) -> int:
+    """
+    Taille d'échantillon pour estimer une proportion à ±margin (formule de Cochran).
+
+    Args:
+        margin: Demi-largeur d'intervalle visée (0.01 = ±1 point)
+        confidence: Niveau de confiance
+        expected_rate: Proportion attendue (0.5 = pire cas)
+
+    Returns:
+        Nombre de lignes à échantillonner
+    """
+    if not 0 < margin < 1:
+        raise ValueError(f"margin must be in ]0, 1[, got {margin}")
+    z = z_score(confidence)
+    return math.ceil(z * z * expected_rate * (1 - expected_rate) / (margin * margin))
+
+
+def wilson_interval(violations: int, sample_size: int, confidence: float = DEFAULT_CONFIDENCE) -> tuple:
+    """
+    Intervalle de Wilson pour une proportion (reste valide quand violations = 0).
+
+    Returns:
+        (borne basse, borne haute), bornes incluses dans [0, 1]
+    """
+    if sample_size <= 0:
+        return 0.0, 1.0
+    z = z_score(confidence)
+    p = violations / sample_size
+    denominator = 1 + z * z / sample_size
+    center = (p + z * z / (2 * sample_size)) / denominator
+    half = z * math.sqrt(p * (1 - p) / sample_size + z * z / (4 * sample_size * sample_size)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def estimate_rate(violations: int, sample_size: int, confidence: float = DEFAULT_CONFIDENCE,
+                  exact: bool = False) -> dict:
+    """
+    Taux de violation estimé avec son intervalle de confiance.
+
+    Args:
+        violations: Nombre de lignes en violation dans l'échantillon
+        sample_size: Taille de l'échantillon
+        confidence: Niveau de confiance
+        exact: Vrai si la table entière a été lue (intervalle réduit au taux observé)
+
+    Returns:
+        Dict {sample_size, violations, rate, lower, upper, confidence, exact}
+    """
+    rate = violations / sample_size if sample_size else 0.0
+    lower, upper = (rate, rate) if exact else wilson_interval(violations, sample_size, confidence)
+    return {
+        "sample_size": int(sample_size),
+        "violations": int(violations),
+        "rate": rate,
+        "lower": lower,
+        "upper": upper,
+        "confidence": confidence,
+        "exact": bool(exact),
+    }
+
+
+def format_estimate(estimate: dict) -> str:
+    """Représentation lisible d'une estimation pour les messages de test."""
+    if estimate["exact"]:
+        return (f"{estimate['violations']:,}/{estimate['sample_size']:,} "
+                f"({estimate['rate']:.3%}, exhaustive)")
+    return (f"{estimate['violations']:,}/{estimate['sample_size']:,} sampled "
+            f"-> {estimate['rate']:.3%} "
+            f"[{estimate['lower']:.3%}, {estimate['upper']:.3%}] "
+            f"at {estimate['confidence']:.0%} confidence")
+
+
+def exceeds_tolerance(estimate: dict, tolerance: float = 0.0) -> bool:
+    """
+    Vrai si l'échantillon prouve un dépassement du seuil toléré.
+
+    Le test porte sur la borne basse : avec tolerance=0, toute violation
+    observée suffit (une violation vue dans l'échantillon existe dans la table).
+    """
+    return estimate["lower"] > tolerance
+
+
+# ============================================================================
+# POSTGRESQL SAMPLING
+# ============================================================================
+
+def table_row_estimate(conn, table: str) -> int:
+    """Nombre de lignes d'après les statistiques du planner, COUNT(*) si la table n'a jamais été analysée."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", (table,))
+        estimate = cursor.fetchone()[0]
+        if estimate is None or estimate <= 0:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            estimate = cursor.fetchone()[0]
+        return int(estimate)
+    finally:
+        cursor.close()
+
+
+def tablesample_clause(sample_size: int, total_rows: int, seed: int = DEFAULT_SEED) -> str:
+    """
+    Clause TABLESAMPLE BERNOULLI (tirage ligne par ligne, reproductible via REPEATABLE).
+
+    Retourne une chaîne vide si l'échantillon couvrirait toute la table.
+    """
+    if total_rows <= 0 or sample_size >= total_rows:
+        return ""
+    percent = 100.0 * sample_size / total_rows
+    return f"TABLESAMPLE BERNOULLI ({percent:.6f}) REPEATABLE ({int(seed)})"
+
+
+def sample_table(conn, table: str, columns: list, sample_size: int = None,
+                 seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    Charge un échantillon aléatoire d'une table (ou la table complète si sample_size est None).
+
+    Args:
+        conn: Connexion psycopg2
+        table: Nom de la table
+        columns: Colonnes à charger
+        sample_size: Taille d'échantillon visée (la taille réelle suit une loi binomiale)
+        seed: Graine REPEATABLE
+
+    Returns:
+        DataFrame ; df.attrs["exhaustive"] indique si la table entière a été lue
+    """
+    clause = ""
+    if sample_size is not None:
+        clause = tablesample_clause(sample_size, table_row_estimate(conn, table), seed)
+    df = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM {table} {clause};", conn)
+    df.attrs["exhaustive"] = not clause
+    return df
+
+
+def _estimate_from_query(conn, query: str, confidence: float, exact: bool) -> dict:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        sample_size, violations = cursor.fetchone()
+    finally:
+        cursor.close()
+    return estimate_rate(violations or 0, sample_size or 0, confidence, exact)
+
+
+def estimate_duplicate_rate(conn, table: str, key: str, sample_size: int = None,
+                            confidence: float = DEFAULT_CONFIDENCE, seed: int = DEFAULT_SEED) -> dict:
+    """
+    Proportion de lignes dont la clé apparaît plusieurs fois dans la table.
+
+    Les clés échantillonnées sont comptées sur la table complète : une ligne
+    tirée est en violation si sa clé a au moins un doublon, même non tiré.
+    """
+    clause = ""
+    if sample_size is not None:
+        clause = tablesample_clause(sample_size, table_row_estimate(conn, table), seed)
+    query = f"""
+        WITH s AS (
+            SELECT {key} FROM {table} {clause}
+        ),
+        key_counts AS (
+            SELECT {key}, COUNT(*) AS n
+            FROM {table}
+            WHERE {key} IN (SELECT {key} FROM s)
+            GROUP BY {key}
+        )
+        SELECT COUNT(*), COUNT(*) FILTER (WHERE k.n > 1)
+        FROM s LEFT JOIN key_counts k USING ({key});
+    """
+    return _estimate_from_query(conn, query, confidence, not clause)
+
+
+def estimate_orphan_rate(conn, child: str, parent: str, key: str, sample_size: int = None,
+                         confidence: float = DEFAULT_CONFIDENCE, seed: int = DEFAULT_SEED) -> dict:
+    """
+    Proportion de lignes de `child` dont la clé étrangère est absente de `parent`.
+
+    Les NULL ne sont pas comptés comme orphelins (contrainte NOT NULL testée à part).
+    """
+    clause = ""
+    if sample_size is not None:
+        clause = tablesample_clause(sample_size, table_row_estimate(conn, child), seed)
+    query = f"""
+        SELECT
+            COUNT(*),
+            COUNT(*) FILTER (
+                WHERE c.{key} IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM {parent} p WHERE p.{key} = c.{key})
+            )
+        FROM {child} c {clause};
+    """
+    return _estimate_from_query(conn, query, confidence, not clause)
@@ -15,9 +15,56 @@ import psycopg2
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scripts.quality_sampling import (
+    DEFAULT_CONFIDENCE,
+    DEFAULT_MARGIN,
+    DEFAULT_SEED,
+    QUALITY_MODES,
+    required_sample_size,
+    sample_table,
+)
+
 load_dotenv()
 
 
+# ============================================================================
+# COMMAND LINE OPTIONS
+# ============================================================================
+
+def pytest_addoption(parser):
+    """
+    Pytest hook: Options de la suite qualité.
+
+    --quality-mode fast        échantillon aléatoire, taux estimés avec intervalle
+    --quality-mode exhaustive  tables complètes, résultats exacts
+    """
+    group = parser.getgroup("quality", "Data quality sampling")
+    group.addoption(
+        "--quality-mode",
+        choices=QUALITY_MODES,
+        default=os.getenv("QUALITY_MODE", "fast"),
+        help="fast: TABLESAMPLE sampling with error bounds; exhaustive: full table scans",
+    )
+    group.addoption(
+        "--confidence",
+        type=float,
+        default=float(os.getenv("QUALITY_CONFIDENCE", DEFAULT_CONFIDENCE)),
+        help="Confidence level of the sampled estimates (default: 0.95)",
+    )
+    group.addoption(
+        "--margin",
+        type=float,
+        default=float(os.getenv("QUALITY_MARGIN", DEFAULT_MARGIN)),
+        help="Target margin of error of the sampled estimates (default: 0.01)",
+    )
+    group.addoption(
+        "--sample-seed",
+        type=int,
+        default=int(os.getenv("QUALITY_SAMPLE_SEED", DEFAULT_SEED)),
+        help="REPEATABLE seed of TABLESAMPLE, for reproducible samples",
+    )
+
+
 # ============================================================================
 # DATABASE FIXTURES
 # ============================================================================
@@ -39,34 +86,56 @@ def db_connection():
     conn.close()
 
 
+@pytest.fixture(scope="session")
+def quality_sampling(request):
+    """
+    Fixture: Sampling configuration of the quality suite.
+
+    Returns:
+        dict: mode, confidence, margin, seed and sample_size
+            (sample_size is None in exhaustive mode)
+    """
+    config = request.config
+    mode = config.getoption("--quality-mode")
+    confidence = config.getoption("--confidence")
+    margin = config.getoption("--margin")
+    return {
+        'mode': mode,
+        'confidence': confidence,
+        'margin': margin,
+        'seed': config.getoption("--sample-seed"),
+        'sample_size': required_sample_size(margin, confidence) if mode == "fast" else None,
+    }
+
+
 # ============================================================================
 # DATA FIXTURES
 # ============================================================================
 
 @pytest.fixture(scope="session")
-def review_data(db_connection):
+def review_data(db_connection, quality_sampling):
     """
-    Fixture: Load review data sample for testing.
+    Fixture: Load review data for testing.
 
-    Loads a sample of 10,000 reviews from the database. This data
-    is used for data quality tests that don't need the full dataset.
+    In fast mode, loads a uniform random sample (TABLESAMPLE BERNOULLI)
+    sized for the requested margin and confidence (~9,600 rows at ±1%, 95%).
+    In exhaustive mode, loads the whole table.
 
     Args:
         db_connection: Database connection fixture
+        quality_sampling: Sampling configuration fixture
 
     Returns:
-        pd.DataFrame: Sample of review data with columns:
+        pd.DataFrame: Review data with columns:
             - review_id: Unique review identifier
             - rating: Review rating (1-5)
             - buyer_id: Customer identifier
             - r_desc: Review text description
     """
-    query = """
-        SELECT review_id, rating, buyer_id, r_desc
-        FROM review
-        LIMIT 10000;
-    """
-    return pd.read_sql_query(query, db_connection)
+    return sample_table(
+        db_connection, "review", ["review_id", "rating", "buyer_id", "r_desc"],
+        sample_size=quality_sampling['sample_size'], seed=quality_sampling['seed']
+    )
 
 
 @pytest.fixture(scope="session")
@@ -90,23 +159,26 @@ def product_data(db_connection):
 
 
 @pytest.fixture(scope="session")
-def product_reviews_data(db_connection):
+def product_reviews_data(db_connection, quality_sampling):
     """
     Fixture: Load product_reviews relationship data.
 
-    Loads the many-to-many relationship between products and reviews.
-    Limited to 1,000 records for faster testing.
+    Loads the many-to-many relationship between products and reviews,
+    randomly sampled in fast mode.
 
     Args:
         db_connection: Database connection fixture
+        quality_sampling: Sampling configuration fixture
 
     Returns:
         pd.DataFrame: Product-review relationship data with columns:
             - review_id: Review identifier
             - p_id: Product identifier
     """
-    query = "SELECT review_id, p_id FROM product_reviews LIMIT 1000;"
-    return pd.read_sql_query(query, db_connection)
+    return sample_table(
+        db_connection, "product_reviews", ["review_id", "p_id"],
+        sample_size=quality_sampling['sample_size'], seed=quality_sampling['seed']
+    )
 
 
 # ============================================================================
@@ -147,6 +219,9 @@ def pytest_configure(config):
     print(f"Python version: {sys.version.split()[0]}")
     print(f"Working directory: {os.getcwd()}")
     print(f"Test directory: {os.path.dirname(__file__)}")
+    print(f"Quality mode: {config.getoption('--quality-mode')} "
+          f"(confidence {config.getoption('--confidence'):.0%}, "
+          f"margin ±{config.getoption('--margin'):.1%})")
     print("=" * 70 + "\n")
 
 
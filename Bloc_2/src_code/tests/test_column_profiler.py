@@ -0,0 +1,172 @@
+"""
+Unit Tests for the Column Profiler
+==================================
+Tests unitaires du moteur de profilage (HyperLogLog, réservoir, Misra-Gries,
+profil par chunks, détection de dérive).
+
+Usage:
+    pytest tests/test_column_profiler.py -v
+    pytest tests/ -m profiling
+"""
+
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.dags.utils.column_profiler import (
+    HyperLogLog,
+    MisraGries,
+    ReservoirSample,
+    compare_profiles,
+    profile_chunks,
+    profile_csv,
+)
+
+
+# ============================================================================
+# TEST FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def reviews_df():
+    """Synthetic review table with nulls, skewed buyers and numeric ratings."""
+    rng = np.random.default_rng(42)
+    n = 20_000
+    buyers = np.where(rng.random(n) < 0.3, "B_HEAVY", [f"B{i}" for i in rng.integers(0, 5_000, n)])
+    ratings = rng.integers(1, 6, n).astype(float)
+    ratings[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "review_id": np.arange(n),
+        "buyer_id": buyers,
+        "rating": ratings,
+    })
+
+
+def _chunks(df, size):
+    return (df.iloc[i:i + size] for i in range(0, len(df), size))
+
+
+# ============================================================================
+# UNIT TESTS - SKETCHES
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.profiling
+def test_hyperloglog_estimate_within_error_bound():
+    """HLL estimate stays within a few standard errors (1.04/sqrt(4096) ≈ 1.6%)."""
+    hll = HyperLogLog(p=12)
+    values = pd.Series(np.arange(200_000))
+    hll.update_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+    assert abs(hll.estimate() - 200_000) / 200_000 < 0.05
+
+
+@pytest.mark.unit
+@pytest.mark.profiling
+def test_hyperloglog_small_cardinality_and_merge():
+    """Small cardinalities use linear counting; merge equals the union."""
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    a = pd.util.hash_pandas_object(pd.Series(np.arange(0, 600)), index=False).to_numpy()
+    b = pd.util.hash_pandas_object(pd.Series(np.arange(300, 900)), index=False).to_numpy()
+    left.update_hashes(a)
+    right.update_hashes(b)
+    union.update_hashes(np.concatenate([a, b]))
+    left.merge(right)
+
+    assert left.estimate() == union.estimate()
+    assert abs(union.estimate() - 900) <= 30
+
+
+@pytest.mark.unit
+@pytest.mark.profiling
+def test_reservoir_quantiles_are_close():
+    """Quantiles from a 2048-item reservoir approximate the true ones."""
+    reservoir = ReservoirSample(size=2048, seed=1)
+    values = np.random.default_rng(0).random(500_000)
+    for chunk in np.array_split(values, 37):
+        reservoir.update(chunk)
+
+    assert reservoir.seen == len(values)
+    assert len(reservoir.values) == 2048
+    for q, estimate in reservoir.quantiles().items():
+        assert abs(estimate - float(q)) < 0.05
+
+
+@pytest.mark.unit
+@pytest.mark.profiling
+def test_misra_gries_keeps_heavy_hitters():
+    """Values above n/capacity frequency are always kept."""
+    summary = MisraGries(capacity=10)
+    stream = pd.Series(["hot"] * 5_000 + ["warm"] * 2_000 + [f"cold{i}" for i in range(10_000)])
+    shuffled = stream.sample(frac=1, random_state=0)
+    for start in range(0, len(shuffled), 1_000):
+        summary.update_counts(shuffled.iloc[start:start + 1_000].value_counts())
+
+    top = [item["value"] for item in summary.top(2)]
+    assert top == ["hot", "warm"]
+
+
+# ============================================================================
+# UNIT TESTS - TABLE PROFILES
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.profiling
+def test_profile_exact_metrics(reviews_df):
+    """Counts, null rate, min/max and mean are exact."""
+    profile = profile_chunks(_chunks(reviews_df, 3_000), "review")
+    rating = profile["columns"]["rating"]
+
+    assert profile["rows"] == len(reviews_df)
+    assert rating["null_count"] == int(reviews_df["rating"].isna().sum())
+    assert rating["null_rate"] == pytest.approx(reviews_df["rating"].isna().mean(), abs=1e-6)
+    assert rating["min"] == 1.0 and rating["max"] == 5.0
+    assert rating["mean"] == pytest.approx(reviews_df["rating"].mean())
+    assert profile["columns"]["buyer_id"]["top_k"][0]["value"] == "B_HEAVY"
+
+
+@pytest.mark.unit
+@pytest.mark.profiling
+def test_profile_independent_of_chunking(reviews_df):
+    """Chunk size does not change the distinct-count estimate."""
+    small = profile_chunks(_chunks(reviews_df, 500), "review")
+    large = profile_chunks(_chunks(reviews_df, 20_000), "review")
+
+    for column in reviews_df.columns:
+        assert small["columns"][column]["approx_distinct"] == large["columns"][column]["approx_distinct"]
+    true_distinct = reviews_df["buyer_id"].nunique()
+    assert abs(small["columns"]["buyer_id"]["approx_distinct"] - true_distinct) / true_distinct < 0.05
+
+
+@pytest.mark.unit
+@pytest.mark.profiling
+def test_profile_csv_stream(reviews_df):
+    """CSV sources (local file or S3 body) are profiled chunk by chunk."""
+    buffer = io.StringIO(reviews_df.to_csv(index=False))
+    profile = profile_csv(buffer, "review", chunksize=4_000)
+
+    assert profile["rows"] == len(reviews_df)
+    assert set(profile["columns"]) == set(reviews_df.columns)
+
+
+@pytest.mark.unit
+@pytest.mark.profiling
+def test_compare_profiles_detects_drift(reviews_df):
+    """A jump in null rate is reported; identical profiles report nothing."""
+    before = profile_chunks([reviews_df], "review")
+    degraded = reviews_df.copy()
+    degraded.loc[degraded.index[:5_000], "buyer_id"] = None
+    after = profile_chunks([degraded], "review")
+
+    assert compare_profiles(before, before) == []
+    drifts = compare_profiles(before, after)
+    assert {"column": "buyer_id", "metric": "null_rate",
+            "previous": before["columns"]["buyer_id"]["null_rate"],
+            "current": after["columns"]["buyer_id"]["null_rate"]} in drifts
@@ -12,6 +12,11 @@ Usage:
     pytest tests/test_data_quality.py -v
     pytest tests/test_data_quality.py -v --html=reports/quality_report.html
     pytest tests/test_data_quality.py -m database
+    pytest tests/test_data_quality.py --quality-mode exhaustive
+    pytest tests/test_data_quality.py --quality-mode fast --confidence 0.99 --margin 0.005
+
+En mode "fast" (défaut), les tests lisent un échantillon aléatoire et
+rapportent des taux de violation estimés avec un intervalle de confiance.
 """
 
 import os
@@ -27,6 +32,14 @@ import json
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scripts.quality_sampling import (
+    estimate_duplicate_rate,
+    estimate_orphan_rate,
+    estimate_rate,
+    exceeds_tolerance,
+    format_estimate,
+)
+
 load_dotenv()
 
 
@@ -78,17 +91,20 @@ def test_review_ratings_range(review_data):
 
 @pytest.mark.quality
 @pytest.mark.duplicates
-def test_no_duplicate_reviews(db_connection):
+def test_no_duplicate_reviews(db_connection, quality_sampling):
     """Test 3: Vérifier l'absence de doublons sur review_id."""
-    df = pd.read_sql_query("SELECT review_id FROM review;", db_connection)
-    ge_df = ge.from_pandas(df)
-
-    # Test: unique review_ids
-    result = ge_df.expect_column_values_to_be_unique(column='review_id')
-    duplicates = df[df.duplicated(subset=['review_id'], keep=False)]
+    # Les review_id échantillonnés sont recomptés sur la table complète (en SQL)
+    estimate = estimate_duplicate_rate(
+        db_connection, "review", "review_id",
+        sample_size=quality_sampling['sample_size'],
+        confidence=quality_sampling['confidence'],
+        seed=quality_sampling['seed'],
+    )
 
-    assert len(duplicates) == 0, f"Found {len(duplicates)} duplicate review_ids"
-    print(f"✓ No duplicates in {len(df):,} reviews")
+    assert not exceeds_tolerance(estimate), (
+        f"Found duplicate review_ids: {format_estimate(estimate)}"
+    )
+    print(f"✓ No duplicates: {format_estimate(estimate)}")
 
 
 @pytest.mark.quality
@@ -133,7 +149,7 @@ def test_product_prices_positive(product_data):
 
 @pytest.mark.quality
 @pytest.mark.text
-def test_review_text_not_empty(review_data):
+def test_review_text_not_empty(review_data, quality_sampling, test_config):
     """Test 6: Vérifier que les textes de review ne sont pas vides."""
     # Check for NULL and empty strings
     empty_texts = review_data[
@@ -141,13 +157,19 @@ def test_review_text_not_empty(review_data):
         (review_data['r_desc'].str.strip() == '')
     ]
 
-    empty_percentage = len(empty_texts) / len(review_data) * 100
+    estimate = estimate_rate(
+        len(empty_texts), len(review_data),
+        confidence=quality_sampling['confidence'],
+        exact=review_data.attrs.get('exhaustive', False),
+    )
+    empty_percentage = estimate['rate'] * 100
 
     # Allow up to 10% empty reviews
-    assert empty_percentage < 10, (
-        f"Too many empty reviews: {len(empty_texts):,} ({empty_percentage:.1f}%)"
+    assert empty_percentage < test_config['max_empty_text_percentage'], (
+        f"Too many empty reviews: {format_estimate(estimate)}"
     )
-    print(f"✓ {len(review_data) - len(empty_texts):,} reviews have text ({empty_percentage:.1f}% empty)")
+    print(f"✓ {len(review_data) - len(empty_texts):,} reviews have text "
+          f"(empty: {format_estimate(estimate)})")
 
 
 @pytest.mark.quality
@@ -171,20 +193,17 @@ def test_data_types_consistency(product_reviews_data):
 
 @pytest.mark.quality
 @pytest.mark.integrity
-def test_referential_integrity(db_connection):
+def test_referential_integrity(db_connection, quality_sampling):
     """Test 8: Vérifier l'intégrité référentielle product_reviews -> product."""
-    # Get all p_ids from product_reviews
-    df_pr = pd.read_sql_query("SELECT DISTINCT p_id FROM product_reviews;", db_connection)
-
-    # Get all p_ids from product
-    df_p = pd.read_sql_query("SELECT p_id FROM product;", db_connection)
-
-    # Find orphaned references
-    orphaned = df_pr[~df_pr['p_id'].isin(df_p['p_id'])]
-    valid_percentage = (1 - len(orphaned) / len(df_pr)) * 100 if len(df_pr) > 0 else 100
+    # Chaque ligne (échantillonnée) de product_reviews est vérifiée contre product
+    estimate = estimate_orphan_rate(
+        db_connection, "product_reviews", "product", "p_id",
+        sample_size=quality_sampling['sample_size'],
+        confidence=quality_sampling['confidence'],
+        seed=quality_sampling['seed'],
+    )
 
-    assert len(orphaned) == 0, (
-        f"Found {len(orphaned):,} orphaned product references out of {len(df_pr):,} "
-        f"({valid_percentage:.1f}% valid)"
+    assert not exceeds_tolerance(estimate), (
+        f"Found orphaned product references: {format_estimate(estimate)}"
     )
-    print(f"✓ All {len(df_pr):,} product references are valid")
+    print(f"✓ All product references are valid: {format_estimate(estimate)}")
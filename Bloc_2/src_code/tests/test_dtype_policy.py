@@ -0,0 +1,138 @@
+"""
+Unit Tests for Dtype Policy
+===========================
+Tests de la politique de types compacts (category, entiers nullables courts,
+boolean) : conversions sans perte, types conservés par le nettoyage et
+sérialisation XCom.
+
+Usage:
+    pytest tests/test_dtype_policy.py -v
+    pytest tests/ -m transformation
+"""
+
+import os
+import sys
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the DAG directory to path (les DAGs importent "utils.xxx")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts", "dags"))
+
+pytest.importorskip("pandasql")
+
+from utils import dtype_policy
+from utils.dtype_policy import JOINED_DTYPES, apply_dtype_policy, read_csv_compact, to_xcom_dict
+from utils.review_transforms import clean_and_validate
+
+
+# ============================================================================
+# TEST FIXTURES
+# ============================================================================
+
+@pytest.fixture(autouse=True)
+def compact_dtypes(monkeypatch):
+    """Policy enabled whatever PIPELINE_COMPACT_DTYPES is set to."""
+    monkeypatch.setattr(dtype_policy, "COMPACT_DTYPES", True)
+
+
+@pytest.fixture
+def joined_df():
+    """Joined rows as returned by SQLite (object / float64 columns)."""
+    return pd.DataFrame({
+        "review_id": [1, 2, 3, 4],
+        "buyer_id": ["B1", "B2", "B3", "B4"],
+        "title": ["Great", None, "Bad", "Ok"],
+        "description": ["Great product", "Works", None, "Fine"],
+        "rating": [5.0, 4.0, 3.0, 1.0],
+        "p_id": ["P1", "P1", "P2", "P2"],
+        "product_name": ["Phone", "Phone", "Cable", "Cable"],
+        "category": ["Electronics", None, "Electronics", "Electronics"],
+        "review_img": [None, "img.jpg", None, None],
+        "text_length": [13.0, 5.0, np.nan, 4.0],
+        "has_image": [0, 1, 0, np.nan],
+        "has_orders": [1, 0, 1, 1],
+    })
+
+
+# ============================================================================
+# UNIT TESTS - CASTS
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.transformation
+def test_joined_columns_get_compact_dtypes(joined_df):
+    """Numeric, flag and repetitive columns are cast to their compact dtypes."""
+    df = apply_dtype_policy(joined_df, JOINED_DTYPES)
+
+    assert df["rating"].dtype == "Int8"
+    assert df["text_length"].dtype == "Int32"
+    assert df["has_image"].dtype == "boolean"
+    assert isinstance(df["category"].dtype, pd.CategoricalDtype)
+    assert df["has_image"].isna().tolist() == [False, False, False, True]
+    assert joined_df["rating"].dtype == "float64"
+
+
+@pytest.mark.unit
+@pytest.mark.transformation
+@pytest.mark.parametrize("rating", [4.5, 300])
+def test_lossy_cast_keeps_original_dtype(rating):
+    """A fractional or out-of-range value keeps the column in its original dtype."""
+    df = apply_dtype_policy(pd.DataFrame({"rating": [5.0, rating]}), JOINED_DTYPES)
+
+    assert df["rating"].dtype == "float64"
+    assert df["rating"].tolist() == [5.0, rating]
+
+
+@pytest.mark.unit
+@pytest.mark.transformation
+def test_policy_disabled_is_noop(joined_df, monkeypatch):
+    """PIPELINE_COMPACT_DTYPES=0 leaves pandas dtypes untouched."""
+    monkeypatch.setattr(dtype_policy, "COMPACT_DTYPES", False)
+
+    assert apply_dtype_policy(joined_df, JOINED_DTYPES) is joined_df
+
+
+@pytest.mark.unit
+@pytest.mark.transformation
+def test_read_csv_compact_applies_table_schema():
+    """Raw tables are typed at load time."""
+    df = read_csv_compact(StringIO("review_id,rating,r_desc\n1,5,Good\n2,,Bad\n"), "review")
+
+    assert df["rating"].dtype == "Int8"
+    assert df["rating"].isna().tolist() == [False, True]
+
+
+# ============================================================================
+# INTEGRATION TESTS - CLEAN & XCOM
+# ============================================================================
+
+@pytest.mark.integration
+@pytest.mark.transformation
+def test_clean_keeps_compact_dtypes(joined_df):
+    """Clean rows keep the compact dtypes, missing category becomes 'Unknown'."""
+    df_clean, df_rejected = clean_and_validate(apply_dtype_policy(joined_df, JOINED_DTYPES))
+
+    assert df_clean["review_id"].tolist() == [1, 2, 4]
+    assert df_rejected["review_id"].tolist() == [3]
+    assert df_clean["category"].tolist() == ["Electronics", "Unknown", "Electronics"]
+    assert list(df_clean["category"].cat.categories) == ["Electronics", "Unknown"]
+    assert df_clean["has_image"].tolist() == [False, True, False]
+    assert df_clean["text_length"].dtype == "Int32"
+    assert df_rejected["original_data"].iloc[0]["text_length"] is None
+
+
+@pytest.mark.integration
+@pytest.mark.transformation
+def test_xcom_dict_round_trip(joined_df):
+    """to_xcom_dict has no pd.NA and rebuilds the same clean rows."""
+    df = apply_dtype_policy(joined_df, JOINED_DTYPES)
+    payload = to_xcom_dict(df)
+
+    assert all(value is not pd.NA for column in payload.values() for value in column.values())
+    rebuilt_clean, _ = clean_and_validate(pd.DataFrame(payload))
+    expected_clean, _ = clean_and_validate(df)
+    pd.testing.assert_frame_equal(rebuilt_clean, expected_clean)
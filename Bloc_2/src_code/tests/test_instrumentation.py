@@ -0,0 +1,106 @@
+"""
+Unit Tests for Pipeline Instrumentation
+=======================================
+Tests unitaires des mesures par étape (temps, lignes, octets, mémoire)
+enregistrées dans pipeline_metadata.
+
+Usage:
+    pytest tests/test_instrumentation.py -v
+    pytest tests/ -m instrumentation
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.dags.utils.instrumentation import PipelineMetrics, pipeline_run_id, save_stage_records
+
+
+# ============================================================================
+# UNIT TESTS - STAGES
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.instrumentation
+def test_stage_records_metrics():
+    """A stage records timings, rows, bytes and peak RSS."""
+    metrics = PipelineMetrics("run_1")
+    with metrics.stage("join", rows_in=10) as stage:
+        sum(range(100_000))
+        stage.rows_out = 8
+
+    record = metrics.stages["join"].to_dict()
+    assert record["status"] == "success"
+    assert record["rows_in"] == 10 and record["rows_out"] == 8
+    assert record["wall_s"] >= 0 and record["cpu_s"] >= 0
+    assert record["peak_rss_bytes"] > 0
+
+
+@pytest.mark.unit
+@pytest.mark.instrumentation
+def test_failed_stage_is_recorded_and_reraised():
+    """An exception marks the stage as failed and propagates."""
+    metrics = PipelineMetrics("run_1")
+    with pytest.raises(ValueError):
+        with metrics.stage("clean"):
+            raise ValueError("boom")
+
+    record = metrics.stages["clean"].to_dict()
+    assert record["status"] == "failed"
+    assert record["error"] == "boom"
+
+
+@pytest.mark.unit
+@pytest.mark.instrumentation
+def test_bytes_go_to_innermost_stage():
+    """I/O reported by helpers is attributed to the open stage only."""
+    metrics = PipelineMetrics("run_1")
+    metrics.add_bytes_read(999)  # hors étape : ignoré
+    with metrics.stage("s3_load"):
+        metrics.add_bytes_read(100)
+        metrics.add_bytes_read(50)
+    with metrics.stage("extract.review"):
+        metrics.add_bytes_written(42)
+
+    update = metrics.to_update()
+    assert update["stages.s3_load"]["bytes_read"] == 150
+    assert update["stages.s3_load"]["bytes_written"] is None
+    # Les "." sont interdits dans les clés MongoDB
+    assert update["stages.extract_review"]["bytes_written"] == 42
+
+
+@pytest.mark.unit
+@pytest.mark.instrumentation
+def test_serialized_stages_merge_into_run_document():
+    """Stages collected from mapped tasks are saved in one upsert, next to existing stages."""
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient()["amazon_reviews"]["pipeline_metadata"]
+    metrics = PipelineMetrics("run_1")
+    with metrics.stage("extract_review"):
+        pass
+    metrics.save(collection)
+
+    mapped = {"extract_orders": {"status": "success", "rows_out": 3}, "extract_buyer": {"status": "failed"}}
+    assert save_stage_records(collection, "run_1", mapped) == 2
+    assert save_stage_records(collection, "run_1", {}) == 0
+
+    assert collection.count_documents({}) == 1
+    stages = collection.find_one({"run_id": "run_1"})["stages"]
+    assert set(stages) == {"extract_review", "extract_orders", "extract_buyer"}
+    assert stages["extract_orders"]["rows_out"] == 3
+
+
+@pytest.mark.unit
+@pytest.mark.instrumentation
+def test_pipeline_run_id_prefers_triggering_run():
+    """The transform DAG reuses the extract run_id passed through conf."""
+    triggered = {"run_id": "manual__2", "dag_run": SimpleNamespace(conf={"pipeline_run_id": "scheduled__1"})}
+    standalone = {"run_id": "manual__3", "dag_run": SimpleNamespace(conf=None)}
+
+    assert pipeline_run_id(triggered) == "scheduled__1"
+    assert pipeline_run_id(standalone) == "manual__3"
@@ -0,0 +1,87 @@
+"""
+Unit Tests for Keyword Matcher
+==============================
+Tests unitaires de l'automate Aho-Corasick utilisé pour le KEYWORD_SCORE
+(backend pyahocorasick et automate Python pur).
+
+Usage:
+    pytest tests/test_keyword_matcher.py -v
+    pytest tests/ -m scoring
+"""
+
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the DAG directory to path (les DAGs importent "utils.xxx")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts", "dags"))
+
+from utils.keyword_matcher import KeywordMatcher, ahocorasick, get_matcher
+
+BACKENDS = ["python", pytest.param("pyahocorasick", marks=pytest.mark.skipif(
+    ahocorasick is None, reason="pyahocorasick not installed"))]
+
+LEXICONS = {
+    "positive": {"great": 1.5, "worth": 1.0, "highly recommend": 1.0},
+    "negative": {"bad": 1.5, "not worth": 2.0, "stopped working": 2.0},
+    "defect": {"stopped working": 1.0, "broken": 1.0},
+}
+
+
+# ============================================================================
+# UNIT TESTS - MATCHING
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.scoring
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_weighted_hits_per_lexicon(backend):
+    """Phrases, repeated keywords and keywords shared by several lexicons are weighted per lexicon."""
+    matcher = KeywordMatcher(LEXICONS, backend=backend)
+    hits = matcher.hits("Great, great value! It STOPPED working after a week.")
+
+    assert hits.tolist() == [3.0, 2.0, 1.0]
+
+
+@pytest.mark.unit
+@pytest.mark.scoring
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_whole_words_and_overlaps(backend):
+    """Keywords inside other words do not count; overlapping keywords all count."""
+    matcher = KeywordMatcher(LEXICONS, backend=backend)
+
+    assert matcher.hits("badge greatness worthless").tolist() == [0.0, 0.0, 0.0]
+    assert matcher.hits("Not worth it.").tolist() == [1.0, 2.0, 0.0]
+    assert matcher.hits(None).tolist() == [0.0, 0.0, 0.0]
+
+
+@pytest.mark.unit
+@pytest.mark.scoring
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_batch_matches_regex_per_keyword(backend):
+    """A batch scan gives the same weighted counts as one regex per keyword."""
+    rng = np.random.default_rng(0)
+    vocabulary = ["great", "bad", "not", "worth", "stopped", "working", "broken", "badge", "ok"]
+    texts = pd.Series([" ".join(rng.choice(vocabulary, rng.integers(0, 15))) for _ in range(200)] + [None])
+
+    expected = np.zeros((len(texts), len(LEXICONS)))
+    for j, words in enumerate(LEXICONS.values()):
+        for word, weight in words.items():
+            expected[:, j] += weight * texts.fillna("").str.count(rf"\b{re.escape(word)}\b").to_numpy()
+
+    hits = KeywordMatcher(LEXICONS, backend=backend).hits_frame(texts)
+    assert list(hits.columns) == list(LEXICONS)
+    assert np.allclose(hits.to_numpy(), expected)
+
+
+@pytest.mark.unit
+@pytest.mark.scoring
+def test_get_matcher_compiles_once():
+    """The same lexicons reuse the compiled automaton."""
+    assert get_matcher(LEXICONS) is get_matcher({name: dict(words) for name, words in LEXICONS.items()})
+    assert get_matcher(LEXICONS) is not get_matcher({"positive": {"great": 1.0}})
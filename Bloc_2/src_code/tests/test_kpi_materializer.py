@@ -0,0 +1,82 @@
+"""
+Unit Tests for the KPI Materializer
+===================================
+Les tables KPI sont construites dans des tables de staging puis publiées par
+SWAP une fois toutes prêtes : un échec pendant le calcul ne touche pas les
+tables lues par les dashboards.
+
+Usage:
+    pytest tests/test_kpi_materializer.py -v
+    pytest tests/ -m unit
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the DAG directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts", "dags"))
+
+from utils.kpi_materializer import KPI_TABLES, STAGING_SUFFIX, materialize_kpi_tables
+
+SCHEMA = "DB.ANALYTICS"
+
+
+class RecordingCursor:
+    """Records every statement; optionally fails on the first one containing `fail_on`."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError(f"failed: {self.fail_on}")
+        self.statements.append(" ".join(sql.split()))
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+# ============================================================================
+# UNIT TESTS - STAGING AND SWAP
+# ============================================================================
+
+@pytest.mark.unit
+def test_tables_are_built_in_staging_then_swapped():
+    """Every CTAS targets a staging table; all SWAPs come after the last CTAS."""
+    cursor = RecordingCursor()
+    results = materialize_kpi_tables(FakeConnection(cursor), "run-1", schema=SCHEMA)
+
+    creates = [i for i, s in enumerate(cursor.statements) if s.startswith("CREATE OR REPLACE TABLE")]
+    swaps = [i for i, s in enumerate(cursor.statements) if " SWAP WITH " in s]
+
+    assert set(results) == {"KPI_CUBE", *KPI_TABLES}
+    assert all(f"{STAGING_SUFFIX} AS" in cursor.statements[i] for i in creates)
+    assert len(swaps) == len(KPI_TABLES)
+    assert max(creates) < min(swaps)
+
+
+@pytest.mark.unit
+def test_failed_build_leaves_published_tables_untouched():
+    """A failure while computing a KPI table issues no SWAP and no DROP."""
+    cursor = RecordingCursor(fail_on="KPI_ACTIVE_BUYERS_STAGING AS")
+
+    with pytest.raises(RuntimeError):
+        materialize_kpi_tables(FakeConnection(cursor), "run-1", schema=SCHEMA)
+
+    assert not any("SWAP WITH" in s or s.startswith("DROP") for s in cursor.statements)
+    assert not any(f"TABLE {SCHEMA}.{table} AS" in s for s in cursor.statements for table in KPI_TABLES)
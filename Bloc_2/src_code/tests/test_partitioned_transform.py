@@ -0,0 +1,109 @@
+"""
+Unit Tests for Partitioned Transform
+====================================
+Tests de la transformation partitionnée (hachage par review_id ou p_id) :
+mêmes lignes clean / rejected qu'en mode mono-processus.
+
+Usage:
+    pytest tests/test_partitioned_transform.py -v
+    pytest tests/ -m transformation
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Add the DAG directory to path (les DAGs importent "utils.xxx")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts", "dags"))
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+pytest.importorskip("pandasql")
+
+from utils.partitioned_transform import review_partitions, split_tables, transform_partitioned
+from utils.review_transforms import clean_and_validate, join_tables
+from synthetic_data import generate_tables
+
+
+# ============================================================================
+# TEST FIXTURES
+# ============================================================================
+
+@pytest.fixture(scope="module")
+def raw_tables():
+    """Synthetic raw tables; some reviews are linked to a second product."""
+    tables = generate_tables(n_reviews=1_500, seed=3, dirty_rate=0.08)
+    product_reviews = tables["product_reviews"]
+    extra = product_reviews.head(50).copy()
+    extra["p_id"] = product_reviews["p_id"].iloc[::-1].head(50).to_numpy()
+    tables["product_reviews"] = pd.concat([product_reviews, extra], ignore_index=True)
+    return tables
+
+
+@pytest.fixture(scope="module")
+def single_process(raw_tables):
+    """Reference output of join_tables + clean_and_validate."""
+    df_joined = join_tables(raw_tables)
+    df_clean, df_rejected = clean_and_validate(df_joined)
+    return df_clean.sort_values("review_id", kind="stable").reset_index(drop=True), df_rejected, len(df_joined)
+
+
+def canonical_rejected(df: pd.DataFrame) -> pd.DataFrame:
+    """Rejected rows without rejected_at, in a canonical order."""
+    df = df.drop(columns=["rejected_at"]).astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+# ============================================================================
+# UNIT TESTS - PARTITIONING
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.transformation
+@pytest.mark.parametrize("key", ["review_id", "p_id"])
+def test_partitions_cover_every_review_once(raw_tables, key):
+    """Each review row lands in exactly one partition, with all its product links."""
+    parts = split_tables(raw_tables, 4, key)
+
+    assert sum(len(p["review"]) for p in parts) == len(raw_tables["review"])
+    assert sum(len(p["product_reviews"]) for p in parts) == len(raw_tables["product_reviews"])
+    ids = [set(p["review"]["review_id"].dropna()) for p in parts]
+    assert sum(len(s) for s in ids) == len(set().union(*ids))
+    assert parts[0]["category"] is raw_tables["category"]
+
+
+@pytest.mark.unit
+@pytest.mark.transformation
+def test_product_key_groups_reviews_of_a_product():
+    """With key="p_id", the reviews of one product share a partition."""
+    tables = {
+        "review": pd.DataFrame({"review_id": [1, 2, 3, 4]}),
+        "product_reviews": pd.DataFrame({"review_id": [1, 2, 3, 3], "p_id": ["A", "A", "A", "B"]}),
+    }
+    partitions = review_partitions(tables, 8, key="p_id")
+
+    assert partitions[1] == partitions[2] == partitions[3]
+
+    with pytest.raises(ValueError):
+        review_partitions(tables, 8, key="buyer_id")
+
+
+# ============================================================================
+# INTEGRATION TESTS - SAME OUTPUT AS A SINGLE PROCESS
+# ============================================================================
+
+@pytest.mark.integration
+@pytest.mark.transformation
+@pytest.mark.parametrize("key,max_workers", [("review_id", 1), ("p_id", 1), ("review_id", 2)])
+def test_partitioned_matches_single_process(raw_tables, single_process, key, max_workers):
+    """Clean rows, rejected rows and joined count equal the single-process run."""
+    df_clean, df_rejected, joined_rows = transform_partitioned(
+        raw_tables, n_partitions=3, max_workers=max_workers, key=key
+    )
+    expected_clean, expected_rejected, expected_joined = single_process
+
+    assert joined_rows == expected_joined
+    pd.testing.assert_frame_equal(df_clean, expected_clean)
+    pd.testing.assert_frame_equal(canonical_rejected(df_rejected), canonical_rejected(expected_rejected))
@@ -0,0 +1,111 @@
+"""
+Unit Tests for Quality Sampling
+===============================
+Tests unitaires des estimations du mode "fast" de la suite qualité
+(taille d'échantillon, intervalle de Wilson, clause TABLESAMPLE).
+
+Usage:
+    pytest tests/test_quality_sampling.py -v
+    pytest tests/ -m sampling
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.quality_sampling import (
+    estimate_rate,
+    exceeds_tolerance,
+    required_sample_size,
+    tablesample_clause,
+    wilson_interval,
+    z_score,
+)
+
+
+# ============================================================================
+# UNIT TESTS - SAMPLE SIZE
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.sampling
+@pytest.mark.parametrize("confidence,margin,expected", [
+    (0.95, 0.01, 9604),
+    (0.95, 0.05, 385),
+    (0.99, 0.01, 16588),
+])
+def test_required_sample_size(confidence, margin, expected):
+    """Cochran's formula gives the textbook sample sizes."""
+    assert required_sample_size(margin, confidence) == expected
+
+
+@pytest.mark.unit
+@pytest.mark.sampling
+def test_invalid_confidence_rejected():
+    """Confidence outside ]0, 1[ is rejected."""
+    with pytest.raises(ValueError):
+        z_score(1.0)
+
+
+# ============================================================================
+# UNIT TESTS - ESTIMATES
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.sampling
+def test_wilson_interval_with_no_violation():
+    """Zero violations give a zero lower bound and an upper bound of z²/(n + z²)."""
+    lower, upper = wilson_interval(0, 10_000, 0.95)
+    z = z_score(0.95)
+
+    assert lower == 0.0
+    assert upper == pytest.approx(z * z / (10_000 + z * z))
+
+
+@pytest.mark.unit
+@pytest.mark.sampling
+def test_wilson_interval_coverage():
+    """The 95% interval covers the true rate in about 95% of random samples."""
+    rng = np.random.default_rng(7)
+    true_rate, n, trials = 0.02, 2_000, 2_000
+    violations = rng.binomial(n, true_rate, size=trials)
+    covered = sum(lo <= true_rate <= hi for lo, hi in (wilson_interval(v, n, 0.95) for v in violations))
+
+    assert 0.93 <= covered / trials <= 0.97
+
+
+@pytest.mark.unit
+@pytest.mark.sampling
+def test_exhaustive_estimate_is_exact():
+    """A full scan reports the observed rate without an interval."""
+    estimate = estimate_rate(5, 1_000, exact=True)
+
+    assert estimate["rate"] == estimate["lower"] == estimate["upper"] == 0.005
+
+
+@pytest.mark.unit
+@pytest.mark.sampling
+def test_exceeds_tolerance():
+    """Any sampled violation fails a zero tolerance; a threshold needs statistical evidence."""
+    assert not exceeds_tolerance(estimate_rate(0, 10_000))
+    assert exceeds_tolerance(estimate_rate(1, 10_000))
+    assert not exceeds_tolerance(estimate_rate(105, 1_000), tolerance=0.10)
+    assert exceeds_tolerance(estimate_rate(150, 1_000), tolerance=0.10)
+
+
+# ============================================================================
+# UNIT TESTS - TABLESAMPLE
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.sampling
+def test_tablesample_clause():
+    """The sampling percentage targets the requested size; small tables are read fully."""
+    assert tablesample_clause(9_604, 2_000_000, seed=1) == "TABLESAMPLE BERNOULLI (0.480200) REPEATABLE (1)"
+    assert tablesample_clause(9_604, 5_000) == ""
+    assert tablesample_clause(9_604, 0) == ""
@@ -0,0 +1,104 @@
+"""
+Unit Tests for Rejection Writer
+===============================
+Tests unitaires des upserts idempotents de amazon_reviews.rejected_reviews
+(mongomock en mémoire).
+
+Usage:
+    pytest tests/test_rejection_writer.py -v
+    pytest tests/ -m mongodb
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("mongomock")
+
+from scripts.dags.utils.rejection_writer import ensure_rejection_index, upsert_rejections
+from scripts.dags.utils.storage_backends import mongomock_client
+
+
+# ============================================================================
+# TEST FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def rejected_collection():
+    """Empty in-memory rejected_reviews collection."""
+    return mongomock_client()["amazon_reviews"]["rejected_reviews"]
+
+
+def make_rejections(n, run_date=datetime(2025, 1, 1), details="missing title"):
+    return [
+        {
+            "review_id": i,
+            "rejection_reason": "data_quality_issue",
+            "rejected_at": run_date,
+            "original_data": {"review_id": i, "title": None},
+            "error_details": details,
+        }
+        for i in range(n)
+    ]
+
+
+# ============================================================================
+# UNIT TESTS - UPSERTS
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.mongodb
+def test_rerun_does_not_duplicate_rejections(rejected_collection):
+    """A second daily run with the same rejects inserts nothing."""
+    ensure_rejection_index(rejected_collection)
+    first = upsert_rejections(rejected_collection, make_rejections(250), batch_size=100)
+    second = upsert_rejections(rejected_collection, make_rejections(250, datetime(2025, 1, 2)), batch_size=100)
+
+    assert first["inserted"] == 250 and first["batches"] == 3
+    assert second["inserted"] == 0 and second["unchanged"] == 250
+    assert rejected_collection.count_documents({}) == 250
+    # rejected_at reste la date de première détection
+    assert rejected_collection.find_one({"review_id": 0})["rejected_at"] == datetime(2025, 1, 1)
+
+
+@pytest.mark.unit
+@pytest.mark.mongodb
+def test_changed_details_are_updated(rejected_collection):
+    """Rejects whose content changed are updated in place, new keys are inserted."""
+    upsert_rejections(rejected_collection, make_rejections(10), max_workers=1)
+    result = upsert_rejections(rejected_collection, make_rejections(12, details="rating out of range"),
+                               max_workers=1)
+
+    assert result["inserted"] == 2 and result["updated"] == 10
+    assert rejected_collection.count_documents({"error_details": "rating out of range"}) == 12
+
+
+@pytest.mark.unit
+@pytest.mark.mongodb
+def test_duplicate_keys_in_batch_and_legacy_rows(rejected_collection):
+    """Keys repeated in one run are written once; legacy duplicates are removed before indexing."""
+    rejected_collection.insert_many(make_rejections(3) + make_rejections(3, datetime(2025, 1, 2)))
+    ensure_rejection_index(rejected_collection)
+    assert rejected_collection.count_documents({}) == 3
+
+    result = upsert_rejections(rejected_collection, make_rejections(5) + make_rejections(5))
+    assert result["inserted"] == 2 and result["unchanged"] == 3
+    assert rejected_collection.count_documents({}) == 5
+
+
+@pytest.mark.unit
+@pytest.mark.mongodb
+def test_existing_index_skips_dedupe(rejected_collection, monkeypatch):
+    """Once the unique index exists, later calls never scan the collection."""
+    ensure_rejection_index(rejected_collection)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("dedupe aggregate should not run")
+
+    monkeypatch.setattr(type(rejected_collection), "aggregate", fail)
+    assert ensure_rejection_index(rejected_collection, dedupe=True) == "uniq_review_id_rejection_reason"
@@ -0,0 +1,149 @@
+"""
+Unit Tests for Relevance Scoring
+================================
+Tests unitaires des colonnes calculées pour REVIEW_RELEVANT
+(longueur, sentiment, thème, score et statut de pertinence).
+
+Usage:
+    pytest tests/test_relevance_scoring.py -v
+    pytest tests/ -m scoring
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the DAG directory to path (les DAGs importent "utils.xxx")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts", "dags"))
+
+from utils.relevance_scoring import (
+    RELEVANT_COLUMNS,
+    categorize,
+    keyword_score,
+    load_weights,
+    prepare_relevant_rows,
+    score_reviews,
+    text_length_score,
+)
+
+
+# ============================================================================
+# TEST FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def clean_reviews():
+    """Reviews shaped like the output of clean_and_validate."""
+    descriptions = [
+        "Great quality, I love it. Excellent value and perfect fit! " * 5,
+        "Arrived broken and damaged, the package was crushed.",
+        "The seller never answered, still waiting for my refund.",
+        "ok",
+    ]
+    return pd.DataFrame({
+        "review_id": [1, 2, 3, 4],
+        "buyer_id": ["a", "b", "c", None],
+        "p_id": ["P1", "P1", "P2", "P2"],
+        "product_name": ["Lamp", "Lamp", "Desk", None],
+        "category": ["Home", "Home", "Office", "Unknown"],
+        "title": ["", "", "", ""],
+        "description": descriptions,
+        "rating": [5.0, 1.0, 2.0, 3.0],
+        "text_length": [len(d) for d in descriptions],
+        "has_image": [True, True, False, False],
+        "has_orders": [True, False, True, False],
+        "review_img": ["img.jpg", None, None, None],
+    })
+
+
+# ============================================================================
+# UNIT TESTS - COMPONENTS
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.scoring
+def test_text_length_score_is_gaussian():
+    """Score is 1 at 300 characters and decreases on both sides."""
+    scores = text_length_score(pd.Series([300, 0, 700, None]))
+
+    assert np.isclose(scores[0], 1.0)
+    assert scores[1] < 0.5 and scores[2] < 0.5
+    assert np.isclose(scores[3], scores[1])  # NaN -> longueur 0
+
+
+@pytest.mark.unit
+@pytest.mark.scoring
+def test_keyword_score_sentiment():
+    """Positive texts score above 0.5, negative below, missing text 0."""
+    scores = keyword_score(pd.Series(["I love it, excellent!", "Terrible, it broke.", "a chair", None]))
+
+    assert scores[0] > 0.6
+    assert scores[1] < 0.4
+    assert scores[2] == 0.5
+    assert scores[3] == 0.0
+
+
+@pytest.mark.unit
+@pytest.mark.scoring
+def test_categorize_picks_dominant_theme():
+    """The theme with most keyword hits wins; no hit falls back with low confidence."""
+    category, confidence = categorize(pd.Series([
+        "delivery was late and the package arrived open",
+        "nothing to say",
+    ]))
+
+    assert category[0] == "delivery issue or shipping delay"
+    assert confidence[0] == 100.0
+    assert category[1] == "product quality or satisfaction"
+    assert confidence[1] == 25.0
+
+
+# ============================================================================
+# UNIT TESTS - SCORING STAGE
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.scoring
+def test_score_reviews_columns_and_status(clean_reviews):
+    """All REVIEW_RELEVANT columns are produced and thresholds drive the status."""
+    scored = score_reviews(clean_reviews)
+
+    assert list(scored.columns) == RELEVANT_COLUMNS
+    assert scored["relevance_score"].between(0, 100).all()
+    assert scored["is_extreme_rating"].tolist() == [True, True, False, False]
+    assert scored.loc[0, "relevant_status"] == "RELEVANT"
+    assert (scored.loc[1:, "relevant_status"] == "IRRELEVANT").all()
+    assert scored.loc[1, "category_review"] == "product defect or damaged item"
+    assert scored.loc[2, "category_review"] == "customer service or support"
+
+
+@pytest.mark.unit
+@pytest.mark.scoring
+def test_weights_are_configurable(clean_reviews, monkeypatch):
+    """Weights come from RELEVANCE_WEIGHTS or arguments and must sum to 1."""
+    image_only = {"text_length": 0, "has_image": 1, "has_orders": 0, "is_extreme_rating": 0, "keyword": 0}
+    scored = score_reviews(clean_reviews, weights=image_only)
+    assert scored["relevance_score"].tolist() == [100.0, 100.0, 0.0, 0.0]
+
+    monkeypatch.setenv("RELEVANCE_WEIGHTS", '{"keyword": 0.35, "text_length": 0.20}')
+    assert load_weights()["keyword"] == 0.35
+
+    with pytest.raises(ValueError):
+        load_weights({"keyword": 0.9})
+    with pytest.raises(ValueError):
+        load_weights({"sentiment": 0.0})
+
+
+@pytest.mark.unit
+@pytest.mark.scoring
+def test_prepare_relevant_rows_replaces_nan(clean_reviews):
+    """Rows follow RELEVANT_COLUMNS and NaN becomes None for the INSERT."""
+    rows = prepare_relevant_rows(score_reviews(clean_reviews))
+
+    assert len(rows) == 4 and len(rows[0]) == len(RELEVANT_COLUMNS)
+    assert rows[3][RELEVANT_COLUMNS.index("buyer_id")] is None
+    assert rows[1][RELEVANT_COLUMNS.index("review_img")] is None
@@ -0,0 +1,88 @@
+"""
+Unit Tests for Snowflake Serving Tables Tuning
+==============================================
+Tests des clés de clustering et de la search optimization gérées par
+setup_snowflake.py : seules les instructions manquantes sont exécutées.
+
+Usage:
+    pytest tests/test_snowflake_tuning.py -v
+    pytest tests/ -m unit
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the DAG directory to path (setup_snowflake.py est un script du dossier dags)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts", "dags"))
+
+pytest.importorskip("snowflake.connector")
+
+from setup_snowflake import apply_serving_tuning, clustering_statement, search_optimization_statements
+
+SPEC = {"REVIEW_RELEVANT": {"cluster_by": ["P_ID"], "search_optimization": {"EQUALITY": ["P_ID", "BUYER_ID"]}}}
+
+
+class RecordingCursor:
+    """Minimal cursor: answers SHOW TABLES / DESCRIBE SEARCH OPTIMIZATION, records ALTERs."""
+
+    def __init__(self, cluster_by=None, search_optimization=()):
+        self.cluster_by = cluster_by
+        self.search_optimization = list(search_optimization)
+        self.altered = []
+        self.description, self._rows = None, []
+
+    def execute(self, sql, params=None):
+        if sql.startswith("SHOW TABLES"):
+            self.description = [("name",), ("cluster_by",)]
+            self._rows = [("REVIEW_RELEVANT", self.cluster_by or "")]
+        elif sql.startswith("DESCRIBE SEARCH OPTIMIZATION"):
+            self.description = [("method",), ("target",)]
+            self._rows = list(self.search_optimization)
+        else:
+            self.altered.append(sql)
+
+    def fetchall(self):
+        return self._rows
+
+
+# ============================================================================
+# UNIT TESTS - STATEMENTS
+# ============================================================================
+
+@pytest.mark.unit
+@pytest.mark.parametrize("current,expected", [
+    (None, "ALTER TABLE REVIEW_RELEVANT CLUSTER BY (P_ID)"),
+    ("LINEAR(BUYER_ID)", "ALTER TABLE REVIEW_RELEVANT CLUSTER BY (P_ID)"),
+    ("LINEAR(p_id)", None),
+])
+def test_clustering_statement_only_when_key_differs(current, expected):
+    """CLUSTER BY is issued only when the current key is missing or different."""
+    assert clustering_statement("REVIEW_RELEVANT", ["P_ID"], current) == expected
+
+
+@pytest.mark.unit
+def test_search_optimization_adds_missing_columns_only():
+    """Already configured (method, column) pairs are skipped."""
+    statements = search_optimization_statements(
+        "REVIEW_RELEVANT", {"EQUALITY": ["P_ID", "BUYER_ID"]}, {("EQUALITY", "P_ID")}
+    )
+
+    assert statements == ["ALTER TABLE REVIEW_RELEVANT ADD SEARCH OPTIMIZATION ON EQUALITY(BUYER_ID)"]
+
+
+# ============================================================================
+# UNIT TESTS - IDEMPOTENCE
+# ============================================================================
+
+@pytest.mark.unit
+def test_tuning_is_idempotent():
+    """A first run alters the table, a run on the tuned table executes nothing."""
+    fresh = RecordingCursor()
+    assert len(apply_serving_tuning(fresh, SPEC)) == 2
+
+    tuned = RecordingCursor("LINEAR(P_ID)", [("EQUALITY", "P_ID"), ("EQUALITY", "BUYER_ID")])
+    assert apply_serving_tuning(tuned, SPEC) == []
+    assert tuned.altered == []
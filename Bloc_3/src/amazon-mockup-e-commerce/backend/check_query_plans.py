@@ -0,0 +1,118 @@
+"""
+Vérifie les plans (EXPLAIN) des requêtes reviews de crud.py.
+
+Chaque requête est expliquée avec des paramètres pris dans reviews_score ;
+le script échoue (code 1) si un Seq Scan apparaît sur une table volumineuse
+(db_indexes.LARGE_TABLES).
+
+Par défaut enable_seqscan = off : sur une base de test peu remplie, le planner
+préfère un Seq Scan à tout index, mais n'en garde un que si aucun index ne
+peut servir la requête. --planner-default garde les coûts réels du planner
+(base de production).
+
+Usage:
+    python backend/check_query_plans.py
+    python backend/check_query_plans.py --ensure-indexes --planner-default
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire backend au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import text
+
+import crud
+from database import engine
+from db_indexes import LARGE_TABLES, ensure_indexes
+
+QUERIES = {
+    "get_most_relevant_reviews": crud.MOST_RELEVANT_REVIEWS_QUERY,
+    "get_buyer_product_ids": crud.BUYER_PRODUCT_IDS_QUERY,
+    "get_buyer_reviews_for_product": crud.BUYER_REVIEWS_FOR_PRODUCT_QUERY,
+    "get_review_images": crud.REVIEW_IMAGES_QUERY,
+}
+
+
+def sample_params(conn) -> dict:
+    """Paramètres des requêtes, pris dans une review RELEVANT de reviews_score."""
+    row = conn.execute(text("""
+        SELECT p_id, buyer_id, review_id
+        FROM reviews_score
+        WHERE relevant_status = 'RELEVANT'
+        LIMIT 1
+    """)).first()
+    p_id, buyer_id, review_id = row if row else ("B000000000", "UNKNOWN", 0)
+    return {"p_id": p_id, "buyer_id": buyer_id, "limit": 5, "review_ids": [str(review_id)]}
+
+
+def plan_nodes(node: dict):
+    """Tous les nœuds d'un plan EXPLAIN (FORMAT JSON)."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(conn, query, params: dict) -> dict:
+    """Plan JSON de la requête (les paramètres inutilisés sont ignorés)."""
+    used = {name: value for name, value in params.items() if f":{name}" in query.text}
+    explained = text("EXPLAIN (FORMAT JSON) " + query.text)
+    result = conn.execute(explained, used).scalar()
+    plan = result if isinstance(result, list) else json.loads(result)
+    return plan[0]["Plan"]
+
+
+def check_plans(planner_default: bool = False) -> list:
+    """
+    Explique chaque requête de QUERIES.
+
+    Returns:
+        Liste de (requête, [(type de nœud, table, index)], seq scans sur LARGE_TABLES)
+    """
+    results = []
+    with engine.connect() as conn:
+        with conn.begin():
+            if not planner_default:
+                conn.execute(text("SET LOCAL enable_seqscan = off"))
+            params = sample_params(conn)
+            for name, query in QUERIES.items():
+                nodes = [
+                    (n["Node Type"], n.get("Relation Name"), n.get("Index Name"))
+                    for n in plan_nodes(explain(conn, query, params))
+                    if "Relation Name" in n or "Index Name" in n
+                ]
+                seq_scans = [table for node_type, table, _ in nodes
+                             if node_type == "Seq Scan" and table in LARGE_TABLES]
+                results.append((name, nodes, seq_scans))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the EXPLAIN plans of the reviews CRUD queries")
+    parser.add_argument("--planner-default", action="store_true",
+                        help="Keep enable_seqscan on (real planner costs, production-sized data)")
+    parser.add_argument("--ensure-indexes", action="store_true", help="Create the missing indexes first")
+    args = parser.parse_args()
+
+    if args.ensure_indexes:
+        created = ensure_indexes(engine)
+        print(f"Indexes created: {', '.join(created) if created else 'none (already in place)'}")
+
+    failed = False
+    for name, nodes, seq_scans in check_plans(args.planner_default):
+        status = "FAIL" if seq_scans else "OK"
+        failed = failed or bool(seq_scans)
+        print(f"[{status}] {name}")
+        for node_type, table, index in nodes:
+            print(f"    {node_type}" + (f" on {table}" if table else "") + (f" using {index}" if index else ""))
+
+    if failed:
+        print("Sequential scan on a large table: missing index (see db_indexes.py)")
+        sys.exit(1)
+    print("All query plans use an index")
+
+
+if __name__ == "__main__":
+    main()
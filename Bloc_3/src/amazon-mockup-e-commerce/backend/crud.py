@@ -1,7 +1,9 @@
 import uuid
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from passlib.hash import bcrypt
 import models, schemas
+import password_hasher
 from datetime import datetime, date, timedelta
 
 # Customer
@@ -10,8 +12,9 @@ def get_customer_by_email(db: Session, email: str):
     return db.query(models.Customer).filter(models.Customer.email == email).first()
 
 
-def create_customer(db: Session, customer: schemas.CustomerCreate):
-    hashed = bcrypt.hash(customer.pwd)
+def create_customer(db: Session, customer: schemas.CustomerCreate, hashed_pwd: str = None):
+    # hashed_pwd : hash déjà calculé par l'appelant (endpoint async), sinon hachage ici
+    hashed = hashed_pwd or password_hasher.hash_password(customer.pwd)
     db_obj = models.Customer(
         c_id=str(uuid.uuid4()),
         fname=customer.fname,
@@ -32,68 +35,237 @@ def list_products(db: Session, skip: int = 0, limit: int = 100):
 
 # Cart
 
+def _first_cart(db: Session, buyer_id: str):
+    # cart.buyer_id n'est pas unique : le panier du buyer est le plus ancien (comme CART_PRICING_QUERY)
+    return db.query(models.Cart).filter(models.Cart.buyer_id == buyer_id).order_by(models.Cart.cart_id).first()
+
+
+def _lock_buyer_carts(db: Session, buyer_id: str):
+    # Verrou consultatif par buyer (transaction) : une seule création de panier à la fois
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:buyer_id))"), {"buyer_id": buyer_id})
+
+
 def get_or_create_cart(db: Session, buyer_id: str):
-    cart = db.query(models.Cart).filter(models.Cart.buyer_id == buyer_id).first()
+    cart = _first_cart(db, buyer_id)
+    if cart:
+        return cart
+
+    _lock_buyer_carts(db, buyer_id)
+    cart = _first_cart(db, buyer_id)  # créé par une requête concurrente pendant l'attente du verrou
     if not cart:
         cart = models.Cart(buyer_id=buyer_id)
         db.add(cart)
-        db.commit()
-        db.refresh(cart)
+    db.commit()  # libère le verrou
+    db.refresh(cart)
     return cart
 
 
+def _lock_cart_id(db: Session, buyer_id: str):
+    return (
+        db.query(models.Cart.cart_id)
+        .filter(models.Cart.buyer_id == buyer_id)
+        .order_by(models.Cart.cart_id)
+        .limit(1)
+        .with_for_update()
+        .scalar()
+    )
+
+
 def add_to_cart(db: Session, buyer_id: str, p_id: str, qty: int = 1):
-    cart = get_or_create_cart(db, buyer_id)
-    item = (
-        db.query(models.CartItem)
-        .filter(models.CartItem.cart_id == cart.cart_id, models.CartItem.p_id == p_id)
-        .first()
+    """
+    Ajoute `qty` unités d'un produit au panier, dans une seule transaction.
+
+    La ligne cart_items est écrite par un seul INSERT ... ON CONFLICT DO UPDATE
+    (qty = qty + excluded.qty) et les totaux du panier sont incrémentés côté base
+    (total = total + prix * qty) : pas de read-modify-write, donc pas de mise à
+    jour perdue quand plusieurs ajouts arrivent en même temps.
+    """
+    cart_id = _lock_cart_id(db, buyer_id)
+    if cart_id is None:
+        # Premier ajout : même verrou que get_or_create_cart, pas de second panier
+        _lock_buyer_carts(db, buyer_id)
+        cart_id = _lock_cart_id(db, buyer_id)
+    if cart_id is None:
+        cart = models.Cart(buyer_id=buyer_id)
+        db.add(cart)
+        db.flush()  # populate cart_id
+        cart_id = cart.cart_id
+
+    # Totaux incrémentés atomiquement à partir du prix courant du produit
+    price = select(models.Product.price).where(models.Product.p_id == p_id).scalar_subquery()
+    updated = db.execute(
+        update(models.Cart)
+        .where(models.Cart.cart_id == cart_id, price.isnot(None))
+        .values(
+            total_qty=models.Cart.total_qty + qty,
+            total_price=models.Cart.total_price + price * qty,
+        )
+    )
+    if updated.rowcount == 0:
+        db.rollback()
+        raise ValueError(f"Product {p_id} not found")
+
+    upsert = pg_insert(models.CartItem).values(cart_id=cart_id, p_id=p_id, qty=qty)
+    db.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[models.CartItem.cart_id, models.CartItem.p_id],
+            set_={"qty": models.CartItem.qty + upsert.excluded.qty},
+        )
     )
-    if item:
-        item.qty += qty
-    else:
-        item = models.CartItem(cart_id=cart.cart_id, p_id=p_id, qty=qty)
-        db.add(item)
-    cart.total_qty += qty
-    # Recompute price
-    prod = db.query(models.Product).get(p_id)
-    cart.total_price += float(prod.price) * qty
     db.commit()
-    db.refresh(cart)
-    return cart
+    return db.query(models.Cart).filter(models.Cart.cart_id == cart_id).one()
+
+
+# Prix du panier avec les remises du jour : une seule jointure cart_items /
+# product / daily_deals, totaux calculés par des sommes fenêtrées. Le LEFT JOIN
+# depuis cart garde une ligne (p_id NULL) pour un panier vide.
+CART_PRICING_QUERY = text("""
+    SELECT c.cart_id,
+           l.p_id, l.qty, l.unit_price, l.discount_percent, l.line_subtotal, l.line_discount,
+           COALESCE(SUM(l.qty) OVER (), 0) AS total_qty,
+           COALESCE(SUM(l.line_subtotal) OVER (), 0) AS subtotal,
+           COALESCE(SUM(l.line_discount) OVER (), 0) AS discount_total
+    FROM cart c
+    LEFT JOIN (
+        SELECT ci.cart_id, ci.p_id, ci.qty,
+               p.price AS unit_price,
+               COALESCE(d.discount, 0) AS discount_percent,
+               p.price * ci.qty AS line_subtotal,
+               p.price * ci.qty * COALESCE(d.discount, 0) / 100 AS line_discount
+        FROM cart_items ci
+        JOIN product p ON p.p_id = ci.p_id
+        LEFT JOIN daily_deals d ON d.p_id = ci.p_id AND d.deal_date = :deal_date
+    ) l ON l.cart_id = c.cart_id
+    WHERE c.cart_id = (SELECT cart_id FROM cart WHERE buyer_id = :buyer_id ORDER BY cart_id LIMIT 1)
+    ORDER BY l.p_id
+""")
+
+
+def price_cart(db: Session, buyer_id: str, deal_date: date = None, minimum_price: float = 0):
+    """
+    Calcule le prix du panier d'un buyer avec les remises du jour (daily_deals).
+
+    Remplace la boucle de la procédure apply_daily_deals (un curseur sur les
+    lignes, deux SELECT par produit, une soustraction par unité) par une seule
+    requête ensembliste : remise de la ligne = prix * qty * discount / 100.
+    Comme dans la procédure, le total ne descend pas sous `minimum_price`.
+
+    Returns:
+        Dict au format schemas.CartPricing, ou None si le buyer n'a pas de panier
+    """
+    deal_date = deal_date or date.today()
+    rows = db.execute(CART_PRICING_QUERY, {"buyer_id": buyer_id, "deal_date": deal_date}).all()
+    if not rows:
+        return None
+
+    first = rows[0]
+    if first.total_qty == 0:
+        # Panier vide : pas de ligne, pas de prix plancher (comme la procédure)
+        total = 0
+    else:
+        total = max(first.subtotal - first.discount_total, minimum_price)
+    return {
+        "cart_id": first.cart_id,
+        "buyer_id": buyer_id,
+        "deal_date": deal_date,
+        "total_qty": first.total_qty,
+        "subtotal": first.subtotal,
+        "discount_total": first.discount_total,
+        "total": total,
+        "lines": [
+            {
+                "p_id": row.p_id,
+                "qty": row.qty,
+                "unit_price": row.unit_price,
+                "discount_percent": row.discount_percent,
+                "line_subtotal": row.line_subtotal,
+                "line_discount": row.line_discount,
+                "line_total": row.line_subtotal - row.line_discount,
+            }
+            for row in rows
+            if row.p_id is not None
+        ],
+    }
 
 # Existing customer, product, cart logic omitted for brevity...
 
 def checkout_cart(db: Session, buyer_id: str, payment_method: str):
-    cart = db.query(models.Cart).filter(models.Cart.buyer_id == buyer_id).first()
+    """
+    Transforme le panier d'un buyer en commande, dans une seule transaction.
+
+    La ligne du panier est verrouillée (SELECT ... FOR UPDATE) : deux checkouts
+    concurrents du même panier sont sérialisés et le second voit un panier vide.
+    Les prix de tous les produits sont lus en une seule requête (FOR SHARE, pour
+    qu'ils ne changent pas pendant la commande), puis les lignes de commande et
+    les expéditions sont insérées en bulk.
+    """
+    cart = (
+        db.query(models.Cart)
+        .filter(models.Cart.buyer_id == buyer_id)
+        .with_for_update()
+        .first()
+    )
     if not cart or cart.total_qty == 0:
+        db.rollback()
+        raise ValueError("Cart is empty or does not exist")
+
+    items = (
+        db.query(models.CartItem.p_id, models.CartItem.qty)
+        .filter(models.CartItem.cart_id == cart.cart_id)
+        .all()
+    )
+    if not items:
+        db.rollback()
         raise ValueError("Cart is empty or does not exist")
+
+    # Un seul aller-retour pour les prix de tous les produits du panier
+    prices = dict(
+        db.query(models.Product.p_id, models.Product.price)
+        .filter(models.Product.p_id.in_([item.p_id for item in items]))
+        .with_for_update(read=True)
+        .all()
+    )
+    missing = [item.p_id for item in items if item.p_id not in prices]
+    if missing:
+        db.rollback()
+        raise ValueError(f"Products not found: {', '.join(missing)}")
+
     # Create order
     order = models.Orders(
         buyer_id=buyer_id
     )
     db.add(order)
     db.flush()  # populate order_id
-    # Create order items
-    for item in cart.items:
-        prod = db.query(models.Product).get(item.p_id)
-        order_item = models.OrderItem(
-            order_id=order.order_id,
-            p_id=item.p_id,
-            qty=item.qty,
-            price_at_purchase=float(prod.price),
-        )
-        db.add(order_item)
-        # Create shipment per item
-        shipment = models.Shipment(
-            order_id=order.order_id,
-            p_id=item.p_id,
-            carrier_id=None,
-            shipment_type='NP',
-            status='processing',
-            est_delivery_date=(date.today() + timedelta(days=7)),
-        )
-        db.add(shipment)
+
+    # Create order items and one shipment per item (bulk inserts)
+    est_delivery_date = date.today() + timedelta(days=7)
+    db.execute(
+        insert(models.OrderItem),
+        [
+            {
+                "order_id": order.order_id,
+                "p_id": item.p_id,
+                "qty": item.qty,
+                "price_at_purchase": float(prices[item.p_id]),
+            }
+            for item in items
+        ],
+    )
+    db.execute(
+        insert(models.Shipment),
+        [
+            {
+                "order_id": order.order_id,
+                "p_id": item.p_id,
+                "carrier_id": None,
+                "shipment_type": 'NP',
+                "status": 'processing',
+                "est_delivery_date": est_delivery_date,
+            }
+            for item in items
+        ],
+    )
+
     # Create payment record
     payment = models.Payment(
         payment_id=str(uuid.uuid4()),
@@ -103,7 +275,9 @@ def checkout_cart(db: Session, buyer_id: str, payment_method: str):
     )
     db.add(payment)
     # Clear cart
-    db.query(models.CartItem).filter(models.CartItem.cart_id == cart.cart_id).delete()
+    db.query(models.CartItem).filter(models.CartItem.cart_id == cart.cart_id).delete(
+        synchronize_session=False
+    )
     cart.total_qty = 0
     cart.total_price = 0.0
     db.commit()
@@ -130,6 +304,56 @@ def get_product_images(db: Session, p_id: str):
 # FONCTIONS POUR LES REVIEWS
 # ============================================
 
+# Requêtes reviews_score (index : db_indexes.py, plans vérifiés par check_query_plans.py)
+MOST_RELEVANT_REVIEWS_QUERY = text("""
+    SELECT
+        rs.review_id,
+        rs.buyer_id,
+        rs.description,
+        rs.title,
+        rs.rating,
+        rs.has_image,
+        rs.confidence_score,
+        rs.product_name
+    FROM reviews_score rs
+    WHERE rs.p_id = :p_id
+      AND rs.relevant_status = 'RELEVANT'
+    ORDER BY rs.confidence_score DESC
+    LIMIT :limit
+""")
+
+BUYER_PRODUCT_IDS_QUERY = text("""
+    SELECT DISTINCT p_id, product_name
+    FROM reviews_score
+    WHERE buyer_id = :buyer_id
+    ORDER BY p_id
+""")
+
+BUYER_REVIEWS_FOR_PRODUCT_QUERY = text("""
+    SELECT
+        rs.review_id,
+        rs.buyer_id,
+        rs.description,
+        rs.title,
+        rs.rating,
+        rs.has_image,
+        rs.confidence_score,
+        rs.product_name
+    FROM reviews_score rs
+    WHERE rs.buyer_id = :buyer_id
+      AND rs.p_id = :p_id
+      AND rs.relevant_status = 'RELEVANT'
+    ORDER BY rs.confidence_score DESC
+""")
+
+# Images de plusieurs reviews en une requête (au lieu d'une par review)
+REVIEW_IMAGES_QUERY = text("""
+    SELECT review_id, review_img
+    FROM review_images
+    WHERE review_id = ANY(CAST(:review_ids AS integer[]))
+""")
+
+
 def get_most_relevant_reviews(db: Session, p_id: str, limit: int = 5):
     """
     Récupère les reviews les plus pertinentes pour un produit depuis la table reviews_score.
@@ -138,26 +362,7 @@ def get_most_relevant_reviews(db: Session, p_id: str, limit: int = 5):
     Returns:
         List of reviews with confidence_score from reviews_score table
     """
-    from sqlalchemy import text
-
-    query = text("""
-        SELECT
-            rs.review_id,
-            rs.buyer_id,
-            rs.description,
-            rs.title,
-            rs.rating,
-            rs.has_image,
-            rs.confidence_score,
-            rs.product_name
-        FROM reviews_score rs
-        WHERE rs.p_id = :p_id
-          AND rs.relevant_status = 'RELEVANT'
-        ORDER BY rs.confidence_score DESC
-        LIMIT :limit
-    """)
-
-    result = db.execute(query, {"p_id": p_id, "limit": limit})
+    result = db.execute(MOST_RELEVANT_REVIEWS_QUERY, {"p_id": p_id, "limit": limit})
     rows = result.fetchall()
 
     reviews = []
@@ -187,16 +392,7 @@ def get_buyer_product_ids(db: Session, buyer_id: str):
     Returns:
         Liste des product IDs uniques achetés par le buyer
     """
-    from sqlalchemy import text
-
-    query = text("""
-        SELECT DISTINCT p_id, product_name
-        FROM reviews_score
-        WHERE buyer_id = :buyer_id
-        ORDER BY p_id
-    """)
-
-    result = db.execute(query, {"buyer_id": buyer_id})
+    result = db.execute(BUYER_PRODUCT_IDS_QUERY, {"buyer_id": buyer_id})
     rows = result.fetchall()
 
     products = []
@@ -208,6 +404,26 @@ def get_buyer_product_ids(db: Session, buyer_id: str):
 
     return products
 
+def get_review_images(db: Session, review_ids: list) -> dict:
+    """
+    Récupère les images de plusieurs reviews en une seule requête.
+
+    Args:
+        db: Session de base de données
+        review_ids: IDs des reviews
+
+    Returns:
+        Dict {review_id: [review_img, ...]} (liste vide si la review n'a pas d'image)
+    """
+    images = {review_id: [] for review_id in review_ids}
+    if not review_ids:
+        return images
+    # review_id de reviews_score peut être texte, celui de review_images est entier
+    keys = {str(review_id): review_id for review_id in review_ids}
+    for review_id, review_img in db.execute(REVIEW_IMAGES_QUERY, {"review_ids": list(keys)}):
+        images[keys[str(review_id)]].append(review_img)
+    return images
+
 def get_buyer_reviews_for_product(db: Session, buyer_id: str, p_id: str):
     """
     Récupère les reviews d'un buyer spécifique pour un produit spécifique avec les images.
@@ -221,42 +437,13 @@ def get_buyer_reviews_for_product(db: Session, buyer_id: str, p_id: str):
     Returns:
         Liste des reviews du buyer pour ce produit avec leurs images
     """
-    from sqlalchemy import text
-
-    query = text("""
-        SELECT
-            rs.review_id,
-            rs.buyer_id,
-            rs.description,
-            rs.title,
-            rs.rating,
-            rs.has_image,
-            rs.confidence_score,
-            rs.product_name
-        FROM reviews_score rs
-        WHERE rs.buyer_id = :buyer_id
-          AND rs.p_id = :p_id
-          AND rs.relevant_status = 'RELEVANT'
-        ORDER BY rs.confidence_score DESC
-    """)
-
-    result = db.execute(query, {"buyer_id": buyer_id, "p_id": p_id})
+    result = db.execute(BUYER_REVIEWS_FOR_PRODUCT_QUERY, {"buyer_id": buyer_id, "p_id": p_id})
     rows = result.fetchall()
+    images = get_review_images(db, [row[0] for row in rows])
 
     reviews = []
     for row in rows:
         review_id = row[0]
-
-        # Get review images
-        image_query = text("""
-            SELECT review_img
-            FROM review_images
-            WHERE review_id = :review_id
-        """)
-        image_result = db.execute(image_query, {"review_id": review_id})
-        image_rows = image_result.fetchall()
-        images = [img[0] for img in image_rows]
-
         review_dict = {
             "review_id": review_id,
             "buyer_id": row[1],
@@ -266,7 +453,7 @@ def get_buyer_reviews_for_product(db: Session, buyer_id: str, p_id: str):
             "has_image": bool(row[5]),
             "confidence_score": float(row[6]) if row[6] is not None else 0.0,
             "product_name": row[7],
-            "images": images
+            "images": images[review_id]
         }
         reviews.append(review_dict)
 
@@ -0,0 +1,157 @@
+"""
+Index PostgreSQL des chemins d'accès de l'API aux reviews.
+
+Les requêtes de crud.py sur reviews_score filtrent par p_id, buyer_id et
+relevant_status et trient par confidence_score :
+
+- get_most_relevant_reviews     : index partiel (p_id, confidence_score DESC)
+                                  WHERE relevant_status = 'RELEVANT' : les
+                                  LIMIT premières lignes sans tri
+- get_buyer_product_ids         : index couvrant (buyer_id, p_id) INCLUDE
+                                  (product_name) : index-only scan
+- get_buyer_reviews_for_product : même index (buyer_id, p_id)
+
+Les images sont lues par review_id dans review_images, dont la clé primaire
+(review_id, review_img) couvre déjà ce lookup : pas d'index supplémentaire.
+
+ensure_indexes() est lancé au déploiement (check_query_plans.py
+--ensure-indexes) : CREATE INDEX CONCURRENTLY IF NOT EXISTS (pas de verrou
+d'écriture sur la table). Les exécutions sont sérialisées par un verrou
+consultatif (pg_advisory_lock) : un index invalide n'est supprimé puis recréé
+que par le détenteur du verrou, quand aucune construction n'est en cours
+(construction concurrente interrompue). Les tables absentes sont ignorées.
+check_query_plans.py vérifie les plans (EXPLAIN).
+
+Au démarrage de l'API (DB_ENSURE_INDEXES=1), chaque worker uvicorn tente le
+verrou sans attendre : un seul crée les index, les autres démarrent aussitôt.
+
+Configuration (.env):
+    DB_ENSURE_INDEXES   1 = créer les index manquants au démarrage de l'API (par défaut: 0)
+"""
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+DB_ENSURE_INDEXES = os.getenv("DB_ENSURE_INDEXES", "0") == "1"
+
+# Clé du verrou consultatif de ensure_indexes (commune à tous les processus)
+ENSURE_INDEXES_LOCK_KEY = 727361001
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+    include: Tuple[str, ...] = field(default_factory=tuple)
+    where: str = None
+
+    def create_sql(self) -> str:
+        sql = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.name} ON {self.table} ({', '.join(self.columns)})"
+        if self.include:
+            sql += f" INCLUDE ({', '.join(self.include)})"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql
+
+
+INDEXES = [
+    IndexSpec(
+        name="ix_reviews_score_relevant_p_id_confidence",
+        table="reviews_score",
+        columns=("p_id", "confidence_score DESC"),
+        where="relevant_status = 'RELEVANT'",
+    ),
+    IndexSpec(
+        name="ix_reviews_score_buyer_id_p_id",
+        table="reviews_score",
+        columns=("buyer_id", "p_id"),
+        include=("product_name",),
+    ),
+]
+
+# Tables volumineuses : un Seq Scan y fait échouer check_query_plans.py
+LARGE_TABLES = {"reviews_score", "review_images"}
+
+
+def _index_state(conn, name: str):
+    """None if the index does not exist, else its pg_index.indisvalid."""
+    row = conn.execute(text("""
+        SELECT i.indisvalid
+        FROM pg_class c
+        JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = :name AND c.relkind = 'i'
+    """), {"name": name}).first()
+    return None if row is None else row[0]
+
+
+def _index_build_in_progress(conn, name: str) -> bool:
+    """True if a CREATE INDEX on this index is running in another session."""
+    return conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1
+            FROM pg_stat_progress_create_index p
+            JOIN pg_class c ON c.oid = p.index_relid
+            WHERE c.relname = :name
+        )
+    """), {"name": name}).scalar()
+
+
+def ensure_indexes(engine, indexes: List[IndexSpec] = None, wait: bool = True) -> List[str]:
+    """
+    Crée les index manquants (idempotent), sous le verrou consultatif
+    ENSURE_INDEXES_LOCK_KEY.
+
+    Args:
+        engine: Engine SQLAlchemy PostgreSQL
+        indexes: Index à garantir (par défaut: INDEXES)
+        wait: False = ne rien faire si une autre session détient le verrou
+              (démarrage des workers de l'API)
+
+    Returns:
+        Noms des index créés (vide si tout est déjà en place)
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+
+    existing_tables = set(inspect(engine).get_table_names())
+    created = []
+    # CONCURRENTLY est interdit dans une transaction : autocommit
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Verrou de session : tenu pendant toutes les constructions de cette connexion
+        if wait:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ENSURE_INDEXES_LOCK_KEY})
+        elif not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": ENSURE_INDEXES_LOCK_KEY}).scalar():
+            logger.info("Indexes skipped: ensure_indexes is running in another session")
+            return []
+
+        try:
+            for spec in indexes or INDEXES:
+                if spec.table not in existing_tables:
+                    logger.info(f"Index {spec.name} skipped: table {spec.table} does not exist")
+                    continue
+                state = _index_state(conn, spec.name)
+                if state is True:
+                    continue
+                if state is False:
+                    # Verrou détenu : l'index n'est abandonné que si personne ne le construit hors ensure_indexes
+                    if _index_build_in_progress(conn, spec.name):
+                        logger.warning(f"Index {spec.name} is being built by another session, skipped")
+                        continue
+                    logger.warning(f"Index {spec.name} is invalid (interrupted build), recreating it")
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {spec.name}"))
+                conn.execute(text(spec.create_sql()))
+                created.append(spec.name)
+                logger.info(f"Index {spec.name} created on {spec.table}")
+
+            # Statistiques à jour pour que le planner choisisse les nouveaux index
+            for table in sorted({spec.table for spec in indexes or INDEXES if spec.name in created}):
+                conn.execute(text(f"ANALYZE {table}"))
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ENSURE_INDEXES_LOCK_KEY})
+    return created
@@ -1,10 +1,16 @@
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException, APIRouter
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Query
 from typing import List, Optional
+from datetime import date
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import models, schemas, crud
 from database import engine, SessionLocal
 import snowflake_crud
+import password_hasher
+import db_indexes
+from product_search import CatalogSearch
 
 # Rendre PostgreSQL optionnel - ne crash pas si la DB n'est pas disponible
 try:
@@ -15,8 +21,29 @@ except Exception as e:
     print("INFO: Only Snowflake endpoints will work")
     POSTGRES_AVAILABLE = False
 
+# Index des chemins d'accès aux reviews (db_indexes.py) : créés au déploiement
+# (check_query_plans.py --ensure-indexes) ; au démarrage seulement si DB_ENSURE_INDEXES=1,
+# par un seul worker (les autres ne bloquent pas sur le verrou)
+if POSTGRES_AVAILABLE and db_indexes.DB_ENSURE_INDEXES:
+    try:
+        db_indexes.ensure_indexes(engine, wait=False)
+    except Exception as e:
+        print(f"WARNING: Could not create the reviews indexes: {e}")
+
 app = FastAPI(title="Mock E‑commerce API")
 
+# Index de recherche produits (catalogue complet Snowflake, chargé au premier appel)
+product_search = CatalogSearch(
+    load_catalog=snowflake_crud.get_product_catalog_from_snowflake,
+    get_version=snowflake_crud.get_review_relevant_last_altered,
+)
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+
 def get_db():
     if not POSTGRES_AVAILABLE:
         raise HTTPException(status_code=503, detail="PostgreSQL database is not available")
@@ -37,11 +64,37 @@ def get_db_optional():
         finally:
             db.close()
 
+def _email_registered(email: str) -> bool:
+    with SessionLocal() as db:
+        return crud.get_customer_by_email(db, email=email) is not None
+
+
+def _insert_customer(customer: schemas.CustomerCreate, hashed_pwd: str):
+    with SessionLocal() as db:
+        # Attributs chargés par le refresh de create_customer : lisibles après fermeture
+        return crud.create_customer(db, customer, hashed_pwd=hashed_pwd)
+
+
 @app.post("/customers/", response_model=schemas.Customer)
-def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_db)):
-    if crud.get_customer_by_email(db, email=customer.email):
+async def create_customer(customer: schemas.CustomerCreate):
+    """
+    Inscription d'un client.
+
+    Endpoint async : le hash bcrypt (pool de processus) est attendu sans tenir
+    de thread du threadpool ni de connexion PostgreSQL. Les accès à la base
+    passent par le threadpool, chacun avec une session courte : un pic
+    d'inscriptions ne vide pas le pool de connexions des endpoints de lecture.
+    """
+    if not POSTGRES_AVAILABLE:
+        raise HTTPException(status_code=503, detail="PostgreSQL database is not available")
+    if await run_in_threadpool(_email_registered, customer.email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_customer(db, customer)
+    hashed_pwd = await password_hasher.hash_password_async(customer.pwd)
+    try:
+        return await run_in_threadpool(_insert_customer, customer, hashed_pwd)
+    except IntegrityError:
+        # Inscription concurrente avec le même email (ou téléphone)
+        raise HTTPException(status_code=400, detail="Email or phone already registered")
 
 @app.get("/products/", response_model=List[schemas.Product])
 def read_products(skip: int = 0, limit: int = 100, db: Optional[Session] = Depends(get_db_optional)):
@@ -56,7 +109,23 @@ def read_cart(buyer_id: str, db: Session = Depends(get_db)):
 
 @app.post("/cart/{buyer_id}", response_model=schemas.Cart)
 def add_cart_item(buyer_id: str, p_id: str, qty: int = 1, db: Session = Depends(get_db)):
-    return crud.add_to_cart(db, buyer_id, p_id, qty)
+    try:
+        return crud.add_to_cart(db, buyer_id, p_id, qty)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/cart/{buyer_id}/pricing", response_model=schemas.CartPricing)
+def read_cart_pricing(
+    buyer_id: str,
+    deal_date: Optional[date] = None,
+    minimum_price: float = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Prix du panier avec les remises du jour (daily_deals), par défaut à la date du jour."""
+    pricing = crud.price_cart(db, buyer_id, deal_date=deal_date, minimum_price=minimum_price)
+    if pricing is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return pricing
 
 @app.post("/checkout/{buyer_id}", response_model=schemas.Orders)
 def checkout(buyer_id: str, payment_method: str, db: Session = Depends(get_db)):
@@ -189,6 +258,50 @@ def get_all_products_snowflake(limit: int = 100):
         raise HTTPException(status_code=500, detail=f"Snowflake error: {str(e)}")
 
 
+@app.get(
+    "/snowflake/products/search",
+    response_model=schemas.ProductSearchPage,
+    summary="Search products by name or category",
+)
+def search_products_snowflake(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Recherche (typeahead) dans tout le catalogue Snowflake via l'index en mémoire.
+
+    Args:
+        q: Texte recherché (chaque mot doit apparaître dans le nom ou la catégorie)
+        limit: Nombre maximum de produits à retourner (par défaut: 20)
+        offset: Décalage pour la pagination
+
+    Returns:
+        Page de produits triés par pertinence et nombre total de résultats
+    """
+    try:
+        total, items = product_search.search(q, limit=limit, offset=offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Snowflake error: {str(e)}")
+    return {"total": total, "limit": limit, "offset": offset, "items": items}
+
+
+@app.post(
+    "/snowflake/products/search/refresh",
+    summary="Rebuild the product search index",
+)
+def refresh_product_search():
+    """
+    Reconstruit l'index de recherche (à appeler après un chargement ETL ;
+    sinon l'index se met à jour dès que REVIEW_RELEVANT a changé).
+    """
+    try:
+        indexed = product_search.refresh(force=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Snowflake error: {str(e)}")
+    return {"indexed_products": indexed}
+
+
 @app.get(
     "/snowflake/products/{p_id}/reviews",
     response_model=List[schemas.Review],
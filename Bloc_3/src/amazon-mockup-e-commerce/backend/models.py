@@ -54,6 +54,12 @@ class CartItem(Base):
     cart = relationship("Cart", back_populates="items")
     product = relationship("Product", back_populates="cart_items")
 
+class DailyDeal(Base):
+    __tablename__ = "daily_deals"
+    p_id = Column(String(10), ForeignKey("product.p_id"), primary_key=True)
+    deal_date = Column(Date, primary_key=True)
+    discount = Column(Numeric, nullable=False)  # pourcentage de remise
+
 class Orders(Base):
     __tablename__ = "orders"
     order_id = Column(Integer, primary_key=True, index=True)
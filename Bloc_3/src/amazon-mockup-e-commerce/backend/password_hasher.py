@@ -0,0 +1,78 @@
+"""
+Hachage des mots de passe dans un pool de processus dédié.
+
+bcrypt est volontairement coûteux en CPU : exécuté dans le thread de la requête,
+un pic d'inscriptions occupe les workers de l'API et ralentit les endpoints de
+lecture. Les hachages sont donc envoyés à un ProcessPoolExecutor de taille fixe,
+ce qui plafonne le nombre de cœurs consacrés à bcrypt.
+
+Les endpoints async attendent le hash avec hash_password_async : l'attente ne
+tient ni thread du threadpool de l'API ni connexion PostgreSQL.
+
+Configuration (.env):
+    BCRYPT_ROUNDS           Work factor bcrypt (par défaut: 12)
+    PASSWORD_HASH_WORKERS   Nombre de processus de hachage (par défaut: 2)
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from passlib.hash import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _bcrypt_hash(password: str, rounds: int) -> str:
+    # Exécuté dans un processus du pool : doit rester une fonction de module (picklable)
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    return _pool
+
+
+def hash_password(password: str) -> str:
+    """
+    Hache un mot de passe avec bcrypt dans le pool de processus.
+
+    Le thread appelant attend le résultat sans consommer de CPU.
+
+    Args:
+        password: Mot de passe en clair
+
+    Returns:
+        str: Hash bcrypt
+    """
+    return _get_pool().submit(_bcrypt_hash, password, BCRYPT_ROUNDS).result()
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Comme hash_password, mais attend le résultat sans bloquer la boucle
+    d'événements ni occuper de thread.
+
+    Args:
+        password: Mot de passe en clair
+
+    Returns:
+        str: Hash bcrypt
+    """
+    return await asyncio.wrap_future(_get_pool().submit(_bcrypt_hash, password, BCRYPT_ROUNDS))
+
+
+def shutdown():
+    """Arrête le pool de processus (appelé à l'arrêt de l'API)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
@@ -0,0 +1,204 @@
+"""
+Index de recherche produits en mémoire (typeahead sur product_name et category)
+
+Le catalogue complet est chargé une fois depuis Snowflake puis indexé :
+- un index de trigrammes pour les recherches "contient" (>= 3 caractères)
+- un vocabulaire trié des mots pour les recherches par préfixe (< 3 caractères)
+
+L'index est reconstruit lorsque la table REVIEW_RELEVANT a été modifiée
+(nouveau chargement ETL), vérifié au plus toutes les SEARCH_INDEX_CHECK_INTERVAL
+secondes en arrière-plan, ou à la demande via refresh().
+"""
+import bisect
+import heapq
+import logging
+import os
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_CHECK_INTERVAL = int(os.getenv("SEARCH_INDEX_CHECK_INTERVAL", "60"))
+
+
+def normalize(text: Optional[str]) -> str:
+    """Minuscules, sans accents, espaces compactés."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ProductSearchIndex:
+    """Index immuable construit à partir d'une liste de produits."""
+
+    def __init__(self, products: List[dict]):
+        self.products = products
+        self._names = [normalize(p["product_name"]) for p in products]
+        self._texts = [
+            f"{name} {normalize(p.get('category'))}".strip()
+            for name, p in zip(self._names, products)
+        ]
+
+        self._trigram_index: Dict[str, Set[int]] = {}
+        words: Dict[str, Set[int]] = {}
+        for doc_id, text in enumerate(self._texts):
+            for gram in _trigrams(text):
+                self._trigram_index.setdefault(gram, set()).add(doc_id)
+            for word in text.split():
+                words.setdefault(word, set()).add(doc_id)
+
+        self._vocabulary = sorted(words)
+        self._word_docs = [words[w] for w in self._vocabulary]
+
+        # Départage final : noms courts d'abord, puis ordre alphabétique
+        self._order = [0] * len(products)
+        by_name = sorted(range(len(products)), key=lambda d: (len(self._names[d]), self._names[d]))
+        for rank, doc_id in enumerate(by_name):
+            self._order[doc_id] = rank
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _prefix_docs(self, prefix: str) -> Set[int]:
+        docs: Set[int] = set()
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for i in range(start, len(self._vocabulary)):
+            if not self._vocabulary[i].startswith(prefix):
+                break
+            docs |= self._word_docs[i]
+        return docs
+
+    def _substring_docs(self, token: str) -> Set[int]:
+        postings = [self._trigram_index.get(g) for g in _trigrams(token)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        # Les trigrammes peuvent matcher dans le désordre : vérification finale
+        return {d for d in candidates if token in self._texts[d]}
+
+    def _rank_key(self, doc_id: int, query: str, first_token: str) -> Tuple:
+        name = self._names[doc_id]
+        position = name.find(first_token)
+        return (
+            not name.startswith(query),
+            f" {first_token}" not in f" {name}",  # début de mot
+            position if position >= 0 else len(name),
+            self._order[doc_id],
+        )
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[dict]]:
+        """
+        Recherche les produits dont le nom ou la catégorie contient tous les
+        mots de la requête.
+
+        Args:
+            query: Texte saisi par l'utilisateur
+            limit: Nombre maximum de résultats
+            offset: Décalage pour la pagination
+
+        Returns:
+            (nombre total de résultats, page de produits triés par pertinence)
+        """
+        query = normalize(query)
+        if not query:
+            return 0, []
+
+        tokens = query.split()
+        matches: Optional[Set[int]] = None
+        # Les mots les plus longs sont les plus sélectifs
+        for token in sorted(tokens, key=len, reverse=True):
+            docs = self._substring_docs(token) if len(token) >= 3 else self._prefix_docs(token)
+            matches = docs if matches is None else matches & docs
+            if not matches:
+                return 0, []
+
+        # Seuls les offset + limit meilleurs sont triés
+        ranked = heapq.nsmallest(offset + limit, matches,
+                                 key=lambda d: self._rank_key(d, query, tokens[0]))
+        return len(matches), [self.products[d] for d in ranked[offset:]]
+
+
+class CatalogSearch:
+    """
+    Garde un ProductSearchIndex à jour par rapport à la source.
+
+    Les recherches ne prennent aucun verrou : elles lisent la référence de
+    l'index courant. Quand la vérification de version est due, elle part dans
+    un thread d'arrière-plan ; le nouvel index est construit à côté puis
+    substitué en une affectation. Si Snowflake ne répond pas, l'index en
+    mémoire continue d'être servi (warning dans les logs).
+
+    Args:
+        load_catalog: Fonction retournant la liste complète des produits
+        get_version: Fonction retournant un marqueur de version de la source
+                     (ex: LAST_ALTERED de la table) ; un changement déclenche
+                     la reconstruction de l'index
+        check_interval: Délai minimum (s) entre deux vérifications de version
+    """
+
+    def __init__(self, load_catalog: Callable[[], List[dict]],
+                 get_version: Callable[[], object],
+                 check_interval: int = SEARCH_INDEX_CHECK_INTERVAL):
+        self._load_catalog = load_catalog
+        self._get_version = get_version
+        self._check_interval = check_interval
+        # Sérialise les reconstructions uniquement (jamais pris par les recherches)
+        self._refresh_lock = threading.Lock()
+        self._index: Optional[ProductSearchIndex] = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        return time.monotonic() - self._checked_at < self._check_interval
+
+    def refresh(self, force: bool = True) -> int:
+        """
+        Reconstruit l'index (si la source a changé, ou toujours si force).
+
+        Sans force, un échec (Snowflake indisponible) garde l'index courant ;
+        l'erreur n'est propagée que s'il n'y a encore aucun index à servir.
+        """
+        with self._refresh_lock:
+            # Un autre thread vient peut-être de faire la vérification
+            if not force and self._index is not None and self._is_fresh():
+                return len(self._index)
+            try:
+                version = self._get_version()
+                if force or self._index is None or version != self._version:
+                    index = ProductSearchIndex(self._load_catalog())
+                    self._index, self._version = index, version
+            except Exception:
+                if force or self._index is None:
+                    raise
+                logger.warning("Product search index refresh failed, serving the current index", exc_info=True)
+            # Après un échec aussi : nouvel essai au prochain intervalle, pas à chaque recherche
+            self._checked_at = time.monotonic()
+            return len(self._index)
+
+    def _refresh_in_background(self):
+        if self._refresh_lock.locked():
+            return  # vérification déjà en cours
+        threading.Thread(target=self.refresh, kwargs={"force": False},
+                         name="product-search-refresh", daemon=True).start()
+
+    def get_index(self) -> ProductSearchIndex:
+        index = self._index
+        if index is None:
+            # Premier appel : rien à servir, le chargement est attendu
+            self.refresh(force=False)
+            return self._index
+        if not self._is_fresh():
+            self._refresh_in_background()
+        return index
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[dict]]:
+        return self.get_index().search(query, limit=limit, offset=offset)
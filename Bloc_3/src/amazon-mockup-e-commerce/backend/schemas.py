@@ -47,6 +47,25 @@ class Cart(BaseModel):
     class Config:
         orm_mode = True
 
+class CartPricingLine(BaseModel):
+    p_id: str
+    qty: int
+    unit_price: float
+    discount_percent: float
+    line_subtotal: float
+    line_discount: float
+    line_total: float
+
+class CartPricing(BaseModel):
+    cart_id: int
+    buyer_id: str
+    deal_date: date
+    total_qty: int
+    subtotal: float
+    discount_total: float
+    total: float
+    lines: List[CartPricingLine] = []
+
 class OrderItem(BaseModel):
     p_id: str
     qty: int
@@ -115,3 +134,9 @@ class BuyerProduct(BaseModel):
     p_id: str
     product_name: str
     category: Optional[str] = None
+
+class ProductSearchPage(BaseModel):
+    total: int
+    limit: int
+    offset: int
+    items: List[BuyerProduct]
@@ -1,17 +1,40 @@
 """
 Module pour gérer la connexion à Snowflake
+
+Les résultats sont lus en lots Arrow (cursor.fetch_arrow_batches) et convertis
+colonne par colonne en dictionnaires par pyarrow, sans liste de tuples
+intermédiaire. Si pyarrow n'est pas installé ou si le résultat n'est pas au
+format Arrow (p. ex. certaines commandes SHOW), lecture par fetchmany.
+
+- execute_query      : tous les résultats (liste de dictionnaires)
+- iter_query_batches : itérateur de lots, pour les appelants qui streament
 """
+import logging
 import os
+from typing import Dict, Iterator, List, Optional
+
 import snowflake.connector
+from snowflake.connector.errors import NotSupportedError, ProgrammingError
 from dotenv import load_dotenv
 from pathlib import Path
 
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 # Load .env from current directory or parent directory
 env_path = Path('.env')
 if not env_path.exists():
     env_path = Path('../.env')
 load_dotenv(dotenv_path=env_path)
 
+logger = logging.getLogger(__name__)
+
+# Taille des lots de la lecture fetchmany (sans Arrow)
+SNOWFLAKE_FETCH_BATCH_SIZE = int(os.getenv("SNOWFLAKE_FETCH_BATCH_SIZE", "10000"))
+SNOWFLAKE_ARROW_FETCH = os.getenv("SNOWFLAKE_ARROW_FETCH", "1") != "0"
+
 def get_snowflake_connection():
     """
     Crée et retourne une connexion à Snowflake.
@@ -30,33 +53,102 @@ def get_snowflake_connection():
     )
     return conn
 
-def execute_query(query: str, params: dict = None):
+def arrow_batches_to_dicts(tables, rename: Optional[Dict[str, str]] = None) -> Iterator[List[dict]]:
     """
-    Exécute une requête SQL sur Snowflake et retourne les résultats.
+    Convertit des tables Arrow en lots de dictionnaires (conversion colonne par colonne).
+
+    Args:
+        tables: Itérable de pyarrow.Table (ou RecordBatch)
+        rename: Renommage des colonnes {NOM_SNOWFLAKE: clé} (optionnel)
+
+    Returns:
+        Itérateur de listes de dictionnaires
+    """
+    for table in tables:
+        if rename:
+            table = table.rename_columns([rename.get(name, name) for name in table.column_names])
+        yield table.to_pylist()
+
+def rows_batches_to_dicts(cursor, batch_size: int = None,
+                          rename: Optional[Dict[str, str]] = None) -> Iterator[List[dict]]:
+    """
+    Lecture par fetchmany, convertie en lots de dictionnaires.
+
+    Args:
+        cursor: Curseur DB-API après execute
+        batch_size: Lignes par lot (défaut: SNOWFLAKE_FETCH_BATCH_SIZE)
+        rename: Renommage des colonnes {NOM_SNOWFLAKE: clé} (optionnel)
+
+    Returns:
+        Itérateur de listes de dictionnaires
+    """
+    columns = [desc[0] for desc in cursor.description]
+    if rename:
+        columns = [rename.get(name, name) for name in columns]
+    while True:
+        rows = cursor.fetchmany(batch_size or SNOWFLAKE_FETCH_BATCH_SIZE)
+        if not rows:
+            return
+        yield [dict(zip(columns, row)) for row in rows]
+
+def _result_batches(cursor, rename: Optional[Dict[str, str]] = None) -> Iterator[List[dict]]:
+    """Lots Arrow si possible, sinon fetchmany (décidé avant de consommer une ligne)."""
+    if pyarrow is not None and SNOWFLAKE_ARROW_FETCH:
+        tables = cursor.fetch_arrow_batches()
+        try:
+            first = next(tables, None)
+        except (NotSupportedError, ProgrammingError) as e:
+            logger.debug(f"Arrow fetch unavailable ({e}), falling back to fetchmany")
+        else:
+            if first is not None:
+                yield from arrow_batches_to_dicts([first], rename)
+                yield from arrow_batches_to_dicts(tables, rename)
+            return
+    yield from rows_batches_to_dicts(cursor, rename=rename)
+
+def iter_query_batches(query: str, params: dict = None,
+                       rename: Optional[Dict[str, str]] = None) -> Iterator[List[dict]]:
+    """
+    Exécute une requête SQL sur Snowflake et retourne les résultats par lots.
+
+    La connexion reste ouverte pendant l'itération et est fermée à la fin
+    (ou à la fermeture de l'itérateur).
 
     Args:
         query: Requête SQL à exécuter
         params: Paramètres pour la requête (optionnel)
+        rename: Renommage des colonnes {NOM_SNOWFLAKE: clé} (optionnel)
 
     Returns:
-        list: Liste des résultats
+        Itérateur de listes de dictionnaires
     """
     conn = get_snowflake_connection()
+    cursor = None
     try:
         cursor = conn.cursor()
         if params:
             cursor.execute(query, params)
         else:
             cursor.execute(query)
-        results = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-
-        # Convertir les résultats en liste de dictionnaires
-        result_dicts = []
-        for row in results:
-            result_dicts.append(dict(zip(columns, row)))
-
-        return result_dicts
+        yield from _result_batches(cursor, rename)
     finally:
-        cursor.close()
+        if cursor is not None:
+            cursor.close()
         conn.close()
+
+def execute_query(query: str, params: dict = None, rename: Optional[Dict[str, str]] = None):
+    """
+    Exécute une requête SQL sur Snowflake et retourne les résultats.
+
+    Args:
+        query: Requête SQL à exécuter
+        params: Paramètres pour la requête (optionnel)
+        rename: Renommage des colonnes {NOM_SNOWFLAKE: clé} (optionnel)
+
+    Returns:
+        list: Liste des résultats
+    """
+    results = []
+    for batch in iter_query_batches(query, params, rename):
+        results.extend(batch)
+    return results
@@ -1,7 +1,7 @@
 """
 Fonctions CRUD pour interroger Snowflake
 """
-from snowflake_connector import execute_query
+from snowflake_connector import execute_query, iter_query_batches
 import os
 from dotenv import load_dotenv
 from pathlib import Path
@@ -17,6 +17,49 @@ load_dotenv(dotenv_path=env_path)
 database= os.getenv('SNOWFLAKE_DATABASE')
 schema=os.getenv('SNOWFLAKE_SCHEMA_ANALYTICS')
 
+# Colonnes Snowflake -> clés de réponse, renommées au fetch (une fois par lot
+# Arrow, pas par ligne)
+PRODUCT_COLUMNS = {"P_ID": "p_id", "PRODUCT_NAME": "product_name", "CATEGORY": "category"}
+REVIEW_COLUMNS = {
+    "REVIEW_ID": "review_id",
+    "BUYER_ID": "buyer_id",
+    "P_ID": "p_id",
+    "PRODUCT_NAME": "product_name",
+    "CATEGORY": "category",
+    "TITLE": "title",
+    "DESCRIPTION": "r_desc",
+    "RATING": "rating",
+    "TEXT_LENGTH": "text_length",
+    "HAS_IMAGE": "has_image",
+    "HAS_ORDERS": "has_orders",
+    "TEXT_LENGTH_SCORE": "text_length_score",
+    "IS_EXTREME_RATING": "is_extreme_rating",
+    "KEYWORD_SCORE": "keyword_score",
+    "RELEVANCE_SCORE": "relevance_score",
+    "CATEGORY_REVIEW": "category_review",
+    "CONFIDENCE_SCORE": "confidence_score",
+    "RELEVANT_STATUS": "relevant_status",
+    "REVIEW_IMG": "review_img",
+}
+
+
+def _format_review(review: dict) -> dict:
+    """Review renommée (REVIEW_COLUMNS) -> réponse API : booléens et liste d'images."""
+    # Gérer les images - soit une seule URL, soit plusieurs séparées par des virgules
+    review_img = review.pop("review_img", None)
+    if isinstance(review_img, str) and ',' in review_img:
+        review["images"] = [img.strip() for img in review_img.split(',') if img.strip()]
+    elif isinstance(review_img, str) and review_img:
+        review["images"] = [review_img]
+    else:
+        review["images"] = []
+
+    review["has_image"] = bool(review["has_image"])
+    review["has_orders"] = bool(review["has_orders"])
+    review["is_extreme_rating"] = bool(review["is_extreme_rating"])
+    return review
+
+
 def get_all_products_from_snowflake(limit: int = 100):
     """
     Récupère la liste de tous les produits disponibles depuis Snowflake.
@@ -27,29 +70,64 @@ def get_all_products_from_snowflake(limit: int = 100):
     Returns:
         Liste des produits uniques avec leurs informations
     """
+    # Une ligne par P_ID : le nom ou la catégorie peuvent varier d'une review à l'autre
     query = f"""
-        SELECT DISTINCT
+        SELECT
             P_ID,
             PRODUCT_NAME,
             CATEGORY
         FROM {database}.{schema}.review_relevant
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY P_ID ORDER BY PRODUCT_NAME NULLS LAST, CATEGORY NULLS LAST
+        ) = 1
         ORDER BY PRODUCT_NAME
         LIMIT %(limit)s
     """
 
-    results = execute_query(query, {"limit": limit})
+    return execute_query(query, {"limit": limit}, rename=PRODUCT_COLUMNS)
 
-    products = []
-    for row in results:
-        products.append({
-            "p_id": row["P_ID"],
-            "product_name": row["PRODUCT_NAME"],
-            "category": row.get("CATEGORY")
-        })
 
+def get_product_catalog_from_snowflake():
+    """
+    Récupère le catalogue complet (sans limite) pour l'index de recherche.
+
+    Returns:
+        Liste de tous les produits uniques
+    """
+    # Une ligne par P_ID (sinon un produit apparaît une fois par variante de nom/catégorie)
+    query = f"""
+        SELECT
+            P_ID,
+            PRODUCT_NAME,
+            CATEGORY
+        FROM {database}.{schema}.review_relevant
+        WHERE PRODUCT_NAME IS NOT NULL
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY P_ID ORDER BY PRODUCT_NAME, CATEGORY NULLS LAST) = 1
+    """
+
+    # Lecture par lots : pas de liste de tuples intermédiaire pour tout le catalogue
+    products = []
+    for batch in iter_query_batches(query, rename=PRODUCT_COLUMNS):
+        products.extend(batch)
     return products
 
 
+def get_review_relevant_last_altered():
+    """
+    Date de dernière modification de la table review_relevant
+    (change à chaque chargement ETL).
+    """
+    query = f"""
+        SELECT LAST_ALTERED
+        FROM {database}.INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = UPPER(%(schema)s)
+          AND TABLE_NAME = 'REVIEW_RELEVANT'
+    """
+
+    results = execute_query(query, {"schema": schema})
+    return results[0]["LAST_ALTERED"] if results else None
+
+
 def get_buyer_products_from_snowflake(buyer_id: str):
     """
     Récupère la liste des produits achetés par un buyer depuis Snowflake.
@@ -70,17 +148,7 @@ def get_buyer_products_from_snowflake(buyer_id: str):
         ORDER BY P_ID
     """
 
-    results = execute_query(query, {"buyer_id": buyer_id})
-
-    products = []
-    for row in results:
-        products.append({
-            "p_id": row["P_ID"],
-            "product_name": row["PRODUCT_NAME"],
-            "category": row.get("CATEGORY")
-        })
-
-    return products
+    return execute_query(query, {"buyer_id": buyer_id}, rename=PRODUCT_COLUMNS)
 
 
 def get_product_reviews_from_snowflake(p_id: str, limit: int = 10):
@@ -124,46 +192,9 @@ def get_product_reviews_from_snowflake(p_id: str, limit: int = 10):
         LIMIT %(limit)s
     """
 
-    reviews = execute_query(query, {"p_id": p_id, "limit": limit})
-
-    # Transformer les résultats
-    for review in reviews:
-        # Gérer les images - soit une seule URL, soit multiple
-        review_img = review.get("REVIEW_IMG")
-        if review_img:
-            # Si c'est une chaîne avec des virgules, séparer
-            if isinstance(review_img, str) and ',' in review_img:
-                images = [img.strip() for img in review_img.split(',') if img.strip()]
-            elif isinstance(review_img, str):
-                images = [review_img] if review_img else []
-            else:
-                images = []
-        else:
-            images = []
-
-        # Renommer et formater les champs
-        review["review_id"] = review.pop("REVIEW_ID")
-        review["buyer_id"] = review.pop("BUYER_ID")
-        review["p_id"] = review.pop("P_ID")
-        review["product_name"] = review.pop("PRODUCT_NAME")
-        review["category"] = review.pop("CATEGORY")
-        review["title"] = review.pop("TITLE")
-        review["r_desc"] = review.pop("DESCRIPTION")
-        review["rating"] = review.pop("RATING")
-        review["text_length"] = review.pop("TEXT_LENGTH")
-        review["has_image"] = bool(review.pop("HAS_IMAGE"))
-        review["has_orders"] = bool(review.pop("HAS_ORDERS"))
-        review["text_length_score"] = review.pop("TEXT_LENGTH_SCORE")
-        review["is_extreme_rating"] = bool(review.pop("IS_EXTREME_RATING"))
-        review["keyword_score"] = review.pop("KEYWORD_SCORE")
-        review["relevance_score"] = review.pop("RELEVANCE_SCORE")
-        review["category_review"] = review.pop("CATEGORY_REVIEW")
-        review["confidence_score"] = review.pop("CONFIDENCE_SCORE")
-        review["relevant_status"] = review.pop("RELEVANT_STATUS")
-        review["images"] = images
-        review.pop("REVIEW_IMG", None)
-
-    return reviews
+    reviews = execute_query(query, {"p_id": p_id, "limit": limit}, rename=REVIEW_COLUMNS)
+
+    return [_format_review(review) for review in reviews]
 
 
 def get_relevant_reviews_from_snowflake(buyer_id: str, p_id: str):
@@ -207,43 +238,6 @@ def get_relevant_reviews_from_snowflake(buyer_id: str, p_id: str):
         ORDER BY RELEVANCE_SCORE DESC
     """
 
-    reviews = execute_query(query, {"buyer_id": buyer_id, "p_id": p_id})
-
-    # Transformer les résultats
-    for review in reviews:
-        # Gérer les images - soit une seule URL, soit multiple
-        review_img = review.get("REVIEW_IMG")
-        if review_img:
-            # Si c'est une chaîne avec des virgules, séparer
-            if isinstance(review_img, str) and ',' in review_img:
-                images = [img.strip() for img in review_img.split(',') if img.strip()]
-            elif isinstance(review_img, str):
-                images = [review_img] if review_img else []
-            else:
-                images = []
-        else:
-            images = []
-
-        # Renommer et formater les champs
-        review["review_id"] = review.pop("REVIEW_ID")
-        review["buyer_id"] = review.pop("BUYER_ID")
-        review["p_id"] = review.pop("P_ID")
-        review["product_name"] = review.pop("PRODUCT_NAME")
-        review["category"] = review.pop("CATEGORY")
-        review["title"] = review.pop("TITLE")
-        review["r_desc"] = review.pop("DESCRIPTION")
-        review["rating"] = review.pop("RATING")
-        review["text_length"] = review.pop("TEXT_LENGTH")
-        review["has_image"] = bool(review.pop("HAS_IMAGE"))
-        review["has_orders"] = bool(review.pop("HAS_ORDERS"))
-        review["text_length_score"] = review.pop("TEXT_LENGTH_SCORE")
-        review["is_extreme_rating"] = bool(review.pop("IS_EXTREME_RATING"))
-        review["keyword_score"] = review.pop("KEYWORD_SCORE")
-        review["relevance_score"] = review.pop("RELEVANCE_SCORE")
-        review["category_review"] = review.pop("CATEGORY_REVIEW")
-        review["confidence_score"] = review.pop("CONFIDENCE_SCORE")
-        review["relevant_status"] = review.pop("RELEVANT_STATUS")
-        review["images"] = images
-        review.pop("REVIEW_IMG", None)
-
-    return reviews
+    reviews = execute_query(query, {"buyer_id": buyer_id, "p_id": p_id}, rename=REVIEW_COLUMNS)
+
+    return [_format_review(review) for review in reviews]
@@ -0,0 +1,82 @@
+"""
+Benchmark de concurrence pour crud.add_to_cart.
+
+Tous les threads ajoutent des produits au même panier : à la fin, total_qty,
+total_price et la somme des qty de cart_items doivent correspondre exactement
+au nombre d'ajouts (aucune mise à jour perdue). Affiche le débit (ajouts/s).
+
+Usage:
+    python benchmarks/bench_add_to_cart.py --adds 2000 --items 5 --workers 16
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Ajouter le répertoire backend au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from database import SessionLocal, engine
+import models, crud
+from bench_checkout import cleanup, seed_buyers, seed_products
+
+
+def add_one(args):
+    """Ajoute une unité d'un produit au panier dans sa propre session."""
+    buyer_id, p_id = args
+    db = SessionLocal()
+    try:
+        crud.add_to_cart(db, buyer_id, p_id, qty=1)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark add_to_cart")
+    parser.add_argument("--adds", type=int, default=2000, help="Nombre total d'ajouts")
+    parser.add_argument("--items", type=int, default=5, help="Produits distincts ajoutés")
+    parser.add_argument("--workers", type=int, default=16, help="Ajouts concurrents")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    cleanup()
+    p_ids = seed_products(args.items)
+    # Un client sans panier : le premier ajout concurrent crée le panier
+    buyer_id = seed_buyers(1, [])[0]
+    db = SessionLocal()
+    prices = dict(db.query(models.Product.p_id, models.Product.price)
+                  .filter(models.Product.p_id.in_(p_ids)))
+    db.close()
+
+    work = [(buyer_id, p_ids[i % len(p_ids)]) for i in range(args.adds)]
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(add_one, work))
+        elapsed = time.perf_counter() - start
+
+        db = SessionLocal()
+        carts = db.query(models.Cart).filter(models.Cart.buyer_id == buyer_id).all()
+        items_qty = sum(item.qty for cart in carts for item in cart.items)
+        expected_price = float(sum(prices[p_id] for _, p_id in work))
+        total_qty = sum(cart.total_qty for cart in carts)
+        total_price = sum(cart.total_price for cart in carts)
+        db.close()
+    finally:
+        cleanup()
+
+    print(f"Adds:           {args.adds} in {elapsed:.2f}s")
+    print(f"Throughput:     {args.adds / elapsed:.1f} adds/s")
+    print(f"Carts created:  {len(carts)}")
+    print(f"total_qty:      {total_qty} (expected {args.adds}, items sum {items_qty})")
+    print(f"total_price:    {total_price:.2f} (expected {expected_price:.2f})")
+
+    if len(carts) != 1 or total_qty != args.adds or items_qty != args.adds \
+            or abs(total_price - expected_price) > 0.01:
+        print("[FAIL] Lost updates detected")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark du calcul de prix des paniers avec les remises du jour (crud.price_cart).
+
+Crée des produits de test (préfixe BENCH), des remises daily_deals pour une
+partie d'entre eux et des paniers volumineux (--items lignes par panier), puis
+lance les calculs de prix en parallèle (une session par thread). Affiche le
+débit (pricings/s) et la latence p50/p95.
+
+Chaque total est comparé au calcul de l'ancienne procédure apply_daily_deals
+(une soustraction par unité, prix plancher). --compare-loop mesure aussi
+l'ancien algorithme : un SELECT de la remise et un du prix par ligne du panier.
+
+Usage:
+    python benchmarks/bench_cart_pricing.py --buyers 50 --items 1000 --pricings 2000 --workers 16
+    python benchmarks/bench_cart_pricing.py --items 200 --compare-loop
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+# Ajouter le répertoire backend au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from sqlalchemy import insert, text
+
+from database import SessionLocal, engine
+import models, crud
+import bench_checkout
+from bench_checkout import BENCH_PREFIX, seed_products
+
+DEAL_DATE = date.today()
+
+
+def seed_deals(p_ids: list, ratio: float, rng: random.Random) -> dict:
+    """Remises du jour (5 à 50 %) pour une fraction des produits. Retourne {p_id: discount}."""
+    deals = {p_id: Decimal(rng.randrange(5, 55, 5)) for p_id in p_ids if rng.random() < ratio}
+    db = SessionLocal()
+    try:
+        if deals:
+            db.execute(insert(models.DailyDeal),
+                       [{"p_id": p_id, "deal_date": DEAL_DATE, "discount": discount}
+                        for p_id, discount in deals.items()])
+        db.commit()
+        return deals
+    finally:
+        db.close()
+
+
+def seed_carts(n_buyers: int, p_ids: list, rng: random.Random) -> dict:
+    """Clients de test avec un panier de toutes les lignes (bulk). Retourne {buyer_id: {p_id: qty}}."""
+    db = SessionLocal()
+    try:
+        carts = {}
+        for i in range(n_buyers):
+            c_id = f"{BENCH_PREFIX}-{uuid.uuid4().hex}"  # customer.c_id : varchar(40) dans le schéma du Projet 2
+            db.add(models.Customer(c_id=c_id, fname="Bench", lname=str(i),
+                                   phone=f"{uuid.uuid4().int % 10**10:010d}",
+                                   email=f"{c_id.lower()}@bench.local", pwd="x"))
+            carts[c_id] = {p_id: rng.randint(1, 5) for p_id in p_ids}
+        db.flush()
+        for c_id, items in carts.items():
+            cart = models.Cart(buyer_id=c_id, total_qty=sum(items.values()))
+            db.add(cart)
+            db.flush()  # populate cart_id
+            db.execute(insert(models.CartItem),
+                       [{"cart_id": cart.cart_id, "p_id": p_id, "qty": qty} for p_id, qty in items.items()])
+        db.commit()
+        return carts
+    finally:
+        db.close()
+
+
+def cleanup():
+    """Supprime les remises puis toutes les lignes créées par les benchmarks."""
+    db = SessionLocal()
+    try:
+        db.query(models.DailyDeal).filter(models.DailyDeal.p_id.like(f"{BENCH_PREFIX}%")).delete(
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+    bench_checkout.cleanup()
+
+
+def procedure_total(items: dict, prices: dict, deals: dict, minimum_price: Decimal) -> Decimal:
+    """Total calculé comme l'ancienne procédure apply_daily_deals, à partir du sous-total."""
+    if not items:
+        return Decimal(0)
+    total = sum(prices[p_id] * qty for p_id, qty in items.items())
+    for p_id, qty in items.items():
+        discount = deals.get(p_id, Decimal(0))
+        for _ in range(qty):
+            total -= discount / 100 * prices[p_id]
+        total = max(total, minimum_price)
+    return total
+
+
+def price_one(args):
+    """Prix d'un panier dans sa propre session. Retourne (buyer_id, total, latence en s)."""
+    buyer_id, minimum_price = args
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        pricing = crud.price_cart(db, buyer_id, deal_date=DEAL_DATE, minimum_price=minimum_price)
+    finally:
+        db.close()
+    return buyer_id, pricing, time.perf_counter() - start
+
+
+def loop_price_one(args):
+    """Ancien algorithme : remise et prix lus ligne par ligne. Retourne (buyer_id, total, latence en s)."""
+    buyer_id, minimum_price = args
+    minimum_price = Decimal(str(minimum_price))
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        cart_id = db.query(models.Cart.cart_id).filter(models.Cart.buyer_id == buyer_id).scalar()
+        items = db.query(models.CartItem.p_id, models.CartItem.qty).filter(
+            models.CartItem.cart_id == cart_id).all()
+        total = Decimal(0)
+        lines = []
+        for p_id, qty in items:
+            discount = db.execute(text("SELECT discount FROM daily_deals WHERE p_id = :p_id AND deal_date = :d"),
+                                  {"p_id": p_id, "d": DEAL_DATE}).scalar() or Decimal(0)
+            price = db.execute(text("SELECT price FROM product WHERE p_id = :p_id"), {"p_id": p_id}).scalar()
+            total += price * qty
+            lines.append((qty, discount, price))
+        for qty, discount, price in lines:
+            for _ in range(qty):
+                total -= discount / 100 * price
+            total = max(total, minimum_price)
+    finally:
+        db.close()
+    return buyer_id, total, time.perf_counter() - start
+
+
+def run(func, targets: list, workers: int) -> tuple:
+    """Exécute func sur chaque cible en parallèle. Retourne (résultats, secondes)."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(func, targets))
+    return results, time.perf_counter() - start
+
+
+def report(label: str, results: list, elapsed: float):
+    latencies = sorted(lat for _, _, lat in results)
+    print(f"[{label}]")
+    print(f"  Pricings:       {len(results)}")
+    print(f"  Elapsed:        {elapsed:.2f}s")
+    print(f"  Throughput:     {len(results) / elapsed:.1f} pricings/s")
+    print(f"  Latency p50:    {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"  Latency p95:    {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price_cart")
+    parser.add_argument("--buyers", type=int, default=50, help="Nombre de paniers")
+    parser.add_argument("--items", type=int, default=1000, help="Lignes par panier")
+    parser.add_argument("--pricings", type=int, default=2000, help="Calculs de prix au total")
+    parser.add_argument("--workers", type=int, default=16, help="Calculs concurrents")
+    parser.add_argument("--deal-ratio", type=float, default=0.5, help="Fraction des produits en remise")
+    parser.add_argument("--minimum-price", type=float, default=0, help="Prix plancher du panier")
+    parser.add_argument("--compare-loop", action="store_true",
+                        help="Mesure aussi l'ancien algorithme ligne par ligne")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    models.Base.metadata.create_all(bind=engine)
+    cleanup()
+
+    print(f"Seeding {args.buyers} cart(s) x {args.items} item(s)...")
+    p_ids = seed_products(args.items)
+    prices = {p_id: Decimal(10 + i) for i, p_id in enumerate(p_ids)}  # prix de seed_products
+    deals = seed_deals(p_ids, args.deal_ratio, rng)
+    carts = seed_carts(args.buyers, p_ids, rng)
+    buyer_ids = list(carts)
+    targets = [(buyer_ids[i % len(buyer_ids)], args.minimum_price) for i in range(args.pricings)]
+
+    try:
+        results, elapsed = run(price_one, targets, args.workers)
+        report("set-based", results, elapsed)
+        if args.compare_loop:
+            loop_targets = targets[:max(len(buyer_ids), args.pricings // 10)]
+            loop_results, loop_elapsed = run(loop_price_one, loop_targets, args.workers)
+            report("row-by-row", loop_results, loop_elapsed)
+    finally:
+        cleanup()
+
+    # Chaque total doit correspondre au calcul unité par unité de l'ancienne procédure
+    minimum_price = Decimal(str(args.minimum_price))
+    expected = {b: procedure_total(carts[b], prices, deals, minimum_price) for b in buyer_ids}
+    mismatches = [b for b, pricing, _ in results if abs(Decimal(pricing["total"]) - expected[b]) > Decimal("1e-6")]
+    if args.compare_loop:
+        mismatches += [b for b, total, _ in loop_results if abs(total - expected[b]) > Decimal("1e-6")]
+    if mismatches:
+        print(f"[FAIL] {len(mismatches)} pricing(s) differ from the per-unit computation")
+        sys.exit(1)
+    print("[OK] Totals match the per-unit computation of apply_daily_deals")
+
+
+if __name__ == "__main__":
+    main()
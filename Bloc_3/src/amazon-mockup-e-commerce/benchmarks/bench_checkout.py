@@ -0,0 +1,138 @@
+"""
+Benchmark de concurrence pour crud.checkout_cart.
+
+Crée des clients et produits de test (préfixe BENCH), remplit un panier par
+client puis lance les checkouts en parallèle (une session par thread).
+Affiche le débit (checkouts/s) et la latence p50/p95.
+
+Le mode --contention fait checkout le même panier depuis tous les threads :
+exactement un checkout doit réussir, les autres doivent voir un panier vide.
+
+Usage:
+    python benchmarks/bench_checkout.py --buyers 200 --items 10 --workers 16
+    python benchmarks/bench_checkout.py --contention --workers 16
+"""
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Ajouter le répertoire backend au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from database import SessionLocal, engine
+import models, crud
+
+BENCH_PREFIX = "BENCH"
+
+
+def seed_products(n_items: int):
+    """Crée (ou met à jour) les produits de test. Retourne leurs p_id."""
+    db = SessionLocal()
+    try:
+        p_ids = [f"{BENCH_PREFIX}{i:05d}" for i in range(n_items)]
+        for i, p_id in enumerate(p_ids):
+            db.merge(models.Product(p_id=p_id, p_name=f"Bench product {i}", p_desc="bench",
+                                    price=10 + i, qty=1_000_000))
+        db.commit()
+        return p_ids
+    finally:
+        db.close()
+
+
+def seed_buyers(n_buyers: int, p_ids: list, qty: int = 2):
+    """Crée les clients de test et ajoute `qty` unités de chaque produit à leur panier."""
+    db = SessionLocal()
+    try:
+        buyer_ids = []
+        for i in range(n_buyers):
+            c_id = f"{BENCH_PREFIX}-{uuid.uuid4()}"
+            db.add(models.Customer(c_id=c_id, fname="Bench", lname=str(i),
+                                   phone=f"{uuid.uuid4().int % 10**10:010d}",
+                                   email=f"{c_id.lower()}@bench.local", pwd="x"))
+            buyer_ids.append(c_id)
+        db.commit()
+        for c_id in buyer_ids:
+            for p_id in p_ids:
+                crud.add_to_cart(db, c_id, p_id, qty=qty)
+        return buyer_ids
+    finally:
+        db.close()
+
+
+def cleanup():
+    """Supprime toutes les lignes créées par le benchmark."""
+    db = SessionLocal()
+    try:
+        bench_buyers = db.query(models.Customer.c_id).filter(models.Customer.c_id.like(f"{BENCH_PREFIX}-%"))
+        order_ids = db.query(models.Orders.order_id).filter(models.Orders.buyer_id.in_(bench_buyers))
+        cart_ids = db.query(models.Cart.cart_id).filter(models.Cart.buyer_id.in_(bench_buyers))
+        for model in (models.Shipment, models.OrderItem, models.Payment):
+            db.query(model).filter(model.order_id.in_(order_ids)).delete(synchronize_session=False)
+        db.query(models.Orders).filter(models.Orders.order_id.in_(order_ids)).delete(synchronize_session=False)
+        db.query(models.CartItem).filter(models.CartItem.cart_id.in_(cart_ids)).delete(synchronize_session=False)
+        db.query(models.Cart).filter(models.Cart.cart_id.in_(cart_ids)).delete(synchronize_session=False)
+        db.query(models.Customer).filter(models.Customer.c_id.like(f"{BENCH_PREFIX}-%")).delete(synchronize_session=False)
+        db.query(models.Product).filter(models.Product.p_id.like(f"{BENCH_PREFIX}%")).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def checkout_one(buyer_id: str):
+    """Checkout d'un panier dans sa propre session. Retourne (ok, latence en s)."""
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        crud.checkout_cart(db, buyer_id, "card")
+        ok = True
+    except ValueError:
+        ok = False
+    finally:
+        db.close()
+    return ok, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark checkout_cart")
+    parser.add_argument("--buyers", type=int, default=200, help="Nombre de paniers à valider")
+    parser.add_argument("--items", type=int, default=10, help="Produits distincts par panier")
+    parser.add_argument("--workers", type=int, default=16, help="Checkouts concurrents")
+    parser.add_argument("--contention", action="store_true",
+                        help="Tous les threads valident le même panier")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    cleanup()
+
+    n_buyers = 1 if args.contention else args.buyers
+    print(f"Seeding {n_buyers} cart(s) x {args.items} item(s)...")
+    buyer_ids = seed_buyers(n_buyers, seed_products(args.items))
+    targets = buyer_ids * args.workers if args.contention else buyer_ids
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(checkout_one, targets))
+        elapsed = time.perf_counter() - start
+    finally:
+        cleanup()
+
+    succeeded = sum(1 for ok, _ in results if ok)
+    latencies = sorted(lat for _, lat in results)
+    print(f"Checkouts:      {succeeded}/{len(results)} succeeded")
+    print(f"Elapsed:        {elapsed:.2f}s")
+    print(f"Throughput:     {succeeded / elapsed:.1f} checkouts/s")
+    print(f"Latency p50:    {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"Latency p95:    {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+
+    if args.contention and succeeded != 1:
+        print(f"[FAIL] Expected exactly one successful checkout, got {succeeded}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
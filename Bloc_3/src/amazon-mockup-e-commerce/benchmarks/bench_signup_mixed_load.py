@@ -0,0 +1,109 @@
+"""
+Benchmark de charge mixte : inscriptions (bcrypt) + lectures.
+
+Mesure la latence d'un endpoint de lecture seul (baseline), puis pendant un
+pic d'inscriptions concurrentes sur POST /customers/. Avec le hachage dans le
+pool de processus dédié et un endpoint async (ni thread du threadpool ni
+connexion PostgreSQL tenus pendant le hachage), la latence p95 des lectures doit
+rester proche de la baseline et aucune lecture ne doit échouer.
+
+Le nombre d'inscriptions concurrentes par défaut (64) dépasse le threadpool de
+l'API (40 threads AnyIO) et le pool SQLAlchemy (5 + 10 connexions) : c'est la
+situation où des inscriptions qui bloquent un thread et une connexion font
+échouer les lectures (QueuePool timeout).
+
+Nécessite l'API démarrée (python backend/main.py).
+
+Usage:
+    python benchmarks/bench_signup_mixed_load.py --duration 20 --signup-workers 64
+    python benchmarks/bench_signup_mixed_load.py --read-path "/snowflake/products/B076LFDBKD/reviews?limit=10"
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+
+
+def read_loop(session, url, stop, latencies, errors):
+    """Enchaîne les lectures jusqu'à l'arrêt et enregistre les latences (ms) et les échecs."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            ok = session.get(url).ok
+        except requests.RequestException:
+            ok = False
+        if ok:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(1)
+
+
+def signup_loop(session, stop, counter, errors):
+    """Enchaîne les inscriptions de clients de test jusqu'à l'arrêt."""
+    while not stop.is_set():
+        uid = uuid.uuid4()
+        resp = session.post(f"{API_URL}/customers/", json={
+            "fname": "Bench",
+            "lname": "Signup",
+            "phone": f"{uid.int % 10**10:010d}",
+            "email": f"bench-{uid}@example.com",
+            "pwd": "bench-password",
+        })
+        (counter if resp.ok else errors).append(1)
+
+
+def run_phase(read_url, duration, read_workers, signup_workers):
+    """Lance une phase de charge. Retourne (latences de lecture, échecs de lecture, inscriptions, échecs)."""
+    stop = threading.Event()
+    latencies, read_errors, signups, signup_errors = [], [], [], []
+    with ThreadPoolExecutor(max_workers=read_workers + signup_workers) as pool:
+        futures = [pool.submit(read_loop, requests.Session(), read_url, stop, latencies, read_errors)
+                   for _ in range(read_workers)]
+        futures += [pool.submit(signup_loop, requests.Session(), stop, signups, signup_errors)
+                    for _ in range(signup_workers)]
+        time.sleep(duration)
+        stop.set()
+        for future in futures:
+            future.result()
+    return sorted(latencies), len(read_errors), len(signups), len(signup_errors)
+
+
+def report(label, latencies, read_errors, signups, signup_errors, duration):
+    p50 = statistics.median(latencies) if latencies else float("nan")
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else float("nan")
+    print(f"{label:<22} reads={len(latencies):>6}  read errors={read_errors:>4}  "
+          f"p50={p50:7.1f} ms  p95={p95:7.1f} ms  "
+          f"signups/s={signups / duration:6.1f}  signup errors={signup_errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inscriptions + lectures")
+    parser.add_argument("--read-path", default="/products/?limit=20", help="Endpoint de lecture mesuré")
+    parser.add_argument("--duration", type=float, default=20, help="Durée de chaque phase (s)")
+    parser.add_argument("--read-workers", type=int, default=4)
+    parser.add_argument("--signup-workers", type=int, default=64,
+                        help="Inscriptions concurrentes (au-delà du threadpool et du pool de connexions)")
+    args = parser.parse_args()
+
+    read_url = f"{API_URL}{args.read_path}"
+    baseline = run_phase(read_url, args.duration, args.read_workers, 0)
+    mixed = run_phase(read_url, args.duration, args.read_workers, args.signup_workers)
+
+    print(f"Read endpoint: {read_url}")
+    report("Reads only", *baseline, args.duration)
+    report("Reads + signup burst", *mixed, args.duration)
+    if mixed[1]:
+        print(f"[FAIL] {mixed[1]} read(s) failed during the signup burst")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark de la conversion des résultats Snowflake en dictionnaires.
+
+Compare, sur un résultat synthétique au schéma de REVIEW_RELEVANT :
+- rows  : lignes Python (ce que rend fetchall) puis dict(zip(columns, row))
+- arrow : lots Arrow convertis colonne par colonne (arrow_batches_to_dicts,
+          chemin de execute_query quand pyarrow est installé)
+- stream: mêmes lots Arrow consommés un par un (iter_query_batches), sans
+          garder tout le résultat
+
+Affiche le temps et le pic de mémoire Python (tracemalloc) de chaque chemin.
+Avec --live, exécute en plus la requête sur Snowflake (credentials du .env)
+avec et sans lecture Arrow.
+
+Usage:
+    python benchmarks/bench_snowflake_fetch.py --rows 200000 --batch-size 10000
+    python benchmarks/bench_snowflake_fetch.py --live "SELECT * FROM review_relevant LIMIT 100000"
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pyarrow
+
+# Ajouter le répertoire backend au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import snowflake_connector
+from snowflake_connector import arrow_batches_to_dicts
+from snowflake_crud import REVIEW_COLUMNS
+
+
+def synthetic_batches(n_rows: int, batch_size: int, seed: int = 42) -> list:
+    """Lots Arrow au schéma de REVIEW_RELEVANT."""
+    rng = random.Random(seed)
+    batches = []
+    for start in range(0, n_rows, batch_size):
+        n = min(batch_size, n_rows - start)
+        ids = range(start, start + n)
+        batches.append(pyarrow.table({
+            "REVIEW_ID": pyarrow.array(ids, type=pyarrow.int64()),
+            "BUYER_ID": [f"BUYER{rng.randrange(50_000):06d}" for _ in ids],
+            "P_ID": [f"B0{rng.randrange(5_000):08d}" for _ in ids],
+            "PRODUCT_NAME": [f"Product {rng.randrange(5_000)}" for _ in ids],
+            "CATEGORY": [rng.choice(["Electronics", "Books", "Home", "Toys"]) for _ in ids],
+            "TITLE": [f"Review title {i}" for i in ids],
+            "DESCRIPTION": ["Great product, works as expected. " * rng.randint(1, 6) for _ in ids],
+            "RATING": pyarrow.array([rng.randint(1, 5) for _ in ids], type=pyarrow.int8()),
+            "TEXT_LENGTH": pyarrow.array([rng.randint(30, 200) for _ in ids], type=pyarrow.int32()),
+            "HAS_IMAGE": [rng.random() < 0.2 for _ in ids],
+            "HAS_ORDERS": [rng.random() < 0.6 for _ in ids],
+            "TEXT_LENGTH_SCORE": [rng.random() for _ in ids],
+            "IS_EXTREME_RATING": [rng.random() < 0.4 for _ in ids],
+            "KEYWORD_SCORE": [rng.random() for _ in ids],
+            "RELEVANCE_SCORE": [rng.random() * 100 for _ in ids],
+            "CATEGORY_REVIEW": [rng.choice(["QUALITY", "DELIVERY", "PRICE"]) for _ in ids],
+            "CONFIDENCE_SCORE": [rng.random() for _ in ids],
+            "RELEVANT_STATUS": [rng.choice(["RELEVANT", "IRRELEVANT"]) for _ in ids],
+            "REVIEW_IMG": [None if rng.random() < 0.8 else "https://img.example/x.jpg" for _ in ids],
+        }))
+    return batches
+
+
+def rows_path(batches: list) -> list:
+    """fetchall (lignes Python) puis dict(zip(columns, row))."""
+    columns = batches[0].column_names
+    rows = []
+    for table in batches:
+        rows.extend(zip(*(column.to_pylist() for column in table.columns)))
+    return [dict(zip([REVIEW_COLUMNS.get(c, c) for c in columns], row)) for row in rows]
+
+
+def arrow_path(batches: list) -> list:
+    """Lots Arrow convertis colonne par colonne, renommage par lot."""
+    results = []
+    for batch in arrow_batches_to_dicts(batches, REVIEW_COLUMNS):
+        results.extend(batch)
+    return results
+
+
+def stream_path(batches: list) -> int:
+    """Lots consommés un par un (nombre de lignes vues)."""
+    return sum(len(batch) for batch in arrow_batches_to_dicts(batches, REVIEW_COLUMNS))
+
+
+def measure(func, *args) -> tuple:
+    """(résultat, secondes, pic tracemalloc en Mo)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def run_live(query: str):
+    """Exécute la requête sur Snowflake avec et sans lecture Arrow."""
+    for arrow in (False, True):
+        snowflake_connector.SNOWFLAKE_ARROW_FETCH = arrow
+        rows, elapsed, peak = measure(snowflake_connector.execute_query, query)
+        label = "arrow" if arrow else "rows"
+        print(f"  live {label:<6} {len(rows):>9,} rows  {elapsed:7.2f}s  peak {peak:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Snowflake result conversion")
+    parser.add_argument("--rows", type=int, default=200_000, help="Lignes du résultat synthétique")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Lignes par lot Arrow")
+    parser.add_argument("--live", help="Requête à exécuter aussi sur Snowflake")
+    args = parser.parse_args()
+
+    batches = synthetic_batches(args.rows, args.batch_size)
+    print(f"{args.rows:,} rows in {len(batches)} Arrow batches")
+
+    expected, rows_s, rows_peak = measure(rows_path, batches)
+    results, arrow_s, arrow_peak = measure(arrow_path, batches)
+    seen, stream_s, stream_peak = measure(stream_path, batches)
+
+    print(f"  rows   {rows_s:7.2f}s  peak {rows_peak:8.1f} MB")
+    print(f"  arrow  {arrow_s:7.2f}s  peak {arrow_peak:8.1f} MB  (x{rows_s / arrow_s:.1f})")
+    print(f"  stream {stream_s:7.2f}s  peak {stream_peak:8.1f} MB  ({seen:,} rows)")
+    print(f"  identical: {results == expected}")
+
+    if args.live:
+        run_live(args.live)
+
+
+if __name__ == "__main__":
+    main()
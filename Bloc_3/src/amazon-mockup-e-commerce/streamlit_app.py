@@ -1,10 +1,76 @@
 import streamlit as st
 import requests
 import os
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # URL de l'API - utilise localhost en local, backend dans Docker
 API_URL = os.getenv("API_URL", "http://localhost:8000")
 
+# Durée de vie (s) des réponses API en cache côté Streamlit
+CACHE_TTL = int(os.getenv("STOREFRONT_CACHE_TTL", "300"))
+PRODUCTS_LIMIT = 100
+SEARCH_LIMIT = 50
+MAX_REVIEWS = 20  # borne haute du slider : on charge une fois, on découpe localement
+
+
+# ============================================
+# Accès API (session HTTP partagée + cache)
+# ============================================
+# Streamlit ré-exécute tout le script à chaque interaction (frappe dans le filtre,
+# slider...). Les réponses sont mises en cache par jeu de paramètres avec un TTL :
+# seule une nouvelle combinaison de paramètres déclenche un appel au backend.
+
+@st.cache_resource
+def get_http_session():
+    """Session HTTP partagée entre les reruns (pool de connexions keep-alive)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_json(path: str, params: dict = None):
+    resp = get_http_session().get(f"{API_URL}{path}", params=params, timeout=30)
+    resp.raise_for_status()
+    return resp.json()
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_products(limit: int = PRODUCTS_LIMIT):
+    return _get_json("/snowflake/products", {"limit": limit})
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def search_products(query: str, limit: int = SEARCH_LIMIT):
+    return _get_json("/snowflake/products/search", {"q": query, "limit": limit})
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_reviews(p_id: str, limit: int = MAX_REVIEWS):
+    return _get_json(f"/snowflake/products/{p_id}/reviews", {"limit": limit})
+
+
+def prefetch(p_id: str = None):
+    """
+    Charge la liste des produits et, si un produit était déjà sélectionné,
+    ses reviews en parallèle. Les résultats arrivent dans le cache des deux
+    fonctions ci-dessus.
+    """
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=2, initializer=lambda: add_script_run_ctx(ctx=ctx)) as pool:
+        products_future = pool.submit(fetch_products, PRODUCTS_LIMIT)
+        reviews_future = pool.submit(fetch_reviews, p_id, MAX_REVIEWS) if p_id else None
+        products = products_future.result()
+        if reviews_future is not None:
+            try:
+                reviews_future.result()
+            except requests.RequestException:
+                pass  # l'erreur sera affichée lors du chargement des reviews
+        return products
+
 # Configuration de la page
 st.set_page_config(
     page_title="Amazon Reviews Analysis",
@@ -39,9 +105,7 @@ selected_product = None
 if search_method == "Browse Products":
     # Fetch all products from Snowflake
     try:
-        products_resp = requests.get(f"{API_URL}/snowflake/products?limit=100")
-        products_resp.raise_for_status()
-        all_products = products_resp.json()
+        all_products = prefetch(st.session_state.get("selected_p_id"))
 
         if all_products:
             st.success(f"✅ {len(all_products)} produits disponibles")
@@ -49,17 +113,17 @@ if search_method == "Browse Products":
             # Add search filter
             search_filter = st.text_input("🔎 Filter products by name:", placeholder="Type to search...")
 
-            # Filter products based on search
-            if search_filter:
-                filtered_products = [
-                    p for p in all_products
-                    if search_filter.lower() in p['product_name'].lower()
-                ]
+            # Search the full catalog server-side (index en mémoire côté backend)
+            if search_filter.strip():
+                search_page = search_products(search_filter.strip(), SEARCH_LIMIT)
+                filtered_products = search_page["items"]
+                total_matches = search_page["total"]
             else:
                 filtered_products = all_products
+                total_matches = len(all_products)
 
             if filtered_products:
-                st.info(f"📊 Showing {len(filtered_products)} product(s)")
+                st.info(f"📊 Showing {len(filtered_products)} of {total_matches} product(s)")
 
                 # Create dropdown with product names
                 product_options = [
@@ -73,6 +137,7 @@ if search_method == "Browse Products":
                 selected_index = product_options.index(selected_product_display)
                 selected_product = filtered_products[selected_index]
                 selected_p_id = selected_product['p_id']
+                st.session_state["selected_p_id"] = selected_p_id
             else:
                 st.warning("⚠️ No products match your search filter.")
     except requests.RequestException as e:
@@ -111,15 +176,11 @@ if selected_p_id:
     st.subheader("⭐ Most Relevant Reviews")
 
     # Number of reviews to display
-    num_reviews = st.slider("Number of reviews to display:", min_value=5, max_value=20, value=10)
+    num_reviews = st.slider("Number of reviews to display:", min_value=5, max_value=MAX_REVIEWS, value=10)
 
-    # Get reviews for the selected product from Snowflake
+    # Get reviews for the selected product from Snowflake (cache: le slider ne rappelle pas l'API)
     try:
-        reviews_resp = requests.get(
-            f"{API_URL}/snowflake/products/{selected_p_id}/reviews?limit={num_reviews}"
-        )
-        reviews_resp.raise_for_status()
-        product_reviews = reviews_resp.json()
+        product_reviews = fetch_reviews(selected_p_id, MAX_REVIEWS)[:num_reviews]
 
         if product_reviews:
             st.info(f"📊 **{len(product_reviews)}** review(s) pertinente(s) trouvée(s)")
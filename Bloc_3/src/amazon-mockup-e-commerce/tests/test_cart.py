@@ -0,0 +1,107 @@
+"""
+PostgreSQL Tests for the Cart
+=============================
+Paniers d'un buyer (crud.get_or_create_cart, add_to_cart, price_cart) :
+cart.buyer_id n'est pas unique, un buyer avec deux paniers utilise toujours
+le plus ancien, et des premières visites concurrentes ne créent qu'un panier.
+
+Nécessite DATABASE_URL vers une base PostgreSQL (ignoré sinon).
+
+Usage:
+    DATABASE_URL=postgresql+psycopg2://... pytest tests/test_cart.py -v
+"""
+
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Ajouter le répertoire backend au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+    pytest.skip("DATABASE_URL does not point to PostgreSQL", allow_module_level=True)
+
+from sqlalchemy.exc import OperationalError
+
+from database import SessionLocal, engine
+import models, crud
+
+PREFIX = "TEST-CART"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    try:
+        models.Base.metadata.create_all(bind=engine)
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def buyer_and_product(db):
+    """Client et produit de test, supprimés avec leurs paniers après le test."""
+    c_id = f"{PREFIX}-{uuid.uuid4().hex[:12]}"
+    p_id = f"{PREFIX}-{uuid.uuid4().hex[:12]}"
+    db.add(models.Customer(c_id=c_id, fname="Test", lname="Cart", phone=f"{uuid.uuid4().int % 10**10:010d}",
+                           email=f"{c_id.lower()}@test.local", pwd="x"))
+    db.add(models.Product(p_id=p_id, p_name="Test product", p_desc="", price=10, qty=100))
+    db.commit()
+    yield c_id, p_id
+
+    db.rollback()
+    cart_ids = [cart_id for (cart_id,) in db.query(models.Cart.cart_id).filter(models.Cart.buyer_id == c_id)]
+    db.query(models.CartItem).filter(models.CartItem.cart_id.in_(cart_ids)).delete(synchronize_session=False)
+    db.query(models.Cart).filter(models.Cart.buyer_id == c_id).delete(synchronize_session=False)
+    db.query(models.Product).filter(models.Product.p_id == p_id).delete(synchronize_session=False)
+    db.query(models.Customer).filter(models.Customer.c_id == c_id).delete(synchronize_session=False)
+    db.commit()
+
+
+def test_buyer_with_two_carts_uses_the_oldest(db, buyer_and_product):
+    """Deux paniers pour un buyer : lecture, ajout et prix portent sur le plus ancien."""
+    buyer_id, p_id = buyer_and_product
+    first, second = models.Cart(buyer_id=buyer_id), models.Cart(buyer_id=buyer_id)
+    db.add(first)
+    db.flush()
+    db.add(second)
+    db.commit()
+
+    assert crud.get_or_create_cart(db, buyer_id).cart_id == first.cart_id
+    cart = crud.add_to_cart(db, buyer_id, p_id, qty=2)
+    pricing = crud.price_cart(db, buyer_id)
+
+    assert cart.cart_id == first.cart_id
+    assert (cart.total_qty, cart.total_price) == (2, 20)
+    assert (pricing["cart_id"], pricing["total"]) == (first.cart_id, 20)
+
+
+def test_concurrent_first_visits_create_one_cart(buyer_and_product):
+    buyer_id, _ = buyer_and_product
+
+    def visit(_):
+        session = SessionLocal()
+        try:
+            return crud.get_or_create_cart(session, buyer_id).cart_id
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        cart_ids = set(pool.map(visit, range(16)))
+
+    db = SessionLocal()
+    try:
+        n_carts = db.query(models.Cart).filter(models.Cart.buyer_id == buyer_id).count()
+    finally:
+        db.close()
+    assert len(cart_ids) == 1 and n_carts == 1
@@ -0,0 +1,164 @@
+"""
+Unit Tests for the Product Search Index
+=======================================
+Classement des résultats de ProductSearchIndex.search (trigrammes et préfixes),
+pagination, et rafraîchissement de CatalogSearch quand Snowflake ne répond pas.
+
+Usage:
+    pytest tests/test_product_search.py -v
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Ajouter le répertoire backend au path pour importer les modules
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from product_search import CatalogSearch, ProductSearchIndex, normalize
+
+PRODUCTS = [
+    {"p_id": "P1", "product_name": "Wireless Mouse", "category": "Electronics"},
+    {"p_id": "P2", "product_name": "Mouse Pad XL", "category": "Electronics"},
+    {"p_id": "P3", "product_name": "Gaming Mouse Wireless", "category": "Electronics"},
+    {"p_id": "P4", "product_name": "Mousetrap", "category": "Home"},
+    {"p_id": "P5", "product_name": "Café Crème Mug", "category": "Kitchen"},
+    {"p_id": "P6", "product_name": "Dormouse Plush", "category": "Toys"},
+]
+
+
+@pytest.fixture
+def index():
+    return ProductSearchIndex(PRODUCTS)
+
+
+def ids(results):
+    return [p["p_id"] for p in results]
+
+
+# ============================================================================
+# RANKING
+# ============================================================================
+
+def test_name_prefix_ranks_first(index):
+    """Names starting with the query come first, shortest name first."""
+    total, results = index.search("mouse")
+
+    assert total == 5
+    assert ids(results)[:2] == ["P4", "P2"]
+
+
+def test_word_start_ranks_before_inner_substring(index):
+    """A match at the start of a word beats a match inside a word."""
+    _, results = index.search("mouse")
+
+    assert ids(results).index("P3") < ids(results).index("P6")
+    assert ids(results)[-1] == "P6"  # "dormouse" : milieu de mot
+
+
+def test_all_tokens_must_match(index):
+    """Multi-word queries keep only products containing every word."""
+    total, results = index.search("wireless mouse")
+
+    assert total == 2
+    assert ids(results) == ["P1", "P3"]
+
+
+def test_category_matches(index):
+    total, results = index.search("kitchen")
+
+    assert (total, ids(results)) == (1, ["P5"])
+
+
+def test_accents_and_case_are_ignored(index):
+    assert ids(index.search("CAFE creme")[1]) == ["P5"]
+    assert normalize("  Café   Crème ") == "cafe creme"
+
+
+# ============================================================================
+# SHORT TOKENS (PREFIX SEARCH)
+# ============================================================================
+
+def test_short_token_matches_word_prefixes_only(index):
+    """Tokens under 3 characters match word prefixes, not inner substrings."""
+    total, results = index.search("mo")
+
+    assert total == 4
+    assert "P6" not in ids(results)  # "dormouse" contient "mo" mais pas en début de mot
+
+
+def test_short_token_combined_with_long_token(index):
+    total, results = index.search("ga mouse")
+
+    assert (total, ids(results)) == (1, ["P3"])
+
+
+def test_no_match_and_empty_query(index):
+    assert index.search("keyboard") == (0, [])
+    assert index.search("   ") == (0, [])
+
+
+# ============================================================================
+# PAGINATION
+# ============================================================================
+
+def test_offset_and_limit_page_through_ranking(index):
+    """Pages are consecutive slices of the full ranking; total ignores paging."""
+    _, full = index.search("mouse", limit=10)
+
+    pages = [index.search("mouse", limit=2, offset=offset) for offset in (0, 2, 4)]
+
+    assert all(total == 5 for total, _ in pages)
+    assert [p for _, page in pages for p in page] == full
+    assert index.search("mouse", limit=2, offset=10) == (5, [])
+
+
+# ============================================================================
+# CATALOG REFRESH
+# ============================================================================
+
+class FlakySource:
+    """Catalogue source whose version check can be made to fail."""
+
+    def __init__(self):
+        self.version, self.fail, self.loads = 1, False, 0
+
+    def get_version(self):
+        if self.fail:
+            raise ConnectionError("Snowflake unavailable")
+        return self.version
+
+    def load_catalog(self):
+        self.loads += 1
+        return PRODUCTS[:self.version + 1]
+
+
+def test_stale_index_is_served_when_version_check_fails():
+    source = FlakySource()
+    catalog = CatalogSearch(source.load_catalog, source.get_version, check_interval=0)
+    assert catalog.refresh(force=False) == 2
+
+    source.fail = True
+    assert catalog.refresh(force=False) == 2  # pas d'exception : index courant conservé
+    assert catalog.search("mouse")[0] == 2
+
+    with pytest.raises(ConnectionError):
+        catalog.refresh(force=True)  # refresh explicite : l'erreur remonte
+
+
+def test_background_refresh_swaps_index_on_version_change():
+    source = FlakySource()
+    catalog = CatalogSearch(source.load_catalog, source.get_version, check_interval=0)
+    catalog.refresh()
+    old_index = catalog.get_index()
+
+    source.version = 3
+    assert catalog.get_index() is old_index  # servi sans attendre la vérification
+    deadline = time.monotonic() + 5
+    while catalog.get_index() is old_index and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(catalog.get_index()) == 4
+    assert source.loads == 2